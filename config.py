@@ -3,3 +3,83 @@ import os
 DB_route_external = ""
 DB_route_internal = ""
 CHROME_BOOKMARK_PATH = os.path.expanduser("~/Library/Application Support/Google/Chrome/Default/Bookmarks")
+
+# 各種持久化快取（封面、索引等）存放的目錄
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache")
+
+# 本地資料夾封面：背景掃描的 worker 數，以及「資料夾內沒有媒體」的結果保留多久（秒）
+LOCAL_COVER_SCAN_WORKERS = 2
+LOCAL_COVER_NEGATIVE_TTL = 600.0
+LOCAL_LISTING_CACHE_SIZE = 256   # 快取的資料夾列表數量（依資料夾 mtime 失效）
+LOCAL_LISTING_MAX_AGE = 300.0    # 秒；檔案內容被修改時資料夾 mtime 不變，超過此時間仍會重新列出
+LOCAL_PAGE_LIMIT = 200           # 本地資料夾頁面每頁的項目數（其餘由前端以 cursor 續載）
+LOCAL_PAGE_MAX_LIMIT = 500
+FLAT_VIEW_MAX_ITEMS = 5000       # /flat/ 攤平檢視最多串流的項目數
+FLAT_VIEW_CHUNK_SIZE = 200       # /flat/ 每次從單一資料夾讀取的項目數
+
+# 本地收藏的 SQLite 目錄索引：初次建立平行掃描的 thread 數、定期比對資料夾 mtime 的間隔（秒），
+# 以及是否使用 inotify（僅 Linux；網路磁碟收不到事件時由定期比對補上）
+LOCAL_CATALOG_ENABLED = True
+LOCAL_CATALOG_SCAN_WORKERS = 8
+LOCAL_CATALOG_RECONCILE_INTERVAL = 300.0
+LOCAL_CATALOG_INOTIFY = True
+
+# 格狀檢視縮圖（/thumb/<size>/...）：需要 Pillow，未安裝時直接送原圖
+THUMBNAIL_SIZES = (160, 320, 640)
+THUMBNAIL_DEFAULT_SIZE = 320
+THUMBNAIL_FORMAT = "webp"       # "webp" 或 "jpeg"
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_WORKERS = 2           # 產生縮圖的 process 數
+
+# 圖片尺寸：列表 API 只讀檔頭取得寬高與方向（依路徑 + mtime 快取在記憶體）
+IMAGE_SIZE_WORKERS = 8
+IMAGE_SIZE_CACHE_SIZE = 200_000
+
+# 相似圖片：背景計算 pHash / dHash 指紋，詳細頁依外觀推薦相似項目
+SIMILAR_IMAGES_ENABLED = True
+SIMILAR_IMAGES_WORKERS = 2           # 計算指紋的 process 數
+SIMILAR_IMAGES_MAX_DISTANCE = 12     # 視為相似的最大 pHash 漢明距離（0–64）；索引的分段數依此決定，距離內的項目必定找到
+SIMILAR_IMAGES_RESCAN_INTERVAL = 3600.0
+
+# 重複檔案：依大小 → 開頭 / 結尾雜湊 → 完整雜湊逐層比對本地收藏與 Eagle 資源庫
+DUPLICATES_ENABLED = True
+DUPLICATES_WORKERS = 2
+DUPLICATES_PARTIAL_BYTES = 64 * 1024
+DUPLICATES_RESCAN_INTERVAL = 6 * 3600.0
+DUPLICATES_PAGE_LIMIT = 50           # /duplicates/ 每頁的群組數
+
+# 主色調：本地圖片以 k-means 計算主色，Eagle 項目沿用 Eagle 的 palettes，供「以顏色搜尋」使用
+COLOR_INDEX_ENABLED = True
+COLOR_INDEX_WORKERS = 2
+COLOR_PALETTE_SIZE = 5               # 每張圖片的主色數
+COLOR_INDEX_RESCAN_INTERVAL = 3600.0
+COLOR_SEARCH_MAX_DISTANCE = 20.0     # 預設的最大色差（CIE ΔE76）
+COLOR_SEARCH_MIN_RATIO = 10          # 主色至少佔畫面的百分比才列入比對
+
+# Eagle API client
+EAGLE_API_BASE_URL = "http://localhost:41595/api"
+EAGLE_CONNECT_TIMEOUT = 1.0   # 秒；Eagle 在本機，連不上通常代表沒開
+EAGLE_READ_TIMEOUT = 15.0     # 秒；大型 item/list 可能較慢
+EAGLE_MAX_RETRIES = 2         # 僅套用於 GET 的連線錯誤與 5xx；讀取逾時不重試
+EAGLE_RETRY_BACKOFF = 0.2
+EAGLE_POOL_SIZE = 8           # 與 Flask worker / thread 數一致
+EAGLE_MAX_CONCURRENCY = 4     # 同時送往 Eagle 的請求上限（Eagle 本身會序列化處理）
+EAGLE_BREAKER_FAILURES = 3    # 連續失敗幾次後 circuit breaker 打開（之後請求立即失敗）
+EAGLE_BREAKER_RESET = 10.0    # 秒；breaker 打開後多久允許試探請求
+EAGLE_HEALTH_INTERVAL = 5.0   # 秒；背景健康檢查 application/info 的間隔，0 表示停用
+EAGLE_STALE_CACHE_SIZE = 128  # Eagle 無法連線時可回傳的「最後一次成功結果」數量
+EAGLE_LIBRARY_INFO_TTL = 30.0  # 秒；library/info 快取時間
+EAGLE_ITEM_INFO_CACHE_SIZE = 512
+EAGLE_ITEM_INFO_TTL = 300.0    # 秒；項目被修改時（metadata.json mtime 改變）會提前失效
+EAGLE_LIST_PAGE_SIZE = 200     # 逐頁讀取 item/list 時每頁的數量
+EAGLE_LIST_MAX_ITEMS = 20000   # 單一資料夾 / 標籤最多讀取的項目數，None 表示不限制
+EAGLE_PAGE_LIMIT = 100         # 資料夾 / 標籤 / 搜尋頁面每頁顯示的項目數
+EAGLE_PAGE_MAX_LIMIT = 200
+
+# Eagle 資料來源："api" 走 Eagle HTTP API；"disk" 直接讀取資源庫目錄（Eagle 未開啟時仍可瀏覽）
+EAGLE_BACKEND = "api"
+EAGLE_LIBRARY_PATH = ""       # disk 模式的資源庫路徑（xxx.library）；留空則啟動後向 API 詢問一次
+EAGLE_DISK_LOAD_WORKERS = 8
+
+# 首頁探索區塊：背景重建 snapshot 的間隔（秒），0 表示只在第一次請求時建立
+DISCOVERY_REFRESH_INTERVAL = 300.0
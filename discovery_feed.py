@@ -0,0 +1,172 @@
+"""
+首頁探索區塊（discovery feed）。
+
+各區塊的候選資料（主打、串流項目、資料夾、標籤、主題合集）以 thread pool 同時建立，
+存成一份 snapshot，由背景 thread 定期重建；每次請求只從 snapshot 做隨機抽樣。
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import src.eagle_api as EG
+from file_handler import get_eagle_stream_items, get_eagle_folders, get_eagle_tags
+
+
+def _build_hero():
+    return get_eagle_stream_items(offset=0, limit=10)
+
+
+def _build_stream_pool():
+    return get_eagle_stream_items(offset=20, limit=40)
+
+
+def _build_folders():
+    _, folder_data = get_eagle_folders()
+    return folder_data
+
+
+def _build_tags():
+    _, tag_data = get_eagle_tags()
+    return tag_data
+
+
+def _build_clusters(folder_data: List[Dict]) -> List[Dict]:
+    """依資料夾名稱的第一個字詞分群，至少兩個資料夾才成為合集。"""
+    clusters_map = {}
+    for folder in folder_data or []:
+        words = folder.get("name", "").split()
+        if not words:
+            continue
+        clusters_map.setdefault(words[0], []).append(folder)
+
+    return [
+        {"title": f"{key} 精選合集", "items": items[:5]}
+        for key, items in clusters_map.items()
+        if len(items) >= 2
+    ]
+
+
+SECTION_BUILDERS: Dict[str, Callable[[], List[Dict]]] = {
+    "hero": _build_hero,
+    "stream": _build_stream_pool,
+    "folders": _build_folders,
+    "tags": _build_tags,
+}
+
+
+class DiscoveryFeed:
+    """
+    持有首頁各區塊候選資料的 snapshot。
+
+    - 第一次請求時同步建立，之後由背景 thread 每 refresh_interval 秒重建。
+    - 單一區塊失敗時保留上一份 snapshot 的該區塊，不讓整頁變空。
+    - 還沒有 snapshot 時若所有區塊都失敗（例如 Eagle 尚未啟動），結果不保存，下一次請求重新建立。
+    - 資源庫切換時立即作廢，下一次請求重新同步建立。
+    """
+
+    def __init__(self,
+                 builders: Optional[Dict[str, Callable[[], List[Dict]]]] = None,
+                 refresh_interval: float = 300.0,
+                 max_workers: int = 4):
+        self.builders = builders or SECTION_BUILDERS
+        self.refresh_interval = refresh_interval
+        self.max_workers = max_workers
+
+        self._snapshot: Optional[Dict] = None
+        self._build_lock = threading.Lock()
+        self._refresher: Optional[threading.Thread] = None
+        self._refresher_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def invalidate(self, *_):
+        self._snapshot = None
+
+    def snapshot(self) -> Dict:
+        snapshot = self._snapshot
+        if snapshot is None:
+            with self._build_lock:
+                # 同時進來的請求只需要建立一次
+                snapshot = self._snapshot or self._rebuild()
+        self._ensure_refresher()
+        return snapshot
+
+    def refresh(self) -> Dict:
+        """同時重建所有區塊並替換 snapshot。"""
+        with self._build_lock:
+            return self._rebuild()
+
+    def _rebuild(self) -> Dict:
+        previous = self._snapshot
+        sections = {}
+        failed = 0
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="discovery") as executor:
+            futures = {name: executor.submit(builder) for name, builder in self.builders.items()}
+            for name, future in futures.items():
+                try:
+                    sections[name] = future.result() or []
+                except Exception as exc:
+                    print(f"Failed to build discovery section '{name}': {exc}")
+                    sections[name] = (previous or {}).get(name, [])
+                    failed += 1
+
+        sections["clusters"] = _build_clusters(sections.get("folders"))
+        sections["built_at"] = time.time()
+        if previous is None and failed == len(self.builders):
+            return sections
+        self._snapshot = sections
+        return sections
+
+    def _ensure_refresher(self):
+        if self._refresher is not None or self.refresh_interval <= 0:
+            return
+        with self._refresher_lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._refresh_loop, name="discovery-refresh", daemon=True)
+                self._refresher.start()
+
+    def _refresh_loop(self):
+        while not self._stop.wait(self.refresh_interval):
+            self.refresh()
+
+    def close(self):
+        self._stop.set()
+
+    def render_context(self) -> Dict:
+        """從 snapshot 抽樣出首頁模板需要的變數。"""
+        snapshot = self.snapshot()
+        hero_payload = snapshot.get("hero") or []
+        stream_pool = snapshot.get("stream") or []
+        folder_data = snapshot.get("folders") or []
+        tag_data = snapshot.get("tags") or []
+
+        image_only = [item for item in stream_pool if item.get("media_type") == "image"]
+        video_only = [item for item in stream_pool if item.get("media_type") == "video"]
+        clusters = list(snapshot.get("clusters") or [])
+        random.shuffle(clusters)
+
+        return {
+            "hero_item": hero_payload[0] if hero_payload else None,
+            "featured_media": hero_payload[1:5],
+            "random_images": random.sample(image_only, min(8, len(image_only))),
+            "random_videos": random.sample(video_only, min(4, len(video_only))),
+            "random_folders": random.sample(folder_data, min(6, len(folder_data))),
+            "eagle_tags": random.sample(tag_data, min(20, len(tag_data))),
+            "curated_clusters": clusters[:3],
+        }
+
+
+_feed = DiscoveryFeed()
+EG.EAGLE_on_library_change(lambda old_path, new_path: _feed.invalidate())
+
+
+def configure_discovery_feed(**kwargs):
+    """以新設定重建 discovery feed（參數同 DiscoveryFeed）。"""
+    global _feed
+    _feed.close()
+    _feed = DiscoveryFeed(**kwargs)
+
+
+def get_discovery_context() -> Dict:
+    return _feed.render_context()
@@ -6,14 +6,41 @@ from datetime import datetime
 from urllib.parse import quote
 import mimetypes
 import src.eagle_api as EG
+import src.media_index as MI
+from src.media_index import IMAGE_EXTENSIONS, VIDEO_EXTENSIONS
 from flask import abort
-from config import DB_route_internal, DB_route_external, CHROME_BOOKMARK_PATH
+from werkzeug.exceptions import NotFound
+from config import (
+    DB_route_internal,
+    DB_route_external,
+    CHROME_BOOKMARK_PATH,
+    EAGLE_LIST_PAGE_SIZE,
+    EAGLE_LIST_MAX_ITEMS,
+    THUMBNAIL_DEFAULT_SIZE,
+    COLOR_SEARCH_MAX_DISTANCE,
+    COLOR_SEARCH_MIN_RATIO,
+    FLAT_VIEW_MAX_ITEMS,
+    FLAT_VIEW_CHUNK_SIZE,
+)
 
 
-IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp"}
-VIDEO_EXTENSIONS = {"mp4", "mov", "avi", "mkv", "webm", "m4v"}
 DEFAULT_THUMBNAIL_ROUTE = "/static/default_thumbnail.svg"
 DEFAULT_VIDEO_THUMBNAIL_ROUTE = "/static/default_video_thumbnail.svg"
+THUMBNAIL_EXTENSIONS = {"png", "jpg", "jpeg", "webp"}  # GIF 保留動畫，直接使用原檔
+SORT_LABELS = {
+    "name": "名稱",
+    "mtime": "修改時間",
+    "created": "建立時間",
+    "size": "檔案大小",
+    "resolution": "解析度",
+}
+# sort -> Eagle 的 orderBy：不帶前綴為升冪，前綴 "-" 為降冪；Eagle API 沒有依修改時間排序，因此不提供 mtime
+EAGLE_SORT_ORDERS = {
+    "name": "NAME",
+    "created": "CREATEDATE",
+    "size": "FILESIZE",
+    "resolution": "RESOLUTION",
+}
 
 
 def _extract_youtube_id(url):
@@ -54,6 +81,15 @@ def _build_file_route(abs_path, src):
         return f"/serve_image/{normalized}"
     return f"/{normalized}"
 
+def _build_thumbnail_route(abs_path, src="external", size=THUMBNAIL_DEFAULT_SIZE):
+    """
+    格狀檢視用的縮圖路徑（/thumb/<size>/<絕對路徑>）；不縮圖的格式直接用原檔路徑。
+    """
+    if os.path.splitext(abs_path)[1].lower().lstrip(".") not in THUMBNAIL_EXTENSIONS:
+        return _build_file_route(abs_path, src)
+    normalized = _normalize_slashes(os.path.abspath(abs_path)).lstrip("/")
+    return f"/thumb/{size}/{quote(normalized, safe='/:')}"
+
 def _build_image_url(rel_path, src):
     normalized_src = _normalize_source(src)
     normalized_path = _normalize_slashes(rel_path or "")
@@ -77,6 +113,13 @@ def _build_folder_url(rel_path, src):
     return "/?src=internal"
 
 
+def _build_flat_url(rel_path, src):
+    normalized_path = _normalize_slashes(rel_path or "")
+    quoted_path = quote(normalized_path, safe="/")
+    query = "" if _normalize_source(src) == "external" else "?src=internal"
+    return f"/flat/{quoted_path}/{query}" if quoted_path else f"/flat/{query}"
+
+
 def _build_video_url(rel_path, src):
     normalized = _normalize_slashes(rel_path)
     quoted_path = quote(normalized, safe="/")
@@ -84,35 +127,38 @@ def _build_video_url(rel_path, src):
     return f"/video/{quoted_path}{query}"
 
 
-def _find_video_thumbnail(abs_video_path, src):
-    base, _ = os.path.splitext(abs_video_path)
-    candidates = []
-    for ext in IMAGE_EXTENSIONS:
-        candidates.append(f"{base}_thumbnail.{ext}")
-        candidates.append(f"{base}.{ext}")
-
-    for candidate in candidates:
-        if os.path.isfile(candidate):
-            return _build_file_route(candidate, src)
+def _find_video_thumbnail(abs_video_path, src, listing=None):
+    """
+    比對影片同層的檔名找縮圖；listing 為找到該影片的那份資料夾列表（省略時讀快取）。
+    """
+    if listing is None:
+        try:
+            listing = MI.list_directory(os.path.dirname(os.path.abspath(abs_video_path)))
+        except OSError:
+            return DEFAULT_VIDEO_THUMBNAIL_ROUTE
 
+    thumbnail_path = listing.find_video_thumbnail(os.path.basename(abs_video_path))
+    if thumbnail_path:
+        return _build_thumbnail_route(thumbnail_path, src)
     return DEFAULT_VIDEO_THUMBNAIL_ROUTE
 
 
-def _find_directory_thumbnail(abs_folder_path, src):
-    for root, _, files in os.walk(abs_folder_path):
-        for file_name in sorted(files):
-            abs_file_path = os.path.join(root, file_name)
-            if _is_image_file(file_name):
-                return _build_file_route(abs_file_path, src)
-            if _is_video_file(file_name):
-                return _find_video_thumbnail(abs_file_path, src)
-    return DEFAULT_THUMBNAIL_ROUTE
+def _find_directory_thumbnail(abs_folder_path, src, mtime=None):
+    """
+    資料夾封面：查本地封面快取，不做遞迴掃描（尚未掃描完成時先用預設縮圖）。
+    """
+    cover_path = MI.get_folder_cover(abs_folder_path, mtime)
+    if cover_path is None:
+        return DEFAULT_THUMBNAIL_ROUTE
+    if _is_video_file(cover_path):
+        return _find_video_thumbnail(cover_path, src)
+    return _build_thumbnail_route(cover_path, src)
 
 
-def _build_folder_entry(display_name, abs_path, rel_path, src):
+def _build_folder_entry(display_name, abs_path, rel_path, src, mtime=None):
     return {
         "name": display_name,
-        "thumbnail_route": _find_directory_thumbnail(abs_path, src),
+        "thumbnail_route": _find_directory_thumbnail(abs_path, src, mtime),
         "url": _build_folder_url(rel_path, src),
         "item_path": os.path.abspath(abs_path),
         "media_type": "folder",
@@ -121,11 +167,10 @@ def _build_folder_entry(display_name, abs_path, rel_path, src):
 
 
 def _build_image_entry(display_name, abs_path, rel_path, src):
-    file_route = _build_file_route(abs_path, src)
     ext = os.path.splitext(display_name)[1].lstrip(".").lower()
     return {
         "name": display_name,
-        "thumbnail_route": file_route,
+        "thumbnail_route": _build_thumbnail_route(abs_path, src),
         "url": _build_image_url(rel_path, src),
         "item_path": os.path.abspath(abs_path),
         "media_type": "image",
@@ -133,11 +178,11 @@ def _build_image_entry(display_name, abs_path, rel_path, src):
     }
 
 
-def _build_video_entry(display_name, abs_path, rel_path, src):
+def _build_video_entry(display_name, abs_path, rel_path, src, listing=None):
     ext = os.path.splitext(display_name)[1].lstrip(".").lower()
     return {
         "name": display_name,
-        "thumbnail_route": _find_video_thumbnail(abs_path, src),
+        "thumbnail_route": _find_video_thumbnail(abs_path, src, listing),
         "url": _build_video_url(rel_path, src),
         "item_path": os.path.abspath(abs_path),
         "media_type": "video",
@@ -145,33 +190,79 @@ def _build_video_entry(display_name, abs_path, rel_path, src):
     }
 
 
-def _collect_directory_entries(base_dir, relative_path, src):
-    normalized_src = _normalize_source(src)
-    target_dir = os.path.join(base_dir, relative_path) if relative_path else base_dir
-    if not os.path.isdir(target_dir):
-        abort(404)
-
+def _list_local_directory(abs_dir):
+    """讀取（快取的）資料夾列表；資料夾不存在時 404。"""
     try:
-        entries = sorted(os.listdir(target_dir))
-    except FileNotFoundError:
+        return MI.list_directory(abs_dir)
+    except (FileNotFoundError, NotADirectoryError):
         abort(404)
 
-    folders, files = [], []
-    for entry in entries:
-        if entry.startswith("."):
-            continue
-        abs_entry = os.path.join(target_dir, entry)
-        rel_entry = os.path.relpath(abs_entry, base_dir)
-        rel_entry = _normalize_slashes(rel_entry)
 
-        if os.path.isdir(abs_entry):
-            folders.append(_build_folder_entry(entry, abs_entry, rel_entry, normalized_src))
-        elif _is_image_file(entry):
-            files.append(_build_image_entry(entry, abs_entry, rel_entry, normalized_src))
-        elif _is_video_file(entry):
-            files.append(_build_video_entry(entry, abs_entry, rel_entry, normalized_src))
+def _join_relative(relative_path, name):
+    return f"{relative_path}/{name}" if relative_path else name
+
+
+def _build_local_entry(entry, relative_path, src, listing):
+    rel_entry = _join_relative(relative_path, entry.name)
+    if entry.is_dir:
+        return _build_folder_entry(entry.name, entry.path, rel_entry, src, entry.mtime)
+    if entry.media_type == "image":
+        return _build_image_entry(entry.name, entry.path, rel_entry, src)
+    return _build_video_entry(entry.name, entry.path, rel_entry, src, listing)
 
-    return folders + files
+
+def _attach_image_sizes(items, mtimes=None):
+    """
+    為列表項目加上 width / height / orientation，讓前端在像素載入前就能排版。
+
+    已帶寬高的項目（Eagle metadata）只補上方向；其餘圖片只讀檔頭取得尺寸（依路徑 + mtime 快取）。
+    資料夾、影片等無法取得尺寸的項目三個欄位皆為 None。
+    mtimes: {item_path: mtime}，來自資料夾列表時可省去 stat。
+    """
+    mtimes = mtimes or {}
+    pending = []
+    for item in items:
+        size = None
+        if item.get("width") and item.get("height"):
+            size = MI.make_size(int(item["width"]), int(item["height"]))
+        elif item.get("media_type") == "image" and item.get("item_path"):
+            pending.append(item)
+        item["width"], item["height"], item["orientation"] = size or (None, None, None)
+
+    if pending:
+        sizes = MI.get_image_sizes([(item["item_path"], mtimes.get(item["item_path"])) for item in pending])
+        for item in pending:
+            size = sizes.get(item["item_path"])
+            if size is not None:
+                item["width"], item["height"], item["orientation"] = size
+    return items
+
+
+def _collect_directory_entries(base_dir, relative_path, src, sort="name", order="asc", cursor=None, limit=None):
+    """
+    列出資料夾內的子資料夾與媒體檔（資料夾在前）。
+
+    cursor / limit: keyset 分頁參數，limit 為 None 時回傳整個資料夾。
+    Returns (data, next_cursor)；已是最後一頁時 next_cursor 為 None。
+    """
+    normalized_src = _normalize_source(src)
+    if sort not in MI.SORT_KEYS:
+        abort(400, description=f"Unsupported sort: {sort}")
+    if order not in ("asc", "desc"):
+        abort(400, description=f"Unsupported order: {order}")
+
+    target_dir = os.path.join(base_dir, relative_path) if relative_path else base_dir
+    listing = _list_local_directory(target_dir)
+    try:
+        after = MI.decode_cursor(cursor) if cursor else None
+        entries, next_key = MI.page_directory(listing, sort, order == "desc", after, limit)
+    except (ValueError, TypeError):
+        abort(400, description="Invalid cursor")
+
+    # 只為這一頁的項目建立縮圖路由等資料
+    data = [_build_local_entry(entry, relative_path, normalized_src, listing) for entry in entries]
+    _attach_image_sizes(data, {entry.path: entry.mtime for entry in entries if entry.media_type == "image"})
+    return data, MI.encode_cursor(next_key) if next_key is not None else None
 
 
 def _human_readable_size(num_bytes):
@@ -218,13 +309,14 @@ def get_all_folders_info(src):
         "filesystem_path": os.path.abspath(base_dir)
     }
 
-    data = _collect_directory_entries(base_dir, "", normalized_src)
+    data, _ = _collect_directory_entries(base_dir, "", normalized_src)
     return metadata, data
 
-def get_folder_images(folder_path, src=None):
+def get_folder_images(folder_path, src=None, cursor=None, limit=None, sort="name", order="asc"):
     """
     取得指定資料夾內的所有圖片，符合 EAGLE API 格式
     從任意資料夾（base_dir + folder_path）中取得圖片
+    cursor / limit / sort / order: 分頁與排序參數，limit 為 None 時回傳整個資料夾
     """
 
     normalized_src = _normalize_source(src)
@@ -232,21 +324,114 @@ def get_folder_images(folder_path, src=None):
     base_dir = DB_route_external if normalized_src == "external" else DB_route_internal
 
     target_dir = os.path.join(base_dir, safe_folder_path) if safe_folder_path else base_dir
-    if not os.path.isdir(target_dir):
-        abort(404)
-    
+    _list_local_directory(target_dir)  # 資料夾不存在時 404
+
+    data, next_cursor = _collect_directory_entries(
+        base_dir, safe_folder_path, normalized_src, sort=sort, order=order, cursor=cursor, limit=limit
+    )
     metadata = {
         "name": os.path.basename(safe_folder_path.rstrip("/")) if safe_folder_path else os.path.basename(os.path.normpath(base_dir)),
         "category": "folder",
         "tags": [],
         "path": _build_folder_url(safe_folder_path, normalized_src),
         "thumbnail_route": _find_directory_thumbnail(target_dir, normalized_src),
-        "filesystem_path": os.path.abspath(target_dir)
+        "filesystem_path": os.path.abspath(target_dir),
+        "flat_url": _build_flat_url(safe_folder_path, normalized_src),
+        "sort_options": [(key, SORT_LABELS.get(key, key)) for key in MI.SORT_KEYS],
+        "pagination": {
+            "cursor": cursor,
+            "limit": limit,
+            "next_cursor": next_cursor,
+            "sort": sort,
+            "order": order
+        }
     }
-
-    data = _collect_directory_entries(base_dir, safe_folder_path, normalized_src)
     return metadata, data
 
+def _iter_flat_entries(base_dir, root_path, src, sort, order, stats, max_items, chunk_size):
+    """
+    深度優先走訪 root_path 底下的所有資料夾，逐一產生媒體項目（資料夾本身不產生）。
+
+    每個資料夾以 _collect_directory_entries 分段讀取（每次 chunk_size 筆），
+    同一時間只保留一段項目與待走訪的資料夾路徑；呼叫端停止迭代（例如連線中斷）時走訪隨即結束。
+    """
+    base_dir = os.path.abspath(base_dir)
+    pending = [root_path]
+    visited = set()
+    try:
+        while pending:
+            relative_path = pending.pop()
+            real_dir = os.path.realpath(os.path.join(base_dir, relative_path))
+            if real_dir in visited:  # 符號連結造成的迴圈
+                continue
+            visited.add(real_dir)
+            stats["folders"] += 1
+
+            subfolders = []
+            cursor = None
+            while True:
+                try:
+                    data, cursor = _collect_directory_entries(
+                        base_dir, relative_path, src, sort=sort, order=order, cursor=cursor, limit=chunk_size
+                    )
+                except NotFound:  # 走訪途中被刪除的資料夾
+                    break
+                for item in data:
+                    if item["media_type"] == "folder":
+                        subfolders.append(_normalize_slashes(os.path.relpath(item["item_path"], base_dir)))
+                        continue
+                    if stats["items"] >= max_items:
+                        stats["truncated"] = True
+                        return
+                    item["folder"] = relative_path
+                    item["folder_url"] = _build_folder_url(relative_path, src)
+                    stats["items"] += 1
+                    yield item
+                if cursor is None:
+                    break
+            # 反向放入堆疊，讓子資料夾依排序順序走訪
+            pending.extend(reversed(subfolders))
+    finally:
+        stats["done"] = True
+
+
+def get_flat_folder_items(folder_path, src=None, sort="name", order="asc", max_items=None):
+    """
+    「攤平資料夾」：遞迴列出資料夾底下所有子資料夾內的圖片與影片。
+
+    資料夾本身在這裡就檢查（不存在時 404），項目則以 generator 回傳，
+    讓頁面可以邊走訪邊串流輸出；metadata["stats"] 在迭代過程中更新（items、folders、truncated、done）。
+    max_items: 最多列出的項目數，預設 FLAT_VIEW_MAX_ITEMS
+    Returns (metadata, items)
+    """
+    normalized_src = _normalize_source(src)
+    safe_folder_path = _safe_relative_path(folder_path)
+    base_dir = DB_route_external if normalized_src == "external" else DB_route_internal
+    if sort not in MI.SORT_KEYS:
+        abort(400, description=f"Unsupported sort: {sort}")
+    if order not in ("asc", "desc"):
+        abort(400, description=f"Unsupported order: {order}")
+
+    target_dir = os.path.join(base_dir, safe_folder_path) if safe_folder_path else base_dir
+    _list_local_directory(target_dir)  # 資料夾不存在時 404
+
+    max_items = FLAT_VIEW_MAX_ITEMS if max_items is None else max_items
+    stats = {"items": 0, "folders": 0, "truncated": False, "done": False}
+    metadata = {
+        "name": os.path.basename(safe_folder_path.rstrip("/")) if safe_folder_path else os.path.basename(os.path.normpath(base_dir)),
+        "category": "flat",
+        "tags": [],
+        "path": _build_flat_url(safe_folder_path, normalized_src),
+        "folder_url": _build_folder_url(safe_folder_path, normalized_src),
+        "thumbnail_route": DEFAULT_THUMBNAIL_ROUTE,
+        "filesystem_path": os.path.abspath(target_dir),
+        "max_items": max_items,
+        "stats": stats
+    }
+    items = _iter_flat_entries(base_dir, safe_folder_path, normalized_src, sort, order, stats,
+                               max_items, FLAT_VIEW_CHUNK_SIZE)
+    return metadata, items
+
 
 def get_video_details(video_path, src=None):
     """
@@ -257,13 +442,14 @@ def get_video_details(video_path, src=None):
     base_dir = DB_route_external if normalized_src == "external" else DB_route_internal
     target_path = os.path.join(base_dir, safe_video_path) if safe_video_path else base_dir
 
-    if not os.path.isfile(target_path) or not _is_video_file(target_path):
+    entry = MI.stat_entry(target_path)
+    if entry is None or entry.is_dir or entry.media_type != "video":
         abort(404)
 
     file_name = os.path.basename(safe_video_path) if safe_video_path else os.path.basename(target_path)
-    file_ext = os.path.splitext(file_name)[1].lstrip(".").lower()
-    file_size = os.path.getsize(target_path)
-    modified_time = datetime.fromtimestamp(os.path.getmtime(target_path))
+    file_ext = entry.ext or ""
+    file_size = entry.size
+    modified_time = datetime.fromtimestamp(entry.mtime)
     thumbnail_route = _find_video_thumbnail(target_path, normalized_src)
     source_url = _build_file_route(target_path, normalized_src)
     mime_type = mimetypes.guess_type(file_name)[0] or "video/mp4"
@@ -326,13 +512,14 @@ def get_image_details(image_path, src=None):
     base_dir = DB_route_external if normalized_src == "external" else DB_route_internal
     target_path = os.path.join(base_dir, safe_image_path) if safe_image_path else base_dir
 
-    if not os.path.isfile(target_path) or not _is_image_file(target_path):
+    entry = MI.stat_entry(target_path)
+    if entry is None or entry.is_dir or entry.media_type != "image":
         abort(404)
 
     file_name = os.path.basename(safe_image_path) if safe_image_path else os.path.basename(target_path)
-    file_ext = os.path.splitext(file_name)[1].lstrip(".").lower()
-    file_size = os.path.getsize(target_path)
-    modified_time = datetime.fromtimestamp(os.path.getmtime(target_path))
+    file_ext = entry.ext or ""
+    file_size = entry.size
+    modified_time = datetime.fromtimestamp(entry.mtime)
     source_url = _build_file_route(target_path, normalized_src)
     mime_type = mimetypes.guess_type(file_name)[0] or "image/jpeg"
 
@@ -384,6 +571,30 @@ def get_image_details(image_path, src=None):
 
     return metadata, image_data
 
+def _build_eagle_item_thumbnail(library_path, item):
+    """
+    Eagle 項目的縮圖路徑：優先使用 Eagle 自帶的 _thumbnail.png（所有類型），
+    沒有時圖片用原檔，影片用預設影片縮圖。
+    """
+    thumbnail_path = EG.EAGLE_get_item_thumbnail_path(item, library_path)
+    if thumbnail_path:
+        return _build_thumbnail_route(thumbnail_path)
+
+    ext = (item.get("ext") or "").lower()
+    if ext in VIDEO_EXTENSIONS:
+        return DEFAULT_VIDEO_THUMBNAIL_ROUTE
+    item_dir = os.path.join(library_path, "images", f"{item.get('id')}.info")
+    return _build_thumbnail_route(os.path.join(item_dir, f"{item.get('name')}.{item.get('ext')}"))
+
+
+def _build_eagle_cover_route(library_path, cover):
+    """
+    將 EAGLE_get_folder_covers 回傳的封面項目轉成縮圖路徑。
+    """
+    if not cover or not cover.get("id"):
+        return DEFAULT_THUMBNAIL_ROUTE
+    return _build_eagle_item_thumbnail(library_path, cover)
+
 def get_eagle_folders():
     """
     獲取 Eagle API 提供的所有資料夾資訊
@@ -392,25 +603,24 @@ def get_eagle_folders():
     if response.get("status") != "success":
         abort(500, description=f"Failed to fetch Eagle folders: {response.get('data')}")
 
+    library_path = EG.EAGLE_get_current_library_path()
     metadata = {
         "name": "All Eagle Folders",
         "category": "collections",
         "tags": ["eagle", "folders"],
         "path": "/EAGLE_folder",
         "thumbnail_route": DEFAULT_THUMBNAIL_ROUTE,
-        "filesystem_path": EG.EAGLE_get_current_library_path()
+        "filesystem_path": library_path
     }
 
+    folders = response.get("data", {}).get("folders", [])
+    covers = EG.EAGLE_get_folder_covers(folders)
+
     data = []
-    for folder in response.get("data", {}).get("folders", []):
+    for folder in folders:
         folder_id = folder.get("id")
         folder_name = folder.get("name", "Unnamed Folder")
-
-        # 取得 Eagle 資料夾內的縮圖
-        folder_response = EG.EAGLE_list_items(folders=[folder_id])
-        image_items = folder_response.get("data", [])
-        image_items.sort(key=lambda x: x.get("name", ""))
-        thumbnail_path = f"/serve_image/{EG.EAGLE_get_current_library_path()}/images/{image_items[0]['id']}.info/{image_items[0]['name']}.{image_items[0]['ext']}" if image_items else DEFAULT_THUMBNAIL_ROUTE
+        thumbnail_path = _build_eagle_cover_route(library_path, covers.get(folder_id))
 
         data.append({
             "name": folder_name,
@@ -424,30 +634,97 @@ def get_eagle_folders():
 
     return metadata, data
 
-def get_eagle_images_by_folderid(eagle_folder_id):
+def _eagle_reverse_supported():
+    """
+    降冪（"-" 前綴）是否可用：Eagle HTTP API 的反向排序有問題（見 EAGLE_list_items），
+    只有直接讀取資源庫的 disk backend 保證正確。
+    """
+    return EG.get_library_reader() is not None
+
+
+def _resolve_eagle_sort(sort, order, default_sort):
+    """
+    將 sort / order 查詢參數轉成 Eagle 的 orderBy；省略時依 default_sort 升冪（與原本的請求相同）。
+    無法反向排序時一律升冪。
+    Returns (sort, order, orderBy)
+    """
+    sort = sort or default_sort
+    if sort not in EAGLE_SORT_ORDERS:
+        abort(400, description=f"Unsupported sort: {sort}")
+    order = order or "asc"
+    if order not in ("asc", "desc"):
+        abort(400, description=f"Unsupported order: {order}")
+    if not _eagle_reverse_supported():
+        order = "asc"
+    order_by = EAGLE_SORT_ORDERS[sort]
+    return sort, order, f"-{order_by}" if order == "desc" else order_by
+
+
+def _eagle_sort_metadata(metadata, sort, order):
+    """在 metadata 中記錄目前的排序與可選的排序方式（供 view_both 的排序選單使用）。"""
+    metadata["sort_options"] = [(key, SORT_LABELS[key]) for key in EAGLE_SORT_ORDERS]
+    metadata["pagination"].update(sort=sort, order=order, reversible=_eagle_reverse_supported())
+    return metadata
+
+
+def _fetch_eagle_page(offset=0, limit=None, **filters):
+    """
+    取得一頁 Eagle 項目。
+
+    limit 為 None 時讀取全部（最多 EAGLE_LIST_MAX_ITEMS）；否則多要一筆用來判斷是否還有下一頁。
+    Returns (response, pagination)
+    """
+    offset = max(0, int(offset or 0))
+    if limit is None:
+        response = EG.EAGLE_list_all_items(
+            page_size=EAGLE_LIST_PAGE_SIZE,
+            max_items=EAGLE_LIST_MAX_ITEMS,
+            offset=offset,
+            **filters
+        )
+        return response, {"offset": offset, "limit": None, "next_offset": None}
+
+    response = EG.EAGLE_list_all_items(
+        page_size=min(EAGLE_LIST_PAGE_SIZE, limit + 1),
+        max_items=limit + 1,
+        offset=offset,
+        **filters
+    )
+    items = response.get("data") or []
+    has_more = response.get("status") == "success" and len(items) > limit
+    if has_more:
+        response["data"] = items[:limit]
+    pagination = {
+        "offset": offset,
+        "limit": limit,
+        "next_offset": offset + limit if has_more else None
+    }
+    return response, pagination
+
+
+def get_eagle_images_by_folderid(eagle_folder_id, offset=0, limit=None, sort=None, order=None):
     """
     獲取 Eagle API 提供的指定資料夾內的圖片資訊，符合 EAGLE API 格式
+    offset / limit: 分頁參數，limit 為 None 時回傳整個資料夾
+    sort / order: 排序（EAGLE_SORT_ORDERS），預設依名稱升冪
     """
-    response = EG.EAGLE_list_items(folders=[eagle_folder_id])
+    sort, order, order_by = _resolve_eagle_sort(sort, order, "name")
+    response, pagination = _fetch_eagle_page(offset, limit, folders=[eagle_folder_id], orderBy=order_by)
     if response.get("status") != "success":
         abort(500, description=f"Failed to fetch images from Eagle folder: {response.get('data')}")
 
-    # df = EG.EAGLE_get_folders_df()
-    # row = df[df["id"] == eagle_folder_id]  ###並沒有recursive地找...
-    # if row.empty:
-    #     return []
-    # folder_name = row.iloc[0]["name"]
     folder_links = []
-    current_folder, parent_folder = _get_eagle_folder_context(eagle_folder_id)
-    if parent_folder:
-        parent_id = parent_folder.get("id")
-        parent_name = parent_folder.get("name", parent_id)
-        if parent_id:
-            folder_links.append({
-                "id": parent_id,
-                "name": parent_name,
-                "url": f"/EAGLE_folder/{parent_id}/"
-            })
+    current_folder, _ = _get_eagle_folder_context(eagle_folder_id)
+    if current_folder:
+        # breadcrumb：由最上層到父資料夾
+        for ancestor in EG.EAGLE_get_folder_index().ancestors(eagle_folder_id):
+            ancestor_id = ancestor.get("id")
+            if ancestor_id:
+                folder_links.append({
+                    "id": ancestor_id,
+                    "name": ancestor.get("name", ancestor_id),
+                    "url": f"/EAGLE_folder/{ancestor_id}/"
+                })
 
     folder_name = current_folder.get("name") if current_folder else eagle_folder_id
 
@@ -458,24 +735,30 @@ def get_eagle_images_by_folderid(eagle_folder_id):
         "path": f"/EAGLE_folder/{eagle_folder_id}",
         "thumbnail_route": DEFAULT_THUMBNAIL_ROUTE,
         "filesystem_path": None,
-        "folders": folder_links
+        "folders": folder_links,
+        "pagination": pagination
     }
+    _eagle_sort_metadata(metadata, sort, order)
     image_items = response.get("data", [])
     data = _format_eagle_items(image_items)
     return metadata, data
 
-def get_eagle_images_by_tag(target_tag):
+def get_eagle_images_by_tag(target_tag, offset=0, limit=None, sort=None, order=None):
     """
     從 Eagle API 獲取所有帶有指定標籤的圖片，符合 EAGLE API 格式。
 
     Args:
         target_tag (str): 要查詢的標籤。
+        offset (int): 分頁起點。
+        limit (Optional[int]): 每頁數量，None 表示全部。
+        sort / order (Optional[str]): 排序（EAGLE_SORT_ORDERS），預設依建立時間升冪。
 
     Returns:
         (metadata, data): 以符合 EAGLE API 樣式的 `metadata` 與 `data`
     """
     # 從 Eagle API 獲取帶有該標籤的圖片
-    response = EG.EAGLE_list_items(tags=[target_tag], orderBy="CREATEDATE")
+    sort, order, order_by = _resolve_eagle_sort(sort, order, "created")
+    response, pagination = _fetch_eagle_page(offset, limit, tags=[target_tag], orderBy=order_by)
     if response.get('status') == 'error':
         abort(500, description=f"Error fetching images with tag '{target_tag}': {response.get('data')}")
 
@@ -486,13 +769,65 @@ def get_eagle_images_by_tag(target_tag):
         "tags": [target_tag],
         "path": f"/EAGLE_tag/{target_tag}",
         "thumbnail_route": DEFAULT_THUMBNAIL_ROUTE,
-        "filesystem_path": None
+        "filesystem_path": None,
+        "pagination": pagination
     }
+    _eagle_sort_metadata(metadata, sort, order)
 
     image_items = response.get("data", [])
     data = _format_eagle_items(image_items)
     return metadata, data
 
+def get_duplicate_groups(offset=0, limit=None):
+    """
+    列出內容完全相同的檔案群組（本地收藏與 Eagle 資源庫），浪費空間最多的在前。
+    offset / limit: 以群組為單位分頁，limit 為 None 時回傳全部
+    """
+    groups = MI.get_duplicate_groups()
+    status = MI.get_duplicate_status()
+    offset = max(0, int(offset or 0))
+    page = groups[offset:] if limit is None else groups[offset:offset + limit]
+    has_more = limit is not None and offset + limit < len(groups)
+
+    data = []
+    for group in page:
+        items = []
+        for file in group.files:
+            item = _build_indexed_item(file.source, file.ident, file.path)
+            if item is None:
+                continue
+            item["source"] = file.source
+            item["file_path"] = file.path
+            items.append(item)
+        data.append({
+            "digest": group.digest,
+            "size": group.size,
+            "size_label": _human_readable_size(group.size),
+            "wasted_bytes": group.wasted_bytes,
+            "wasted_label": _human_readable_size(group.wasted_bytes),
+            "items": items
+        })
+    _attach_image_sizes([item for group in data for item in group["items"]])
+
+    metadata = {
+        "name": "Duplicate Files",
+        "category": "duplicates",
+        "tags": [],
+        "path": "/duplicates/",
+        "thumbnail_route": DEFAULT_THUMBNAIL_ROUTE,
+        "filesystem_path": None,
+        "status": status,
+        "group_count": len(groups),
+        "wasted_bytes": sum(group.wasted_bytes for group in groups),
+        "wasted_label": _human_readable_size(sum(group.wasted_bytes for group in groups)),
+        "pagination": {
+            "offset": offset,
+            "limit": limit,
+            "next_offset": offset + limit if has_more else None
+        }
+    }
+    return metadata, data
+
 def get_eagle_tags():
     """
     從 Eagle API 取得所有標籤資訊，整理給前端使用。
@@ -547,9 +882,10 @@ def get_eagle_tags():
 
     return metadata, tags
 
-def search_eagle_items(keyword, limit=120):
-    """透過 Eagle API 搜尋關鍵字並回傳格式化後的列表。"""
-    response = EG.EAGLE_list_items(keyword=keyword, limit=limit, orderBy="CREATEDATE")
+def search_eagle_items(keyword, offset=0, limit=120, sort=None, order=None):
+    """透過 Eagle API 搜尋關鍵字並回傳格式化後的列表（offset / limit 分頁，預設依建立時間升冪）。"""
+    sort, order, order_by = _resolve_eagle_sort(sort, order, "created")
+    response, pagination = _fetch_eagle_page(offset, limit, keyword=keyword, orderBy=order_by)
     if response.get("status") != "success":
         abort(500, description=f"Failed to search Eagle items: {response.get('data')}")
 
@@ -562,9 +898,70 @@ def search_eagle_items(keyword, limit=120):
         "tags": [keyword],
         "path": f"/search?query={keyword}",
         "thumbnail_route": DEFAULT_THUMBNAIL_ROUTE,
-        "filesystem_path": EG.EAGLE_get_current_library_path()
+        "filesystem_path": EG.EAGLE_get_current_library_path(),
+        "pagination": pagination
+    }
+    _eagle_sort_metadata(metadata, sort, order)
+
+    return metadata, data
+
+def search_items_by_color(color, keyword=None, offset=0, limit=120, max_distance=None, min_ratio=None, sources=None):
+    """
+    以主色搜尋本地收藏與 Eagle 項目（只查主色調索引，不呼叫 Eagle API）。
+
+    color: "#rrggbb"；keyword: 另外以檔名 / 項目名稱過濾（不分大小寫）
+    max_distance: 最大色差（CIE ΔE76）；min_ratio: 主色至少佔畫面的百分比
+    sources: 限定來源（"local"、"eagle"），None 表示全部
+    """
+    try:
+        rgb = MI.parse_hex_color(color)
+    except ValueError:
+        abort(400, description=f"Invalid color: {color}")
+    hex_color = "#{:02x}{:02x}{:02x}".format(*rgb)
+    offset = max(0, int(offset or 0))
+    options = {
+        "max_distance": COLOR_SEARCH_MAX_DISTANCE if max_distance is None else max_distance,
+        "min_ratio": COLOR_SEARCH_MIN_RATIO if min_ratio is None else min_ratio,
+        "sources": sources
     }
 
+    if keyword:
+        # 名稱過濾要在分頁前完成：先取出所有符合顏色的項目
+        _, total = MI.search_by_color(rgb, limit=0, **options)
+        matches, _ = MI.search_by_color(rgb, limit=total, **options)
+        needle = keyword.lower()
+        matches = [match for match in matches if needle in os.path.basename(match.path).lower()]
+        total = len(matches)
+        matches = matches[offset:offset + limit]
+    else:
+        matches, total = MI.search_by_color(rgb, offset=offset, limit=limit, **options)
+
+    data = []
+    for match in matches:
+        item = _build_indexed_item(match.source, match.ident, match.path)
+        if item is None:
+            continue
+        item["url"] = item["path"]
+        item["distance"] = match.distance
+        item["palette"] = ["#{:02x}{:02x}{:02x}".format(r, g, b) for r, g, b, _ in match.palette]
+        data.append(item)
+    _attach_image_sizes(data)
+
+    metadata = {
+        "name": f"Color Search: {hex_color}" + (f" · {keyword}" if keyword else ""),
+        "category": "search",
+        "tags": [keyword] if keyword else [],
+        "path": f"/search?color={quote(hex_color)}" + (f"&query={quote(keyword)}" if keyword else ""),
+        "thumbnail_route": DEFAULT_THUMBNAIL_ROUTE,
+        "filesystem_path": None,
+        "color": hex_color,
+        "total": total,
+        "pagination": {
+            "offset": offset,
+            "limit": limit,
+            "next_offset": offset + limit if offset + limit < total else None
+        }
+    }
     return metadata, data
 
 def get_eagle_stream_items(offset=0, limit=30):
@@ -791,18 +1188,7 @@ def _build_eagle_folder_links(folder_ids):
     if not folder_ids:
         return []
 
-    try:
-        df = EG.EAGLE_get_folders_df_all(flatten=True)
-    except Exception:
-        df = None
-
-    lookup = {}
-    if df is not None and getattr(df, "empty", True) is False:
-        for _, row in df.iterrows():
-            row_id = str(row.get("id") or "").strip()
-            if not row_id:
-                continue
-            lookup[row_id] = row.get("name") or row_id
+    folder_index = EG.EAGLE_get_folder_index()
 
     links = []
     seen = OrderedDict()
@@ -810,7 +1196,7 @@ def _build_eagle_folder_links(folder_ids):
         if folder_id in seen:
             continue
         seen[folder_id] = None
-        folder_name = lookup.get(folder_id, folder_id)
+        folder_name = folder_index.name(folder_id, folder_id) if folder_index else folder_id
         links.append({
             "id": folder_id,
             "name": folder_name,
@@ -851,84 +1237,142 @@ def _get_eagle_folder_context(folder_id):
     取得指定 Eagle 資料夾及其父資料夾資訊。
     Returns (current_folder, parent_folder)
     """
-    response = EG.EAGLE_get_library_info()
-    if response.get("status") != "success":
+    folder_index = EG.EAGLE_get_folder_index()
+    if folder_index is None or folder_id not in folder_index:
         return None, None
+    return folder_index.get(folder_id), folder_index.parent(folder_id)
 
-    folders = response.get("data", {}).get("folders", [])
 
-    def _search(nodes, parent=None):
-        for node in nodes:
-            if node.get("id") == folder_id:
-                return node, parent
-            result = _search(node.get("children", []), node)
-            if result is not None:
-                return result
+def _locate_local_path(abs_path):
+    """回傳 (src, 相對路徑)；不在本地收藏根目錄內時為 (None, None)。"""
+    for src, base_dir in (("external", DB_route_external), ("internal", DB_route_internal)):
+        if not base_dir:
+            continue
+        base_dir = os.path.abspath(base_dir)
+        if abs_path.startswith(base_dir + os.sep):
+            return src, _normalize_slashes(os.path.relpath(abs_path, base_dir))
+    return None, None
+
+
+def _build_indexed_item(source, ident, abs_path):
+    """
+    將索引（相似圖片、重複檔案）中的 (來源, 識別碼, 路徑) 轉成項目資料，不呼叫 Eagle API。
+    本地檔案不在收藏根目錄內時回傳 None。
+    """
+    file_name = os.path.basename(abs_path)
+    stem, ext = os.path.splitext(file_name)
+    ext = ext.lstrip(".").lower() or None
+    media_type = "video" if ext in VIDEO_EXTENSIONS else "image"
+
+    if source == "eagle":
+        # 路徑為 <資源庫>/images/<id>.info/<檔名>
+        library_path = os.path.dirname(os.path.dirname(os.path.dirname(abs_path)))
+        detail_path = f"/EAGLE_video/{ident}/" if media_type == "video" else f"/EAGLE_image/{ident}/"
+        item_id = ident
+        thumbnail_route = _build_eagle_item_thumbnail(library_path, {"id": ident, "name": stem, "ext": ext})
+    else:
+        src, rel_path = _locate_local_path(abs_path)
+        if src is None:
+            return None
+        item_id = rel_path
+        if media_type == "video":
+            detail_path = _build_video_url(rel_path, src)
+            thumbnail_route = _find_video_thumbnail(abs_path, src)
+        else:
+            detail_path = _build_image_url(rel_path, src)
+            thumbnail_route = _build_thumbnail_route(abs_path, src)
+
+    return {
+        "id": item_id,
+        "name": stem or file_name,
+        "path": detail_path,
+        "thumbnail_route": thumbnail_route,
+        "item_path": abs_path,
+        "media_type": media_type,
+        "ext": ext
+    }
+
+
+def _build_visually_similar_items(source, ident, limit=6):
+    """
+    依相似圖片索引（pHash）推薦外觀相近的項目，可跨本地收藏與 Eagle，不呼叫 Eagle API。
+
+    Returns:
+        項目列表（可能為空）；該項目尚未建立指紋時為 None，呼叫端改用其他推薦方式。
+    """
+    results = MI.find_similar_images(source, ident, limit)
+    if results is None:
         return None
 
-    found = _search(folders)
-    if not found:
-        return None, None
-    return found
+    similar = []
+    for result in results:
+        item = _build_indexed_item(result.source, result.ident, result.path)
+        if item is not None:
+            similar.append(item)
+    return similar
 
 
 def _build_local_similar_items(target_path, base_dir, src, limit=6):
     """
-    根據同資料夾內容挑選相似的本地項目。
+    挑選相似的本地項目：已建立指紋的圖片依外觀推薦，否則從同資料夾內容抽樣。
     """
-    parent_dir = os.path.dirname(target_path)
+    if _is_image_file(target_path):
+        similar = _build_visually_similar_items("local", os.path.abspath(target_path), limit)
+        if similar:
+            return similar
+
+    parent_dir = os.path.dirname(os.path.abspath(target_path))
     try:
-        entries = os.listdir(parent_dir)
-    except (FileNotFoundError, PermissionError):
+        listing = MI.list_directory(parent_dir)
+    except OSError:
         return []
 
-    candidates = []
-    for entry in entries:
-        if entry.startswith("."):
-            continue
-        abs_entry = os.path.join(parent_dir, entry)
-        if abs_entry == target_path or not os.path.isfile(abs_entry):
-            continue
-
-        try:
-            rel_entry = os.path.relpath(abs_entry, base_dir)
-        except ValueError:
-            continue
-        rel_entry = _normalize_slashes(rel_entry)
-
-        if _is_image_file(entry):
-            candidates.append({
-                "id": rel_entry,
-                "name": os.path.splitext(entry)[0] or entry,
-                "path": _build_image_url(rel_entry, src),
-                "thumbnail_route": _build_file_route(abs_entry, src),
-                "media_type": "image",
-                "ext": os.path.splitext(entry)[1].lstrip(".").lower() or None
-            })
-        elif _is_video_file(entry):
-            candidates.append({
-                "id": rel_entry,
-                "name": os.path.splitext(entry)[0] or entry,
-                "path": _build_video_url(rel_entry, src),
-                "thumbnail_route": _find_video_thumbnail(abs_entry, src),
-                "media_type": "video",
-                "ext": os.path.splitext(entry)[1].lstrip(".").lower() or None
-            })
-
-    if not candidates:
+    try:
+        parent_relative = _normalize_slashes(os.path.relpath(parent_dir, base_dir))
+    except ValueError:
         return []
-
-    sample_size = min(limit, len(candidates))
-    if sample_size <= 0:
+    if parent_relative == ".":
+        parent_relative = ""
+
+    target_name = os.path.basename(target_path)
+    candidates = [
+        entry for entry in listing.entries
+        if entry.media_type and entry.name != target_name
+    ]
+    if not candidates or limit <= 0:
         return []
 
-    return random.sample(candidates, sample_size)
+    similar = []
+    # 先抽樣再組資料，縮圖查找只做在實際顯示的項目上
+    for entry in random.sample(candidates, min(limit, len(candidates))):
+        rel_entry = _join_relative(parent_relative, entry.name)
+        if entry.media_type == "image":
+            path = _build_image_url(rel_entry, src)
+            thumbnail_route = _build_thumbnail_route(entry.path, src)
+        else:
+            path = _build_video_url(rel_entry, src)
+            thumbnail_route = _find_video_thumbnail(entry.path, src, listing)
+        similar.append({
+            "id": rel_entry,
+            "name": os.path.splitext(entry.name)[0] or entry.name,
+            "path": path,
+            "thumbnail_route": thumbnail_route,
+            "media_type": entry.media_type,
+            "ext": entry.ext
+        })
+
+    return similar
 
 
 def _build_eagle_similar_items(current_item_id, tags, folder_ids, limit=6):
     """
-    根據標籤或資料夾推薦相似項目。
+    推薦相似項目：已建立指紋的項目依外觀推薦（不呼叫 Eagle API），
+    尚未建立指紋時才改用標籤或資料夾查詢。
     """
+    similar = _build_visually_similar_items("eagle", current_item_id, limit)
+    if similar is not None:
+        return similar
+
     candidate_map = OrderedDict()
 
     def _accumulate_from_response(response):
@@ -1205,9 +1649,8 @@ def get_eagle_image_details(item_id):
 
 def _format_eagle_items(image_items):
     """
-    將 Eagle 圖片清單格式化成 EAGLE API 樣式的 data list。
+    將 Eagle 圖片清單格式化成 EAGLE API 樣式的 data list（保留呼叫端要求的排序）。
     """
-    image_items.sort(key=lambda x: x.get("name", "")) # 按名稱排序
     data = []
 
     base = EG.EAGLE_get_current_library_path()
@@ -1216,14 +1659,9 @@ def _format_eagle_items(image_items):
         image_name = image.get("name", "unknown")
         image_ext = image.get("ext", "jpg")
         image_path = f"/serve_image/{base}/images/{image_id}.info/{image_name}.{image_ext}"
-
-        # 特別處理影片縮圖
         normalized_ext = (image_ext or "").lower()
         is_video = normalized_ext in VIDEO_EXTENSIONS
-        if normalized_ext == "mp4":
-            thumbnail_route = f"/serve_image/{base}/images/{image_id}.info/{image_name}_thumbnail.png"
-        else:
-            thumbnail_route = image_path
+        thumbnail_route = _build_eagle_item_thumbnail(base, image)
 
         data.append({
             "id": image_id,
@@ -1232,46 +1670,36 @@ def _format_eagle_items(image_items):
             "thumbnail_route": thumbnail_route,
             "item_path": os.path.abspath(os.path.join(base, "images", f"{image_id}.info", f"{image_name}.{image_ext}")),
             "media_type": "video" if is_video else "image",
-            "ext": normalized_ext or None
+            "ext": normalized_ext or None,
+            "width": image.get("width"),
+            "height": image.get("height")
         })
 
-    return data
+    return _attach_image_sizes(data)
 
 def get_subfolders_info(folder_id):
     """
     根據指定的 folder_id，取出其 children（子資料夾 id list），
     並組成符合前端展示格式的 list of dict。
     """
-    df = EG.EAGLE_get_folders_df()
-
-    # 找出指定 folder row
-    row = df[df["id"] == folder_id]
-    if row.empty:
+    folder_index = EG.EAGLE_get_folder_index()
+    if folder_index is None:
         return []
 
-    children_infos = row.iloc[0]["children"]  # 是 list
+    children_infos = folder_index.children(folder_id)
     result = []
+    if not children_infos:
+        return result
+
+    base = EG.EAGLE_get_current_library_path()
+    covers = EG.EAGLE_get_folder_covers(children_infos)
 
     for child_info in children_infos:
         child_id = child_info["id"]
-        # child_row = df[df["id"] == child_info["id"]]
-        # if child_row.empty:
-            # continue
-
-        # child = child_row.iloc[0]
         sub_name = child_info.get("name", f"(unnamed-{child_id})")
         path = f"/EAGLE_folder/{child_id}"
 
-        # 嘗試取一張圖作為縮圖
-        folder_response = EG.EAGLE_list_items(folders=[child_id])
-        thumbnail_route = DEFAULT_THUMBNAIL_ROUTE
-        if folder_response.get("status") == "success" and folder_response.get("data"):
-            first_img = folder_response["data"][0]
-            image_id = first_img["id"]
-            image_name = first_img["name"]
-            image_ext = first_img["ext"]
-            base = EG.EAGLE_get_current_library_path()
-            thumbnail_route = f"/serve_image/{base}/images/{image_id}.info/{image_name}.{image_ext}"
+        thumbnail_route = _build_eagle_cover_route(base, covers.get(child_id))
 
         result.append({
             "name": f"📁 {sub_name}",
@@ -0,0 +1,168 @@
+"""
+本地媒體檔的 HTTP 回應：強 ETag、Cache-Control、304、單一與多段 Range。
+
+- ETag 由 inode、mtime、檔案大小組成，只需一次 stat，不讀檔案內容。
+- 條件式請求（If-None-Match / If-Modified-Since）在開檔前就回 304。
+- 整檔交給 WSGI server 的 wsgi.file_wrapper（gunicorn 等會用 sendfile 零拷貝）；
+  沒有 file_wrapper 時、以及 Range 區段，以只讀到區段結尾的有界 generator 分塊讀取
+  （file_wrapper 不一定依 Content-Length 截斷，用在區段上可能送出多餘的資料）。
+- 多段 Range 回傳 multipart/byteranges。
+"""
+import mimetypes
+import os
+import uuid
+from stat import S_ISREG
+from typing import Iterator, List, Optional, Tuple
+
+from flask import Response, abort, request
+from werkzeug.http import http_date, parse_date
+
+
+CHUNK_SIZE = 1024 * 1024
+MAX_RANGES = 16   # 超過時直接回整檔，避免被大量小區段拖慢
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+REVALIDATE_CACHE_CONTROL = "no-cache"
+
+
+def build_etag(stat: os.stat_result) -> str:
+    return f'"{stat.st_ino:x}-{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def _iter_file(path: str, start: int, length: int) -> Iterator[bytes]:
+    with open(path, "rb") as fh:
+        fh.seek(start)
+        remaining = length
+        while remaining > 0:
+            chunk = fh.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+
+def _file_body(path: str, size: int):
+    """整檔的 body；server 提供 file_wrapper 時交給它（可 sendfile）。"""
+    file_wrapper = request.environ.get("wsgi.file_wrapper")
+    if file_wrapper is None:
+        return _iter_file(path, 0, size)
+    return file_wrapper(open(path, "rb"), CHUNK_SIZE)
+
+
+def _parse_ranges(size: int, etag: str, mtime: float) -> Optional[List[Tuple[int, int]]]:
+    """
+    回傳 [(start, end_exclusive), ...]；沒有（或忽略）Range 時回傳 None，
+    全部區段都無法滿足時回傳 []。
+    """
+    requested = request.range
+    if requested is None or requested.units != "bytes":
+        return None
+    if "If-Range" in request.headers:
+        # If-Range 與目前版本不符：回整檔
+        if_range = request.if_range
+        if if_range.etag is not None and f'"{if_range.etag}"' != etag:
+            return None
+        if if_range.date is not None and int(mtime) > if_range.date.timestamp():
+            return None
+    if len(requested.ranges) > MAX_RANGES:
+        return None
+
+    ranges = []
+    for start, stop in requested.ranges:
+        if start < 0:
+            start, stop = max(size + start, 0), size
+        else:
+            stop = size if stop is None else min(stop, size)
+        if start >= size or start >= stop:
+            continue
+        ranges.append((start, stop))
+
+    # 合併重疊或相鄰的區段
+    ranges.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, stop in ranges:
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], stop))
+        else:
+            merged.append((start, stop))
+    return merged
+
+
+def _not_modified(etag: str, stat: os.stat_result) -> bool:
+    if request.if_none_match:
+        return request.if_none_match.contains(etag.strip('"'))
+    since = request.headers.get("If-Modified-Since")
+    if since:
+        parsed = parse_date(since)
+        return parsed is not None and int(stat.st_mtime) <= parsed.timestamp()
+    return False
+
+
+def send_media_file(path: str, immutable: bool = False, mimetype: Optional[str] = None) -> Response:
+    """
+    以快取友善的方式送出檔案。
+
+    Args:
+        path: 檔案的絕對路徑。
+        immutable: 內容不會改變的路徑（例如 Eagle images/<id>.info 內的檔案）。
+        mimetype: 省略時依副檔名判斷。
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        abort(404)
+    if not S_ISREG(stat.st_mode):
+        abort(404)
+
+    size = stat.st_size
+    etag = build_etag(stat)
+    mimetype = mimetype or mimetypes.guess_type(path)[0] or "application/octet-stream"
+    headers = {
+        "ETag": etag,
+        "Last-Modified": http_date(stat.st_mtime),
+        "Cache-Control": IMMUTABLE_CACHE_CONTROL if immutable else REVALIDATE_CACHE_CONTROL,
+        "Accept-Ranges": "bytes",
+    }
+
+    if _not_modified(etag, stat):
+        return Response(status=304, headers=headers)
+
+    ranges = _parse_ranges(size, etag, stat.st_mtime)
+    if ranges is None:
+        headers["Content-Length"] = str(size)
+        return Response(_file_body(path, size), status=200, mimetype=mimetype,
+                        headers=headers, direct_passthrough=True)
+
+    if not ranges:
+        headers["Content-Range"] = f"bytes */{size}"
+        return Response(status=416, headers=headers)
+
+    if len(ranges) == 1:
+        start, stop = ranges[0]
+        headers["Content-Range"] = f"bytes {start}-{stop - 1}/{size}"
+        headers["Content-Length"] = str(stop - start)
+        return Response(_iter_file(path, start, stop - start), status=206, mimetype=mimetype,
+                        headers=headers, direct_passthrough=True)
+
+    boundary = uuid.uuid4().hex
+    parts = []
+    for start, stop in ranges:
+        part_header = (
+            f"--{boundary}\r\n"
+            f"Content-Type: {mimetype}\r\n"
+            f"Content-Range: bytes {start}-{stop - 1}/{size}\r\n\r\n"
+        ).encode("latin-1")
+        parts.append((part_header, start, stop))
+    closing = f"--{boundary}--\r\n".encode("latin-1")
+    headers["Content-Length"] = str(
+        sum(len(part_header) + (stop - start) + 2 for part_header, start, stop in parts) + len(closing)
+    )
+
+    def generate():
+        for part_header, start, stop in parts:
+            yield part_header
+            yield from _iter_file(path, start, stop - start)
+            yield b"\r\n"
+        yield closing
+
+    return Response(generate(), status=206, headers=headers,
+                    content_type=f"multipart/byteranges; boundary={boundary}", direct_passthrough=True)
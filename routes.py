@@ -1,12 +1,13 @@
 import os
 import platform
-import random
+import re
 import subprocess
 from urllib.parse import unquote
-from flask import Flask, render_template, abort, send_from_directory, request, redirect, url_for, jsonify
+from flask import Flask, Response, render_template, stream_template, abort, request, redirect, url_for, jsonify
 from file_handler import (
     get_all_folders_info,
     get_folder_images,
+    get_flat_folder_items,
     get_image_details,
     get_video_details,
     get_eagle_folders,
@@ -20,8 +21,60 @@ from file_handler import (
     get_eagle_image_details,
     get_eagle_video_details,
     get_subfolders_info,
+    get_duplicate_groups,
+    search_items_by_color,
 )
-from config import DB_route_internal, DB_route_external
+import src.eagle_api as EG
+import src.media_index as MI
+from media_response import send_media_file
+from discovery_feed import get_discovery_context
+from config import (
+    DB_route_internal,
+    DB_route_external,
+    EAGLE_PAGE_LIMIT,
+    EAGLE_PAGE_MAX_LIMIT,
+    DUPLICATES_PAGE_LIMIT,
+    LOCAL_PAGE_LIMIT,
+    LOCAL_PAGE_MAX_LIMIT,
+)
+
+
+STREAM_FLUSH_BYTES = 16 * 1024
+
+
+def _buffered_stream(chunks, flush_bytes=STREAM_FLUSH_BYTES):
+    """
+    合併 template 串流產生的零碎字串，累積到 flush_bytes 才送出一次，減少 WSGI 寫入次數。
+    Response 被關閉（例如連線中斷）時，close() 會一路傳到底層的 generator，停止後續走訪。
+    """
+    buffer, size = [], 0
+    try:
+        for chunk in chunks:
+            buffer.append(chunk)
+            size += len(chunk)
+            if size >= flush_bytes:
+                yield "".join(buffer)
+                buffer, size = [], 0
+        if buffer:
+            yield "".join(buffer)
+    finally:
+        close = getattr(chunks, "close", None)
+        if close is not None:
+            close()
+
+
+_EAGLE_ITEM_PATH = re.compile(r"[\\/]images[\\/][^\\/]+\.info[\\/][^\\/]+$")
+
+
+def _is_eagle_item_path(abs_path):
+    """是否為 Eagle 資源庫 images/<id>.info/ 內的檔案（內容以項目 id 定址，可長期快取）。"""
+    if not _EAGLE_ITEM_PATH.search(abs_path):
+        return False
+    try:
+        library_path = EG.EAGLE_get_current_library_path()
+    except ValueError:
+        return False
+    return _path_is_within_roots(abs_path, [library_path])
 
 
 def _path_is_within_roots(target_path, roots):
@@ -49,6 +102,123 @@ def _open_in_file_manager(target_path):
     else:
         subprocess.Popen(["xdg-open", target_path])
 
+def _parse_page_args(default_limit, max_limit):
+    """讀取 offset / limit 查詢參數並限制範圍。"""
+    try:
+        offset = int(request.args.get('offset', 0))
+        limit = int(request.args.get('limit', default_limit))
+    except ValueError:
+        abort(400, description="Invalid offset or limit")
+    return max(0, offset), max(1, min(limit, max_limit))
+
+
+def _parse_cursor_args(default_limit, max_limit):
+    """讀取 cursor / limit 查詢參數並限制範圍。"""
+    try:
+        limit = int(request.args.get('limit', default_limit))
+    except ValueError:
+        abort(400, description="Invalid limit")
+    return request.args.get('cursor') or None, max(1, min(limit, max_limit))
+
+
+def _parse_color_filters():
+    """讀取以顏色搜尋的 max_distance / min_ratio / source 查詢參數（無效的數值視為未指定）。"""
+    max_distance = request.args.get('max_distance', type=float)
+    min_ratio = request.args.get('min_ratio', type=float)
+    source = request.args.get('source')
+    if source not in (None, '', 'local', 'eagle'):
+        abort(400, description=f"Unsupported source: {source}")
+    return {
+        "max_distance": max_distance,
+        "min_ratio": min_ratio,
+        "sources": [source] if source else None
+    }
+
+
+def _current_page_url():
+    """目前頁面網址（去掉 offset / cursor / limit 與結尾的 ?），作為詳細頁的返回位置。"""
+    args = request.args.to_dict()
+    args.pop('offset', None)
+    args.pop('cursor', None)
+    args.pop('limit', None)
+    args.pop('return_to', None)
+    # 與 view args 同名的查詢參數會被覆蓋，避免 url_for 收到重複的關鍵字參數
+    return url_for(request.endpoint, **{**args, **(request.view_args or {})})
+
+
+def _attach_eagle_detail_urls(data, return_to=None):
+    """將 Eagle 圖片 / 影片項目的 url 指向站內詳細頁。"""
+    for item in data:
+        if item.get("media_type") == "video" and item.get("id"):
+            item["url"] = url_for("view_eagle_video", item_id=item["id"], return_to=return_to)
+        elif item.get("media_type") == "image" and item.get("id"):
+            item["url"] = url_for("view_eagle_image", item_id=item["id"], return_to=return_to)
+    return data
+
+
+def _serialize_page_items(data):
+    """轉成與 /api/EAGLE_stream/ 相同格式的 JSON 項目。"""
+    items = []
+    for item in data:
+        items.append({
+            "id": item.get("id"),
+            "name": item.get("name"),
+            "thumbnail_route": item.get("thumbnail_route"),
+            "detail_url": item.get("url"),
+            "media_type": item.get("media_type"),
+            "ext": item.get("ext"),
+            "width": item.get("width"),
+            "height": item.get("height"),
+            "orientation": item.get("orientation")
+        })
+    return items
+
+
+def _parse_sort_args():
+    """讀取 sort / order 查詢參數；未指定的不列出，由各資料來源使用自己的預設排序。"""
+    return {key: request.args[key] for key in ("sort", "order") if request.args.get(key)}
+
+
+def _page_response(data, pagination):
+    if "next_cursor" in pagination:
+        next_cursor = pagination.get("next_cursor")
+        return jsonify({
+            "items": _serialize_page_items(data),
+            "nextCursor": next_cursor,
+            "hasMore": next_cursor is not None
+        })
+
+    next_offset = pagination.get("next_offset")
+    return jsonify({
+        "items": _serialize_page_items(data),
+        "nextOffset": next_offset if next_offset is not None else pagination.get("offset", 0) + len(data),
+        "hasMore": next_offset is not None
+    })
+
+
+def _attach_page_api(metadata, api_endpoint, return_to, **values):
+    """有下一頁時，在 metadata 中加入供前端續載的 JSON API 網址。"""
+    pagination = metadata.get("pagination") or {}
+    for key in ("sort", "order"):
+        # 續載的頁面沿用目前的排序
+        if pagination.get(key) and key not in values:
+            values[key] = pagination[key]
+    if pagination.get("next_cursor") is not None:
+        page_args = {"cursor": pagination["next_cursor"]}
+    elif pagination.get("next_offset") is not None:
+        page_args = {"offset": pagination["next_offset"]}
+    else:
+        return metadata
+    metadata["page_api"] = url_for(
+        api_endpoint,
+        **page_args,
+        limit=pagination.get("limit"),
+        return_to=return_to,
+        **values
+    )
+    return metadata
+
+
 def register_routes_debug(app):
     @app.route('/debug/')
     def debug_print():
@@ -61,6 +231,12 @@ def register_routes_debug(app):
             ]
         return render_template('test_arg.html', title='All in One', df_to_post=df_to_post)
 
+    @app.route('/debug/eagle_metrics')
+    def debug_eagle_metrics():
+        """Eagle client 的排隊 / 合併統計"""
+        return jsonify(EG.EAGLE_get_client_metrics())
+
+
 def register_routes(app):
     """
     註冊 Flask 路由
@@ -68,71 +244,13 @@ def register_routes(app):
 
     @app.route('/')
     def index():
-        """探索 Eagle 資料庫的首頁推薦"""
-
-        hero_item = None
-        featured_media = []
-        random_images = []
-        random_videos = []
-        random_folders = []
-        eagle_tags = []
-        curated_clusters = []
-
+        """探索 Eagle 資料庫的首頁推薦（從背景更新的 snapshot 抽樣）"""
         try:
-            hero_payload = get_eagle_stream_items(offset=0, limit=10)
-            if hero_payload:
-                hero_item = hero_payload[0]
-                featured_media = hero_payload[1:5]
-
-            image_payload = get_eagle_stream_items(offset=20, limit=40)
-            image_only = [item for item in image_payload if item.get("media_type") == "image"]
-            video_only = [item for item in image_payload if item.get("media_type") == "video"]
-
-            if image_only:
-                random_images = random.sample(image_only, min(8, len(image_only)))
-            if video_only:
-                random_videos = random.sample(video_only, min(4, len(video_only)))
-
-            _, folder_data = get_eagle_folders()
-            if folder_data:
-                random_folders = random.sample(folder_data, min(6, len(folder_data)))
-
-            tag_metadata, tag_data = get_eagle_tags()
-            eagle_tags = random.sample(tag_data, min(20, len(tag_data))) if tag_data else []
-
-            if folder_data:
-                clusters_map = {}
-                for folder in folder_data:
-                    prefix = folder.get("name", "").split()[0]
-                    if not prefix:
-                        continue
-                    clusters_map.setdefault(prefix, []).append(folder)
-
-                for key, items in clusters_map.items():
-                    if len(items) < 2:
-                        continue
-                    curated_clusters.append({
-                        "title": f"{key} 精選合集",
-                        "items": items[:5]
-                    })
-
-            random.shuffle(curated_clusters)
-            curated_clusters = curated_clusters[:3]
-
+            context = get_discovery_context()
         except Exception:
-            pass
+            context = {}
+        return render_template('index.html', **context)
 
-        return render_template(
-            'index.html',
-            hero_item=hero_item,
-            featured_media=featured_media,
-            random_images=random_images,
-            random_videos=random_videos,
-            random_folders=random_folders,
-            eagle_tags=eagle_tags,
-            curated_clusters=curated_clusters
-        )
-    
     @app.route('/open_path/')
     def open_filesystem_path():
         """Open the requested path in the local file manager."""
@@ -166,10 +284,49 @@ def register_routes(app):
         src: internal or external
         """
         source = request.args.get('src', 'external')
+        sort = request.args.get('sort', 'name')
+        order = request.args.get('order', 'asc')
+        cursor, limit = _parse_cursor_args(LOCAL_PAGE_LIMIT, LOCAL_PAGE_MAX_LIMIT)
 
-        metadata, data = get_folder_images(folder_path, source)
+        # 只渲染第一頁（或 cursor 指定的那一頁），其餘由前端透過 /api/folder/ 續載
+        metadata, data = get_folder_images(folder_path, source, cursor=cursor, limit=limit, sort=sort, order=order)
+        _attach_page_api(metadata, 'api_folder', None, folder_path=folder_path, src=source)
         return render_template('view_both.html', metadata=metadata, data=data)
 
+    @app.route('/api/folder/<path:folder_path>/')
+    def api_folder(folder_path):
+        """
+        本地資料夾分頁資料（JSON）
+        cursor: 上一頁回傳的 nextCursor；sort: name / mtime / size / created / resolution；order: asc / desc
+        """
+        source = request.args.get('src', 'external')
+        cursor, limit = _parse_cursor_args(LOCAL_PAGE_LIMIT, LOCAL_PAGE_MAX_LIMIT)
+        metadata, data = get_folder_images(
+            folder_path,
+            source,
+            cursor=cursor,
+            limit=limit,
+            sort=request.args.get('sort', 'name'),
+            order=request.args.get('order', 'asc')
+        )
+        return _page_response(data, metadata["pagination"])
+
+    @app.route('/flat/', defaults={'folder_path': ''})
+    @app.route('/flat/<path:folder_path>/')
+    def view_flat(folder_path):
+        """
+        攤平資料夾：遞迴列出所有子資料夾內的圖片與影片，邊走訪邊串流輸出卡片
+        src: internal or external；sort / order: 同 /api/folder/
+        """
+        metadata, items = get_flat_folder_items(
+            folder_path,
+            request.args.get('src', 'external'),
+            sort=request.args.get('sort', 'name'),
+            order=request.args.get('order', 'asc')
+        )
+        stream = stream_template('view_flat.html', metadata=metadata, items=items)
+        return Response(_buffered_stream(stream), mimetype='text/html')
+
     @app.route('/grid/<path:folder_path>/')
     def view_grid(folder_path):
         """取得指定資料夾內的所有圖片（Grid 模式）"""
@@ -220,31 +377,54 @@ def register_routes(app):
 
     @app.route('/EAGLE_folder/<eagle_folder_id>/')
     def view_eagle_folder(eagle_folder_id):
-        """顯示指定 Eagle 資料夾 ID 下的所有圖片"""
-        metadata, data = get_eagle_images_by_folderid(eagle_folder_id)
-        
-        # 加入子資料夾為類似圖片格式
-        subfolders = get_subfolders_info(eagle_folder_id)
-        data = subfolders + data
-
-        current_url = request.full_path
-        if current_url and current_url.endswith('?'):
-            current_url = current_url[:-1]
-
-        for item in data:
-            if item.get("media_type") == "video" and item.get("id"):
-                item["url"] = url_for("view_eagle_video", item_id=item["id"], return_to=current_url)
-            elif item.get("media_type") == "image" and item.get("id"):
-                item["url"] = url_for("view_eagle_image", item_id=item["id"], return_to=current_url)
-        
+        """顯示指定 Eagle 資料夾 ID 下的圖片（第一頁，其餘由前端透過 API 續載）"""
+        offset, limit = _parse_page_args(EAGLE_PAGE_LIMIT, EAGLE_PAGE_MAX_LIMIT)
+        metadata, data = get_eagle_images_by_folderid(eagle_folder_id, offset=offset, limit=limit, **_parse_sort_args())
+
+        # 加入子資料夾為類似圖片格式（只放在第一頁）
+        if offset == 0:
+            subfolders = get_subfolders_info(eagle_folder_id)
+            data = subfolders + data
+
+        current_url = _current_page_url()
+        _attach_eagle_detail_urls(data, current_url)
+        _attach_page_api(metadata, 'api_eagle_folder', current_url, eagle_folder_id=eagle_folder_id)
         return render_template('view_both.html', metadata=metadata, data=data)
 
+    @app.route('/api/EAGLE_folder/<eagle_folder_id>/')
+    def api_eagle_folder(eagle_folder_id):
+        """Eagle 資料夾分頁資料（JSON）"""
+        offset, limit = _parse_page_args(EAGLE_PAGE_LIMIT, EAGLE_PAGE_MAX_LIMIT)
+        metadata, data = get_eagle_images_by_folderid(eagle_folder_id, offset=offset, limit=limit, **_parse_sort_args())
+        _attach_eagle_detail_urls(data, request.args.get('return_to'))
+        return _page_response(data, metadata["pagination"])
+
     @app.route('/serve_image/<path:image_path>')
     def serve_image_by_full_path(image_path):
-        """提供靜態圖片服務"""
-        directory, filename = os.path.split(image_path)
-        directory = '/' + directory
-        return send_from_directory(directory, filename)
+        """提供靜態圖片 / 影片服務（ETag、304、Range）"""
+        abs_path = os.path.abspath('/' + image_path)
+        return send_media_file(abs_path, immutable=_is_eagle_item_path(abs_path))
+
+    @app.route('/thumb/<int:size>/<path:image_path>')
+    def serve_thumbnail(size, image_path):
+        """提供格狀檢視用的縮圖；無法產生縮圖時改送原圖"""
+        abs_path = os.path.abspath('/' + image_path)
+        allowed_roots = [DB_route_external, DB_route_internal]
+        try:
+            allowed_roots.append(EG.EAGLE_get_current_library_path())
+        except ValueError:
+            pass
+        if not _path_is_within_roots(abs_path, allowed_roots):
+            abort(403)
+        if not os.path.isfile(abs_path):
+            abort(404)
+
+        thumbnail_path = MI.get_thumbnail(abs_path, size)
+        if thumbnail_path is None:
+            # 改送原圖：之後可能產生縮圖，須重新驗證，不能以 immutable 快取在縮圖網址上
+            return send_media_file(abs_path)
+        # Eagle .info 內檔案的縮圖視為不可變；其他縮圖依 ETag 重新驗證
+        return send_media_file(thumbnail_path, immutable=_is_eagle_item_path(abs_path))
 
     @app.route('/video/<path:video_path>')
     def view_video(video_path):
@@ -263,48 +443,112 @@ def register_routes(app):
     @app.route('/EAGLE_tag/<target_tag>/')
     def view_images_by_tag(target_tag):
         """
-        顯示所有帶有指定標籤的圖片，並符合 EAGLE API 格式。
+        顯示帶有指定標籤的圖片（第一頁，其餘由前端透過 API 續載），並符合 EAGLE API 格式。
 
         Args:
             target_tag (str): 要查詢的標籤。
 
         Returns:
-            渲染的 HTML 頁面，顯示所有具有該標籤的圖片。
+            渲染的 HTML 頁面，顯示具有該標籤的圖片。
         """
-        metadata, data = get_eagle_images_by_tag(target_tag)
-
-        current_url = request.full_path
-        if current_url and current_url.endswith('?'):
-            current_url = current_url[:-1]
-
-        for item in data:
-            if item.get("media_type") == "video" and item.get("id"):
-                item["url"] = url_for("view_eagle_video", item_id=item["id"], return_to=current_url)
-            elif item.get("media_type") == "image" and item.get("id"):
-                item["url"] = url_for("view_eagle_image", item_id=item["id"], return_to=current_url)
+        offset, limit = _parse_page_args(EAGLE_PAGE_LIMIT, EAGLE_PAGE_MAX_LIMIT)
+        metadata, data = get_eagle_images_by_tag(target_tag, offset=offset, limit=limit, **_parse_sort_args())
 
+        current_url = _current_page_url()
+        _attach_eagle_detail_urls(data, current_url)
+        _attach_page_api(metadata, 'api_images_by_tag', current_url, target_tag=target_tag)
         return render_template('view_both.html', metadata=metadata, data=data)
 
+    @app.route('/api/EAGLE_tag/<target_tag>/')
+    def api_images_by_tag(target_tag):
+        """Eagle 標籤分頁資料（JSON）"""
+        offset, limit = _parse_page_args(EAGLE_PAGE_LIMIT, EAGLE_PAGE_MAX_LIMIT)
+        metadata, data = get_eagle_images_by_tag(target_tag, offset=offset, limit=limit, **_parse_sort_args())
+        _attach_eagle_detail_urls(data, request.args.get('return_to'))
+        return _page_response(data, metadata["pagination"])
+
     @app.route('/search')
     def search_eagle():
-        """使用 Eagle API 搜尋並顯示結果。"""
+        """使用 Eagle API 搜尋並顯示結果；帶 color 參數時改以主色搜尋本地收藏與 Eagle。"""
         keyword = request.args.get('query', '').strip()
+        color = request.args.get('color', '').strip()
+        if color:
+            offset, limit = _parse_page_args(EAGLE_PAGE_LIMIT, EAGLE_PAGE_MAX_LIMIT)
+            metadata, data = search_items_by_color(color, keyword or None, offset=offset, limit=limit,
+                                                   **_parse_color_filters())
+            _attach_page_api(metadata, 'api_color_search', None, color=metadata["color"], query=keyword or None,
+                             **{key: value for key, value in request.args.items()
+                                if key in ('max_distance', 'min_ratio', 'source')})
+            return render_template('view_both.html', metadata=metadata, data=data)
         if not keyword:
             return redirect(request.referrer or url_for('index'))
 
-        metadata, data = search_eagle_items(keyword)
+        offset, limit = _parse_page_args(EAGLE_PAGE_LIMIT, EAGLE_PAGE_MAX_LIMIT)
+        metadata, data = search_eagle_items(keyword, offset=offset, limit=limit, **_parse_sort_args())
 
-        current_url = request.full_path
-        if current_url and current_url.endswith('?'):
-            current_url = current_url[:-1]
+        current_url = _current_page_url()
+        _attach_eagle_detail_urls(data, current_url)
+        _attach_page_api(metadata, 'api_search_eagle', current_url, query=keyword)
+        return render_template('view_both.html', metadata=metadata, data=data)
 
-        for item in data:
-            if item.get("media_type") == "video" and item.get("id"):
-                item["url"] = url_for("view_eagle_video", item_id=item["id"], return_to=current_url)
-            elif item.get("media_type") == "image" and item.get("id"):
-                item["url"] = url_for("view_eagle_image", item_id=item["id"], return_to=current_url)
+    @app.route('/api/search')
+    def api_search_eagle():
+        """Eagle 搜尋分頁資料（JSON）"""
+        keyword = request.args.get('query', '').strip()
+        if not keyword:
+            abort(400, description="Missing query")
+
+        offset, limit = _parse_page_args(EAGLE_PAGE_LIMIT, EAGLE_PAGE_MAX_LIMIT)
+        metadata, data = search_eagle_items(keyword, offset=offset, limit=limit, **_parse_sort_args())
+        _attach_eagle_detail_urls(data, request.args.get('return_to'))
+        return _page_response(data, metadata["pagination"])
+
+    @app.route('/duplicates/')
+    def view_duplicates():
+        """列出內容完全相同的檔案群組（本地收藏與 Eagle 資源庫）"""
+        offset, limit = _parse_page_args(DUPLICATES_PAGE_LIMIT, DUPLICATES_PAGE_LIMIT * 4)
+        metadata, groups = get_duplicate_groups(offset=offset, limit=limit)
+        return render_template('duplicates.html', metadata=metadata, groups=groups)
+
+    @app.route('/api/duplicates/')
+    def api_duplicates():
+        """重複檔案群組（JSON）"""
+        offset, limit = _parse_page_args(DUPLICATES_PAGE_LIMIT, DUPLICATES_PAGE_LIMIT * 4)
+        metadata, groups = get_duplicate_groups(offset=offset, limit=limit)
+        next_offset = metadata["pagination"]["next_offset"]
+        return jsonify({
+            "groups": groups,
+            "groupCount": metadata["group_count"],
+            "wastedBytes": metadata["wasted_bytes"],
+            "status": metadata["status"],
+            "nextOffset": next_offset,
+            "hasMore": next_offset is not None
+        })
 
-        return render_template('view_both.html', metadata=metadata, data=data)
+    @app.route('/api/color_search')
+    def api_color_search():
+        """
+        主色接近指定顏色的項目（JSON）
+        color: "#rrggbb"；query: 名稱過濾；max_distance: 最大色差（ΔE76）；
+        min_ratio: 主色最小佔比（%）；source: local / eagle（省略為全部）
+        """
+        color = request.args.get('color', '').strip()
+        if not color:
+            abort(400, description="Missing color")
+        offset, limit = _parse_page_args(EAGLE_PAGE_LIMIT, EAGLE_PAGE_MAX_LIMIT)
+        metadata, data = search_items_by_color(color, request.args.get('query', '').strip() or None,
+                                               offset=offset, limit=limit, **_parse_color_filters())
+        items = _serialize_page_items(data)
+        for item, raw in zip(items, data):
+            item["distance"] = raw["distance"]
+            item["palette"] = raw["palette"]
+        next_offset = metadata["pagination"]["next_offset"]
+        return jsonify({
+            "items": items,
+            "total": metadata["total"],
+            "nextOffset": next_offset if next_offset is not None else offset + len(data),
+            "hasMore": next_offset is not None
+        })
 
     @app.route('/EAGLE_stream/')
     def eagle_stream():
@@ -314,38 +558,14 @@ def register_routes(app):
     @app.route('/api/EAGLE_stream/')
     def eagle_stream_data():
         """提供 Eagle 串流頁面使用的資料"""
-        try:
-            offset = int(request.args.get('offset', 0))
-            limit = int(request.args.get('limit', 30))
-        except ValueError:
-            abort(400, description="Invalid offset or limit")
-
-        limit = max(1, min(limit, 60))
-        offset = max(0, offset)
+        offset, limit = _parse_page_args(30, 60)
 
-        data = get_eagle_stream_items(offset=offset, limit=limit)
-        items = []
-        for item in data:
-            item_id = item.get("id")
-            if not item_id:
-                continue
-            if item.get("media_type") == "video":
-                detail_url = url_for("view_eagle_video", item_id=item_id)
-            else:
-                detail_url = url_for("view_eagle_image", item_id=item_id)
-
-            items.append({
-                "id": item_id,
-                "name": item.get("name"),
-                "thumbnail_route": item.get("thumbnail_route"),
-                "detail_url": detail_url,
-                "media_type": item.get("media_type"),
-                "ext": item.get("ext")
-            })
+        data = [item for item in get_eagle_stream_items(offset=offset, limit=limit) if item.get("id")]
+        _attach_eagle_detail_urls(data)
 
         return jsonify({
-            "items": items,
-            "nextOffset": offset + len(items)
+            "items": _serialize_page_items(data),
+            "nextOffset": offset + len(data)
         })
 
     @app.route('/EAGLE_video/<item_id>/')
@@ -1,11 +1,115 @@
+import multiprocessing
+import os
 from flask import Flask
+import config
+import src.eagle_api as EG
+import src.media_index as MI
+from discovery_feed import configure_discovery_feed
 from routes import register_routes, register_routes_debug
 
 app = Flask(__name__)
 
+EG.configure_client(
+    base_url=config.EAGLE_API_BASE_URL,
+    connect_timeout=config.EAGLE_CONNECT_TIMEOUT,
+    read_timeout=config.EAGLE_READ_TIMEOUT,
+    max_retries=config.EAGLE_MAX_RETRIES,
+    backoff_factor=config.EAGLE_RETRY_BACKOFF,
+    pool_size=config.EAGLE_POOL_SIZE,
+    failure_threshold=config.EAGLE_BREAKER_FAILURES,
+    reset_timeout=config.EAGLE_BREAKER_RESET,
+    health_check_interval=config.EAGLE_HEALTH_INTERVAL,
+    stale_cache_size=config.EAGLE_STALE_CACHE_SIZE,
+    max_concurrency=config.EAGLE_MAX_CONCURRENCY,
+)
+EG.configure_library_cache(ttl=config.EAGLE_LIBRARY_INFO_TTL)
+EG.configure_item_info_cache(maxsize=config.EAGLE_ITEM_INFO_CACHE_SIZE, ttl=config.EAGLE_ITEM_INFO_TTL)
+EG.configure_backend(
+    config.EAGLE_BACKEND,
+    library_path=config.EAGLE_LIBRARY_PATH,
+    max_workers=config.EAGLE_DISK_LOAD_WORKERS,
+)
+EG.configure_folder_covers(cache_path=os.path.join(config.CACHE_DIR, "eagle_folder_covers.json"))
+MI.configure_listing_cache(maxsize=config.LOCAL_LISTING_CACHE_SIZE, max_age=config.LOCAL_LISTING_MAX_AGE)
+MI.configure_folder_covers(
+    cache_path=os.path.join(config.CACHE_DIR, "local_folder_covers.json"),
+    max_workers=config.LOCAL_COVER_SCAN_WORKERS,
+    negative_ttl=config.LOCAL_COVER_NEGATIVE_TTL,
+)
+MI.configure_image_sizes(max_workers=config.IMAGE_SIZE_WORKERS, maxsize=config.IMAGE_SIZE_CACHE_SIZE)
+MI.configure_thumbnails(
+    os.path.join(config.CACHE_DIR, "thumbnails"),
+    sizes=config.THUMBNAIL_SIZES,
+    fmt=config.THUMBNAIL_FORMAT,
+    quality=config.THUMBNAIL_QUALITY,
+    max_workers=config.THUMBNAIL_WORKERS,
+)
+configure_discovery_feed(refresh_interval=config.DISCOVERY_REFRESH_INTERVAL)
+
+
+def start_background_services():
+    """啟動本機目錄（inotify）與各背景索引；每個行程只應呼叫一次。"""
+    if config.LOCAL_CATALOG_ENABLED:
+        MI.configure_catalog(
+            os.path.join(config.CACHE_DIR, "local_catalog.sqlite3"),
+            [config.DB_route_external, config.DB_route_internal],
+            max_workers=config.LOCAL_CATALOG_SCAN_WORKERS,
+            reconcile_interval=config.LOCAL_CATALOG_RECONCILE_INTERVAL,
+            use_inotify=config.LOCAL_CATALOG_INOTIFY,
+        )
+    if config.SIMILAR_IMAGES_ENABLED:
+        MI.configure_similar_images(
+            os.path.join(config.CACHE_DIR, "similar_images.sqlite3"),
+            [config.DB_route_external, config.DB_route_internal],
+            extra_sources={"eagle": EG.EAGLE_iter_library_images},
+            max_workers=config.SIMILAR_IMAGES_WORKERS,
+            max_distance=config.SIMILAR_IMAGES_MAX_DISTANCE,
+            rescan_interval=config.SIMILAR_IMAGES_RESCAN_INTERVAL,
+        )
+        EG.EAGLE_on_library_change(lambda *_: MI.refresh_similar_images("eagle"))
+    if config.DUPLICATES_ENABLED:
+        MI.configure_duplicates(
+            os.path.join(config.CACHE_DIR, "duplicates.sqlite3"),
+            [config.DB_route_external, config.DB_route_internal],
+            extra_sources={"eagle": EG.EAGLE_iter_library_files},
+            max_workers=config.DUPLICATES_WORKERS,
+            partial_bytes=config.DUPLICATES_PARTIAL_BYTES,
+            rescan_interval=config.DUPLICATES_RESCAN_INTERVAL,
+        )
+        EG.EAGLE_on_library_change(lambda *_: MI.refresh_duplicates())
+    if config.COLOR_INDEX_ENABLED:
+        MI.configure_color_index(
+            os.path.join(config.CACHE_DIR, "color_palettes.sqlite3"),
+            [config.DB_route_external, config.DB_route_internal],
+            extra_sources={"eagle": EG.EAGLE_iter_item_palettes},
+            max_workers=config.COLOR_INDEX_WORKERS,
+            colors=config.COLOR_PALETTE_SIZE,
+            rescan_interval=config.COLOR_INDEX_RESCAN_INTERVAL,
+        )
+        EG.EAGLE_on_library_change(lambda *_: MI.refresh_color_index())
+
+
+def _is_serving_process() -> bool:
+    """
+    是否為實際處理請求的行程。
+
+    - debug 模式的 reloader 會先以 __main__ 執行本檔再啟動子行程（WERKZEUG_RUN_MAIN=true）；
+    - spawn 啟動方式（macOS / Windows 預設）下，各索引的 ProcessPoolExecutor worker 會以
+      __mp_main__ 重新匯入本檔，這些 worker 不能再啟動背景服務。
+    """
+    # spawn 的 worker 匯入本檔時 parent_process() 尚未設定，但行程名稱已不是 MainProcess
+    if multiprocessing.current_process().name != "MainProcess":
+        return False
+    return __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+
+
+# 背景服務只在處理請求的行程（reloader 子行程，或被 WSGI server / flask 匯入時）啟動，避免重複掃描與索引
+if _is_serving_process():
+    start_background_services()
+
 # 註冊所有路由
 register_routes(app)
 register_routes_debug(app)
 
 if __name__ == "__main__":
-    app.run(debug=True, port=5894)
\ No newline at end of file
+    app.run(debug=True, port=5894)
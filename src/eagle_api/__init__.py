@@ -1,9 +1,17 @@
-# import os
-import requests
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 # import numpy as np
 import pandas as pd
 from bs4 import BeautifulSoup
-from typing import List, Optional, Dict, Union
+from typing import Callable, Iterator, List, Optional, Dict, Union
+from .client import EAGLE_API_BASE_URL, CircuitBreaker, EagleClient
+from .folder_covers import FolderCoverResolver
+from .folder_index import EagleFolderIndex
+from .thumbnails import THUMBNAIL_SUFFIX, EagleThumbnailIndex
 
 
 ### EAPLE API documents url:
@@ -21,19 +29,92 @@ from typing import List, Optional, Dict, Union
 
 ############################################# 操作資料夾相關 #############################################
 
+_client: Optional[EagleClient] = None
+_client_lock = threading.Lock()
+
+
+def configure_client(**kwargs) -> EagleClient:
+    """
+    以指定參數重建全域 client（通常在 run.py 啟動時依 config 呼叫一次）。
+    參數同 EagleClient。
+    """
+    global _client
+    with _client_lock:
+        previous = _client
+        _client = EagleClient(**kwargs)
+    if previous is not None:
+        previous.close()
+    return _client
+
+
+def EAGLE_is_available() -> bool:
+    """Eagle 是否可用（circuit breaker 未打開）。disk backend 時讀取不受影響。"""
+    return get_client().available
+
+
+def EAGLE_get_client_metrics() -> Dict:
+    """目前 client 的請求、合併（coalesced）與排隊統計，以及 breaker 狀態。"""
+    client = get_client()
+    return dict(client.metrics.snapshot(), breaker=client.breaker.state)
+
+
+def get_client() -> EagleClient:
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = EagleClient()
+    return _client
+
+
+_library_reader = None
+
+
+def _resolve_library_path_from_api() -> Optional[str]:
+    response = get_client().request("library/info")
+    if response.get("status") != "success":
+        return None
+    return (response.get("data") or {}).get("library", {}).get("path")
+
+
+def configure_backend(backend: str = "api", library_path: Optional[str] = None, **reader_kwargs):
+    """
+    選擇讀取資料的 backend。
+
+    Args:
+        backend (str): "api" 走 Eagle HTTP API；"disk" 直接讀資源庫目錄（寫入仍走 API）。
+        library_path (Optional[str]): disk 模式使用的資源庫路徑；留空則向 API 詢問一次。
+        reader_kwargs: 傳給 EagleLibraryReader 的其他參數（max_workers, refresh_interval）。
+    """
+    global _library_reader
+    if backend == "disk":
+        from .library_reader import EagleLibraryReader
+        _library_reader = EagleLibraryReader(
+            library_path=library_path or None,
+            path_resolver=_resolve_library_path_from_api,
+            **reader_kwargs
+        )
+    elif backend == "api":
+        _library_reader = None
+    else:
+        raise ValueError(f"Unknown Eagle backend: {backend}")
+    EAGLE_invalidate_library_info()
+
+
+def get_library_reader():
+    """目前使用中的 EagleLibraryReader；API 模式時為 None。"""
+    return _library_reader
+
+
 # 通用請求函數
 def send_request_to_eagle(endpoint: str, method: str = "GET", payload: dict = None) -> Dict[str, Union[bool, Dict, str]]:
-    url = f"http://localhost:41595/api/{endpoint}"
-    try:
-        if method == "GET":
-            response = requests.get(url, params=payload)
-        elif method == "POST":
-            response = requests.post(url, json=payload)
-        response.raise_for_status()
-        return response.json()     # {"status": "success", "data": }
-    except requests.RequestException as e:
-        return {"status": "error", "data": str(e)}  # 保持與 API 返回結構一致
-    
+    reader = _library_reader
+    if reader is not None:
+        response = reader.handle(endpoint, method, payload)
+        if response is not None:
+            return response
+    return get_client().request(endpoint, method, payload)
+
 # 資料夾相關操作
 def EAGLE_get_folders():
     """
@@ -235,16 +316,138 @@ def EAGLE_get_tags():
     """
     return send_request_to_eagle("tag/list")
 
-def EAGLE_get_item_info(item_id: str):
+class _ItemInfoCache:
     """
-    取得指定項目的詳細資訊。
+    item/info 回應的 LRU + TTL 快取。
+
+    每筆快取同時記錄該項目 images/<id>.info/metadata.json 的 mtime；
+    Eagle 修改項目時會改寫這個檔案，mtime 不同即視為失效，不必等 TTL 到期。
     """
-    response = send_request_to_eagle("item/info", "GET", {"itemId": item_id})
-    if response.get("status") == "success":
+
+    def __init__(self, maxsize: int = 512, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+    @staticmethod
+    def _stamp(item_id: str):
+        try:
+            library_path = EAGLE_get_current_library_path()
+        except ValueError:
+            return None
+        try:
+            return os.stat(os.path.join(library_path, "images", f"{item_id}.info", "metadata.json")).st_mtime_ns
+        except OSError:
+            return None
+
+    def get(self, item_id: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(item_id)
+        if entry is None:
+            return None
+        response, stored_at, stamp = entry
+        if time.monotonic() - stored_at > self.ttl or self._stamp(item_id) != stamp:
+            self.invalidate(item_id)
+            return None
+        with self._lock:
+            if item_id in self._entries:
+                self._entries.move_to_end(item_id)
         return response
 
-    # 某些版本的 API 可能使用 id 參數。
-    return send_request_to_eagle("item/info", "GET", {"id": item_id})
+    def put(self, item_id: str, response: Dict):
+        entry = (response, time.monotonic(), self._stamp(item_id))
+        with self._lock:
+            self._entries[item_id] = entry
+            self._entries.move_to_end(item_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, item_id: Optional[str] = None):
+        with self._lock:
+            if item_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(item_id, None)
+
+
+_item_info_cache = _ItemInfoCache()
+
+# item/info 的 id 參數名稱因 Eagle 版本而異：{eagle 版本: 可用的參數名稱}
+_ITEM_INFO_PARAMS = ("itemId", "id")
+_item_info_param_by_version: Dict[str, str] = {}
+_eagle_version_cache = {"value": None, "fetched_at": None}
+_EAGLE_VERSION_TTL = 300.0
+
+
+def configure_item_info_cache(maxsize: int = 512, ttl: float = 300.0):
+    """設定 item/info 快取大小與 TTL（秒）。"""
+    _item_info_cache.maxsize = maxsize
+    _item_info_cache.ttl = ttl
+
+
+def _get_eagle_version() -> Optional[str]:
+    fetched_at = _eagle_version_cache["fetched_at"]
+    if fetched_at is not None and time.monotonic() - fetched_at < _EAGLE_VERSION_TTL:
+        return _eagle_version_cache["value"]
+
+    response = EAGLE_get_application_info()
+    if response.get("status") != "success":
+        # 查詢失敗不快取，Eagle 恢復後下一次呼叫就會重新取得版本
+        return None
+    data = response.get("data") or {}
+    version = f"{data.get('version')}+{data.get('buildVersion')}"
+    _eagle_version_cache.update(value=version, fetched_at=time.monotonic())
+    return version
+
+
+def _request_item_info(item_id: str) -> Dict:
+    """
+    呼叫 item/info；每個 Eagle 版本只探測一次哪個參數名稱可用，之後直接使用。
+
+    disk 模式由 EagleLibraryReader 直接回答（兩種參數名稱都接受），不需要查詢版本；
+    版本未知（application/info 失敗）時照常探測，但不記錄結果。
+    """
+    if get_library_reader() is not None:
+        return send_request_to_eagle("item/info", "GET", {"id": item_id})
+
+    version = _get_eagle_version()
+    known_param = _item_info_param_by_version.get(version) if version else None
+    if known_param:
+        return send_request_to_eagle("item/info", "GET", {known_param: item_id})
+
+    response = {"status": "error", "data": "item/info not requested"}
+    for param in _ITEM_INFO_PARAMS:
+        response = send_request_to_eagle("item/info", "GET", {param: item_id})
+        if response.get("status") == "success":
+            if version:
+                _item_info_param_by_version[version] = param
+            return response
+    return response
+
+
+def EAGLE_get_item_info(item_id: str, use_cache: bool = True):
+    """
+    取得指定項目的詳細資訊（LRU + TTL 快取，項目被修改時自動失效）。
+
+    Args:
+        item_id (str): 項目 ID。
+        use_cache (bool): False 時略過快取直接向 Eagle 取得。
+    """
+    if use_cache:
+        cached = _item_info_cache.get(item_id)
+        if cached is not None:
+            return cached
+
+    response = _request_item_info(item_id)
+    if response.get("status") == "success":
+        _item_info_cache.put(item_id, response)
+    return response
+
+
+def EAGLE_invalidate_item_info(item_id: Optional[str] = None):
+    """讓指定項目（或全部）的 item/info 快取失效。"""
+    _item_info_cache.invalidate(item_id)
 
 
 def EAGLE_get_application_info():
@@ -253,26 +456,100 @@ def EAGLE_get_application_info():
     """
     return send_request_to_eagle("application/info")
 
-def EAGLE_get_library_info():
+class _LibraryInfoCache:
+    """
+    Process 內共用的 library/info 快取。
+
+    - TTL 內直接回傳記憶體中的 response（呼叫端請勿修改回傳的 dict）。
+    - 取得新資料時若資源庫路徑改變，會通知已註冊的 listener，讓其他快取一併失效。
+    - 同時只會有一個 thread 去打 library/info，其餘等待結果。
+    """
+
+    def __init__(self, ttl: float = 30.0):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._response: Optional[Dict] = None
+        self._fetched_at = 0.0
+        self._library_path: Optional[str] = None
+        self._listeners: List[Callable[[Optional[str], str], None]] = []
+
+    def get(self, force_refresh: bool = False) -> Dict:
+        changed_from = None
+        with self._lock:
+            fresh = self._response is not None and (time.monotonic() - self._fetched_at) < self.ttl
+            if fresh and not force_refresh:
+                return self._response
+
+            response = send_request_to_eagle("library/info", "GET")
+            if response.get("status") != "success":
+                return {"status": "error", "data": response.get("data")}
+
+            new_path = (response.get("data") or {}).get("library", {}).get("path")
+            if self._library_path is not None and new_path != self._library_path:
+                changed_from = self._library_path
+            self._response = response
+            self._fetched_at = time.monotonic()
+            self._library_path = new_path
+
+        if changed_from is not None:
+            self._notify(changed_from, new_path)
+        return response
+
+    def invalidate(self):
+        with self._lock:
+            self._fetched_at = 0.0
+
+    def add_listener(self, callback: Callable[[Optional[str], str], None]):
+        self._listeners.append(callback)
+
+    def _notify(self, old_path: Optional[str], new_path: str):
+        for callback in list(self._listeners):
+            try:
+                callback(old_path, new_path)
+            except Exception as exc:
+                print(f"Library change listener failed: {exc}")
+
+
+_library_cache = _LibraryInfoCache()
+
+
+def configure_library_cache(ttl: float):
+    """設定 library/info 快取的 TTL（秒）。"""
+    _library_cache.ttl = ttl
+
+
+def EAGLE_on_library_change(callback: Callable[[Optional[str], str], None]):
     """
-    獲取當前運行的 Eagle 資源庫的詳細信息。
+    註冊資源庫切換時的 callback，參數為 (舊路徑, 新路徑)。
+    """
+    _library_cache.add_listener(callback)
+
+
+def EAGLE_invalidate_library_info():
+    """讓下一次讀取 library/info 時重新向 Eagle 取得。"""
+    _library_cache.invalidate()
+
+
+def EAGLE_get_library_info(force_refresh: bool = False):
+    """
+    獲取當前運行的 Eagle 資源庫的詳細信息（TTL 快取）。
+
+    Args:
+        force_refresh (bool): 忽略快取，直接向 Eagle 重新取得。
 
     Returns:
         dict: 包含資源庫詳細信息的字典。如果請求失敗，返回錯誤信息。
     """
-    response = send_request_to_eagle("library/info", "GET")
-    if response.get("status") == "error":
-        return {"status": "error", "data": response.get("data")}
-    return response
+    return _library_cache.get(force_refresh=force_refresh)
 
 def EAGLE_get_current_library_path() -> str:
     """
-    获取当前 Eagle 资源库的路径。
+    获取当前 Eagle 资源库的路径（读取 library/info 快取）。
 
     Returns:
         str: 当前资源库的路径。如果请求失败或路径未找到，则返回错误信息。
     """
-    response = send_request_to_eagle("library/info", "GET")
+    response = EAGLE_get_library_info()
     if response.get("status") != "success":
         raise ValueError(f"Failed to fetch library info: {response.get('data')}")
 
@@ -283,6 +560,14 @@ def EAGLE_get_current_library_path() -> str:
     
     return library_path
 
+def EAGLE_switch_library(libraryPath: str):
+    """
+    切換 Eagle 目前使用的資源庫，並讓 library/info 快取失效。
+    """
+    response = send_request_to_eagle("library/switch", "POST", {"libraryPath": libraryPath})
+    EAGLE_invalidate_library_info()
+    return response
+
 def EAGLE_update_item_tags(itemId: str, tags: List[str]):
     """                 
     未驗證
@@ -296,7 +581,9 @@ def EAGLE_update_item_tags(itemId: str, tags: List[str]):
         dict: 包含更新操作結果的字典。
     """
     payload = {"itemId": itemId, "tags": tags}
-    return send_request_to_eagle("item/update", "POST", payload)
+    response = send_request_to_eagle("item/update", "POST", payload)
+    EAGLE_invalidate_item_info(itemId)
+    return response
 
 
 
@@ -345,6 +632,268 @@ def EAGLE_list_items(limit: int = 200, offset: int = 0, orderBy: Optional[str] =
     return send_request_to_eagle("item/list", "GET", payload)
 
 
+def EAGLE_iter_items(page_size: int = 200, max_items: Optional[int] = None, offset: int = 0,
+                     prefetch: bool = True, **filters) -> Iterator[Dict]:
+    """
+    逐頁走訪 /api/item/list 的 generator。
+
+    目前這頁在被消費時，下一頁已在背景 thread 取得，整份清單是 pipeline 而不是一頁等一頁。
+
+    Args:
+        page_size (int): 每次向 Eagle 要求的項目數。
+        max_items (Optional[int]): 最多產生的項目數，None 表示走完全部。
+        offset (int): 起始偏移量。
+        prefetch (bool): 是否在背景預先抓下一頁。
+        filters: 其餘傳給 EAGLE_list_items 的條件（orderBy, keyword, ext, tags, folders）。
+
+    Raises:
+        ValueError: 任一頁取得失敗。
+    """
+    executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+
+    def _schedule(page_offset, fetched):
+        limit = page_size if max_items is None else min(page_size, max_items - fetched)
+        if executor is None:
+            return limit, partial(EAGLE_list_items, limit=limit, offset=page_offset, **filters)
+        return limit, executor.submit(EAGLE_list_items, limit=limit, offset=page_offset, **filters).result
+
+    try:
+        next_offset = offset
+        fetched = 0
+        pending = _schedule(next_offset, fetched) if max_items is None or max_items > 0 else None
+        while pending is not None:
+            limit, result = pending
+            response = result()
+            if response.get("status") != "success":
+                raise ValueError(f"Failed to fetch items at offset {next_offset}: {response.get('data')}")
+
+            items = response.get("data") or []
+            next_offset += len(items)
+            fetched += len(items)
+            more = len(items) >= limit and (max_items is None or fetched < max_items)
+            # 先把下一頁送出去，再把這一頁交給呼叫端
+            pending = _schedule(next_offset, fetched) if more else None
+
+            yield from items
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+def EAGLE_list_all_items(page_size: int = 200, max_items: Optional[int] = None, **filters) -> Dict:
+    """
+    以 EAGLE_iter_items 取回完整清單，回傳與 EAGLE_list_items 相同的結構。
+    """
+    try:
+        data = list(EAGLE_iter_items(page_size=page_size, max_items=max_items, **filters))
+    except ValueError as exc:
+        return {"status": "error", "data": str(exc)}
+    return {"status": "success", "data": data}
+
+
+############################################# 資料夾索引 #############################################
+
+_folder_index: Optional[EagleFolderIndex] = None
+_folder_index_source: Optional[Dict] = None
+_folder_index_lock = threading.Lock()
+
+
+def EAGLE_get_folder_index() -> Optional[EagleFolderIndex]:
+    """
+    取得扁平化的資料夾索引。
+
+    索引跟著 library/info 快取更新：只有拿到新的 data 時才重建，其餘情況直接回傳同一份索引。
+    以 data 物件（而非每次可能複製的 response）判斷是否更新；Eagle 無法連線時回傳的
+    stale 結果也不會觸發重建。若 library/info 取得失敗，回傳上一次的索引（可能為 None）。
+    """
+    global _folder_index, _folder_index_source
+    response = EAGLE_get_library_info()
+    if response.get("status") != "success":
+        return _folder_index
+
+    with _folder_index_lock:
+        if response.get("stale") and _folder_index is not None:
+            return _folder_index
+        data = response.get("data") or {}
+        if data is not _folder_index_source:
+            _folder_index = EagleFolderIndex(data.get("folders", []))
+            _folder_index_source = data
+        return _folder_index
+
+
+def _reset_folder_index(old_path, new_path):
+    global _folder_index, _folder_index_source
+    with _folder_index_lock:
+        _folder_index = None
+        _folder_index_source = None
+
+
+EAGLE_on_library_change(_reset_folder_index)
+EAGLE_on_library_change(lambda old_path, new_path: EAGLE_invalidate_item_info())
+
+
+############################################# 資料夾封面 #############################################
+
+_folder_cover_resolver = FolderCoverResolver(EAGLE_list_items)
+
+
+def configure_folder_covers(cache_path: Optional[str] = None, **kwargs):
+    """
+    設定資料夾封面快取（持久化路徑、單一資料夾查詢門檻等，參數同 FolderCoverResolver）。
+    """
+    global _folder_cover_resolver
+    _folder_cover_resolver = FolderCoverResolver(EAGLE_list_items, cache_path=cache_path, **kwargs)
+
+
+def EAGLE_get_folder_covers(folders: List[Dict]) -> Dict[str, Optional[Dict]]:
+    """
+    一次取得多個資料夾的封面項目。
+
+    Args:
+        folders (List[Dict]): Eagle 資料夾節點（library/info 或 folder/list 的格式）。
+
+    Returns:
+        dict: {folder_id: {"id", "name", "ext"} 或 None（資料夾內沒有項目）}
+    """
+    try:
+        library_path = EAGLE_get_current_library_path()
+    except ValueError:
+        library_path = None
+    return _folder_cover_resolver.resolve(folders, library_path)
+
+
+############################################# 項目縮圖 #############################################
+
+_thumbnail_index = EagleThumbnailIndex()
+EAGLE_on_library_change(_thumbnail_index.reset)
+
+
+def configure_thumbnail_index(**kwargs):
+    """設定 Eagle 縮圖索引（掃描 thread 數、negative_ttl，參數同 EagleThumbnailIndex）。"""
+    global _thumbnail_index
+    _thumbnail_index = EagleThumbnailIndex(**kwargs)
+
+
+def EAGLE_get_item_thumbnail_path(item: Dict, library_path: Optional[str] = None) -> Optional[str]:
+    """
+    取得項目 Eagle 自帶縮圖（<name>_thumbnail.png）的絕對路徑。
+
+    Args:
+        item (Dict): Eagle 項目（需含 id、name；可含 noThumbnail）。
+        library_path (str): 目前資源庫路徑，省略時讀取 library/info 快取。
+
+    Returns:
+        str: 縮圖路徑；項目沒有 Eagle 縮圖時為 None。
+    """
+    if library_path is None:
+        try:
+            library_path = EAGLE_get_current_library_path()
+        except ValueError:
+            return None
+    return _thumbnail_index.resolve(library_path, item)
+
+
+IMAGE_HASH_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp", "bmp"}
+
+
+def _iter_library_item_files(library_path: Optional[str]) -> Iterator[tuple]:
+    """逐一列出資源庫 images/*.info 內的 (項目 ID, 原檔路徑, 縮圖路徑或 None)。"""
+    if library_path is None:
+        library_path = EAGLE_get_current_library_path()
+    images_dir = os.path.join(library_path, "images")
+    with os.scandir(images_dir) as entries:
+        info_dirs = [(entry.name[:-5], entry.path) for entry in entries if entry.name.endswith(".info")]
+
+    for item_id, info_dir in info_dirs:
+        original, thumbnail = None, None
+        try:
+            with os.scandir(info_dir) as files:
+                for file in files:
+                    if file.name.endswith(THUMBNAIL_SUFFIX):
+                        thumbnail = file.path
+                    elif file.name != "metadata.json" and not file.name.startswith("."):
+                        original = file.path
+        except OSError:
+            continue
+        if original is not None:
+            yield item_id, original, thumbnail
+
+
+def EAGLE_iter_library_images(library_path: Optional[str] = None) -> Iterator[tuple]:
+    """
+    直接讀取資源庫目錄，逐一列出可比對外觀的項目（不呼叫 Eagle API）。
+
+    有 Eagle 縮圖時以縮圖計算（影片等非圖片項目也因此能比對），否則使用原圖。
+
+    Yields:
+        tuple: (項目 ID, 原檔路徑, 用來計算指紋的圖檔路徑)。
+
+    Raises:
+        ValueError: 無法取得資源庫路徑。
+        OSError: 資源庫目錄無法讀取（例如 Eagle 在另一台電腦上）。
+    """
+    for item_id, original, thumbnail in _iter_library_item_files(library_path):
+        ext = os.path.splitext(original)[1].lower().lstrip(".")
+        hash_source = thumbnail or (original if ext in IMAGE_HASH_EXTENSIONS else None)
+        if hash_source:
+            yield item_id, original, hash_source
+
+
+def EAGLE_iter_library_files(library_path: Optional[str] = None) -> Iterator[tuple]:
+    """
+    直接讀取資源庫目錄，逐一列出每個項目的原檔（不含 Eagle 縮圖與 metadata.json）。
+
+    Yields:
+        tuple: (項目 ID, 原檔路徑)。
+
+    Raises:
+        ValueError: 無法取得資源庫路徑。
+        OSError: 資源庫目錄無法讀取。
+    """
+    for item_id, original, _ in _iter_library_item_files(library_path):
+        yield item_id, original
+
+
+def _normalize_palette(raw_palettes) -> Optional[List[tuple]]:
+    """Eagle 的 palettes（[{"color": [r, g, b], "ratio": 80}, ...]）→ [(r, g, b, 佔比)]。"""
+    palette = []
+    for entry in raw_palettes or []:
+        color = entry.get("color") if isinstance(entry, dict) else None
+        if not color or len(color) < 3:
+            continue
+        try:
+            palette.append((int(color[0]), int(color[1]), int(color[2]), int(round(float(entry.get("ratio") or 0)))))
+        except (TypeError, ValueError):
+            continue
+    return palette or None
+
+
+def EAGLE_iter_item_palettes(library_path: Optional[str] = None) -> Iterator[tuple]:
+    """
+    逐一列出項目與 Eagle 記錄的主色（走訪 item/list，供背景索引使用）。
+
+    Yields:
+        tuple: (項目 ID, 原檔路徑, 沒有主色時可用來計算的圖檔路徑或 None, [(r, g, b, 佔比)] 或 None)。
+
+    Raises:
+        ValueError: 無法取得資源庫路徑或項目列表。
+    """
+    if library_path is None:
+        library_path = EAGLE_get_current_library_path()
+    for item in EAGLE_iter_items():
+        item_id, name, ext = item.get("id"), item.get("name"), item.get("ext")
+        if not item_id or not name:
+            continue
+        original = os.path.join(library_path, "images", f"{item_id}.info", f"{name}.{ext}")
+        palette = _normalize_palette(item.get("palettes"))
+        image_path = None
+        if palette is None:
+            image_path = EAGLE_get_item_thumbnail_path(item, library_path)
+            if image_path is None and (ext or "").lower() in IMAGE_HASH_EXTENSIONS:
+                image_path = original
+        yield item_id, original, image_path, palette
+
+
 ##### 之後再做
 # def EAGLE_add_items_from_path(filePaths: List[str], folderId: str):
 #     """
@@ -358,12 +907,7 @@ def EAGLE_list_items(limit: int = 200, offset: int = 0, orderBy: Optional[str] =
 #         dict: 包含導入操作結果的字典。
 #     """
 #     payload = {"paths": filePaths, "folderId": folderId}
-#     try:
-#         response = requests.post('http://localhost:41595/api/item/addFromPath', json=payload)
-#         response.raise_for_status()
-#         return response.json()
-#     except requests.RequestException as e:
-#         return {"status": "error", "data": str(e)}
+#     return send_request_to_eagle("item/addFromPath", "POST", payload)
 
 if __name__ == "__main__":
     print('This is EAGPE_api')
@@ -0,0 +1,325 @@
+"""
+Eagle HTTP API client：連線池、timeout / retry、circuit breaker 與健康檢查。
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+EAGLE_API_BASE_URL = "http://localhost:41595/api"
+
+
+class CircuitBreaker:
+    """
+    連續失敗 failure_threshold 次後進入 open 狀態，所有請求立即失敗；
+    經過 reset_timeout 秒（或健康檢查成功）後進入 half-open，只放行一個試探請求。
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold: int = 3, reset_timeout: float = 10.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        return self._state
+
+    def allow_request(self) -> bool:
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def trip(self):
+        """健康檢查失敗時直接進入 open。"""
+        with self._lock:
+            self._failures = max(self._failures, self.failure_threshold)
+            self._state = self.OPEN
+            self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+
+class _InflightCall:
+    """同一個 GET 正在進行中的請求；其他 thread 等它完成後共用結果。"""
+
+    __slots__ = ("event", "result")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.result: Optional[Dict] = None
+
+
+class RequestMetrics:
+    """Eagle 請求的排隊與合併統計。"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.coalesced = 0
+        self.in_flight = 0
+        self.queued = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def record_coalesced(self):
+        with self._lock:
+            self.coalesced += 1
+
+    def enter_queue(self):
+        with self._lock:
+            self.queued += 1
+
+    def leave_queue(self, waited: float):
+        with self._lock:
+            self.queued -= 1
+            self.in_flight += 1
+            self.requests += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+
+    def finish(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "coalesced": self.coalesced,
+                "in_flight": self.in_flight,
+                "queued": self.queued,
+                "avg_queue_wait_ms": round(self.total_wait / self.requests * 1000, 3) if self.requests else 0.0,
+                "max_queue_wait_ms": round(self.max_wait * 1000, 3),
+            }
+
+
+class EagleClient:
+    """
+    持有連線池（keep-alive）的 Eagle API client。
+
+    - connect / read timeout 分開設定，避免 Eagle 卡住時 worker 無限等待。
+    - 只有 GET（冪等）會在連線錯誤或 5xx 時以 backoff 重試，POST 不重試。
+    - pool_size 應與 Flask worker（thread）數一致，避免連線在池外被丟棄。
+    - circuit breaker 打開時請求在毫秒內失敗；GET 會改回傳最後一次成功的結果（標記 stale）。
+    - 背景 thread 定期呼叫 application/info，Eagle 恢復後立即關閉 breaker。
+    - 相同的 GET 同時進行時只送出一次（single-flight），其餘呼叫共用結果。
+    - 同時送往 Eagle 的請求數以 max_concurrency 限制，排隊時間記錄在 metrics。
+    """
+
+    def __init__(self,
+                 base_url: str = EAGLE_API_BASE_URL,
+                 connect_timeout: float = 1.0,
+                 read_timeout: float = 15.0,
+                 max_retries: int = 2,
+                 backoff_factor: float = 0.2,
+                 pool_size: int = 8,
+                 failure_threshold: int = 3,
+                 reset_timeout: float = 10.0,
+                 health_check_interval: float = 5.0,
+                 stale_cache_size: int = 128,
+                 max_concurrency: int = 4):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+
+        retry = Retry(
+            total=max_retries,
+            connect=max_retries,
+            read=0,  # 讀取逾時不重試，避免一個請求等上數倍的 read timeout
+            status=max_retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(["GET"]),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.health_check_interval = health_check_interval
+        self._probe_session = requests.Session()
+        self._probe_thread: Optional[threading.Thread] = None
+        self._probe_lock = threading.Lock()
+        self._closed = threading.Event()
+
+        self.stale_cache_size = stale_cache_size
+        self._last_known: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._last_known_lock = threading.Lock()
+
+        self._inflight: Dict[Tuple, _InflightCall] = {}
+        self._inflight_lock = threading.Lock()
+        self._semaphore = threading.BoundedSemaphore(max(1, max_concurrency))
+        self.metrics = RequestMetrics()
+
+    # ----------------------------------------------------------- health probe
+    @property
+    def available(self) -> bool:
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    def _ensure_health_probe(self):
+        if self._probe_thread is not None or self.health_check_interval <= 0:
+            return
+        with self._probe_lock:
+            if self._probe_thread is None:
+                self._probe_thread = threading.Thread(target=self._probe_loop, name="eagle-health-probe", daemon=True)
+                self._probe_thread.start()
+
+    def check_health(self) -> bool:
+        """呼叫一次 application/info，並依結果更新 breaker。"""
+        try:
+            response = self._probe_session.get(
+                f"{self.base_url}/application/info",
+                timeout=(self.timeout[0], max(self.timeout[0], 2.0))
+            )
+            healthy = response.ok
+        except requests.RequestException:
+            healthy = False
+
+        if healthy:
+            self.breaker.record_success()
+        else:
+            self.breaker.trip()
+        return healthy
+
+    def _probe_loop(self):
+        while not self._closed.wait(self.health_check_interval):
+            self.check_health()
+
+    # -------------------------------------------------------- stale fallback
+    @staticmethod
+    def _cache_key(endpoint: str, method: str, payload: Optional[dict]):
+        if method != "GET":
+            return None
+        return endpoint, json.dumps(payload or {}, sort_keys=True, default=str)
+
+    def _remember(self, key, result: Dict):
+        if key is None or self.stale_cache_size <= 0 or result.get("status") != "success":
+            return
+        with self._last_known_lock:
+            self._last_known[key] = dict(result)  # 存副本：呼叫端修改回傳值不會影響快取
+            self._last_known.move_to_end(key)
+            while len(self._last_known) > self.stale_cache_size:
+                self._last_known.popitem(last=False)
+
+    def _fallback(self, key, message: str) -> Dict:
+        if key is not None:
+            with self._last_known_lock:
+                last_known = self._last_known.get(key)
+            if last_known is not None:
+                return dict(last_known, stale=True)
+        return {"status": "error", "data": message}
+
+    # ---------------------------------------------------------------- request
+    def request(self, endpoint: str, method: str = "GET", payload: dict = None) -> Dict[str, Union[bool, Dict, str]]:
+        self._ensure_health_probe()
+        key = self._cache_key(endpoint, method, payload)
+        if not self.breaker.allow_request():
+            return self._fallback(key, "Eagle is unavailable (circuit open)")
+        if key is None:
+            return self._send(endpoint, method, payload, key)
+
+        with self._inflight_lock:
+            call = self._inflight.get(key)
+            leader = call is None
+            if leader:
+                call = _InflightCall()
+                self._inflight[key] = call
+
+        if not leader:
+            self.metrics.record_coalesced()
+            call.event.wait()
+            return dict(call.result)  # 每個等待者各自一份，避免互相修改
+
+        try:
+            call.result = self._send(endpoint, method, payload, key)
+        except BaseException:
+            call.result = {"status": "error", "data": "Eagle request failed"}
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+            call.event.set()
+        return call.result
+
+    def _send(self, endpoint: str, method: str, payload: Optional[dict], key) -> Dict[str, Union[bool, Dict, str]]:
+        self.metrics.enter_queue()
+        queued_at = time.monotonic()
+        self._semaphore.acquire()
+        self.metrics.leave_queue(time.monotonic() - queued_at)
+        try:
+            return self._perform(endpoint, method, payload, key)
+        finally:
+            self._semaphore.release()
+            self.metrics.finish()
+
+    def _perform(self, endpoint: str, method: str, payload: Optional[dict], key) -> Dict[str, Union[bool, Dict, str]]:
+        url = f"{self.base_url}/{endpoint}"
+        try:
+            if method == "GET":
+                response = self.session.get(url, params=payload, timeout=self.timeout)
+            elif method == "POST":
+                response = self.session.post(url, json=payload, timeout=self.timeout)
+            else:
+                self.breaker.record_success()
+                return {"status": "error", "data": f"Unsupported method: {method}"}
+            response.raise_for_status()
+            result = response.json()     # {"status": "success", "data": }
+        except requests.HTTPError as e:
+            # 4xx 代表 Eagle 有回應，只是請求本身不合法
+            if e.response is not None and e.response.status_code < 500:
+                self.breaker.record_success()
+                return {"status": "error", "data": str(e)}
+            self.breaker.record_failure()
+            return self._fallback(key, str(e))
+        except requests.RequestException as e:
+            self.breaker.record_failure()
+            return self._fallback(key, str(e))
+        except ValueError as e:
+            self.breaker.record_success()
+            return {"status": "error", "data": str(e)}  # 保持與 API 返回結構一致
+
+        self.breaker.record_success()
+        self._remember(key, result)
+        return result
+
+    def close(self):
+        self._closed.set()
+        self.session.close()
+        self._probe_session.close()
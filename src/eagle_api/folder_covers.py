@@ -0,0 +1,192 @@
+"""
+Eagle 資料夾封面（第一張圖，依名稱排序）的解析與持久化快取。
+
+封面以 {folder_id: {"mtime": folder.modificationTime, "cover": {id, name, ext}}} 存成 JSON，
+只有 modificationTime 改變（或超過 max_age）的資料夾才會重新查詢：
+- 新增或 modificationTime 改變的資料夾不多時，在請求中每個資料夾用 limit=1 查一次；
+- 很多時改為在背景依名稱排序分頁掃過整個 item/list 一次，同時填滿所有資料夾；
+- 只是超過 max_age 的資料夾也交給背景重新查詢。
+背景查詢完成前回傳快取中的封面（沒有時為 None）。查詢 Eagle 時不持有 lock，
+checked_at 另加上隨機偏移，避免所有資料夾同時過期、一起重新查詢。
+"""
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+
+class FolderCoverResolver:
+
+    def __init__(self,
+                 list_items: Callable[..., Dict],
+                 cache_path: Optional[str] = None,
+                 per_folder_threshold: int = 16,
+                 page_size: int = 500,
+                 max_age: float = 24 * 3600,
+                 max_age_jitter: float = 0.25):
+        self._list_items = list_items
+        self.cache_path = cache_path
+        self.per_folder_threshold = per_folder_threshold
+        self.page_size = page_size
+        self.max_age = max_age
+        self.max_age_jitter = max_age_jitter
+
+        self._lock = threading.Lock()
+        self._library_path: Optional[str] = None
+        self._covers: Dict[str, Dict] = {}
+        self._loaded = False
+        self._generation = 0               # 資源庫切換或作廢時遞增，丟棄舊的查詢結果
+        self._inflight: Set[str] = set()   # 查詢中的資料夾（請求中或背景）
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="eagle-folder-cover")
+
+    # ------------------------------------------------------------ persistence
+    def _load(self):
+        self._loaded = True
+        if not self.cache_path or not os.path.isfile(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as fh:
+                payload = json.load(fh)
+        except (OSError, ValueError):
+            return
+        self._library_path = payload.get("library_path")
+        self._covers = payload.get("covers") or {}
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump({"library_path": self._library_path, "covers": self._covers}, fh)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as exc:
+            print(f"Failed to persist Eagle folder covers: {exc}")
+
+    def invalidate(self):
+        with self._lock:
+            self._covers = {}
+            self._generation += 1
+            self._save()
+
+    # ---------------------------------------------------------------- resolve
+    def resolve(self, folders: Iterable[Dict], library_path: Optional[str] = None) -> Dict[str, Optional[Dict]]:
+        """
+        回傳 {folder_id: 封面項目 {id, name, ext} 或 None}。
+
+        Args:
+            folders: Eagle 資料夾節點（需含 id 與 modificationTime）。
+            library_path: 目前資源庫路徑；與快取內記錄不同時整份快取作廢。
+        """
+        folders = [folder for folder in folders if folder.get("id")]
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            if library_path and library_path != self._library_path:
+                self._library_path = library_path
+                self._covers = {}
+                self._generation += 1
+
+            now = time.time()
+            changed, expired = [], []
+            for folder in folders:
+                if folder["id"] in self._inflight:
+                    continue
+                entry = self._covers.get(folder["id"])
+                if entry is None or entry.get("mtime") != folder.get("modificationTime"):
+                    changed.append(folder)
+                elif now - entry.get("checked_at", 0) > self.max_age:
+                    expired.append(folder)
+
+            if len(changed) <= self.per_folder_threshold:
+                foreground, background = changed, expired
+            else:
+                foreground, background = [], changed + expired
+            self._inflight.update(folder["id"] for folder in foreground + background)
+            generation = self._generation
+
+        if background:
+            self._executor.submit(self._refresh, background, generation)
+        if foreground:
+            # 少量新增 / 變動的資料夾直接在請求中查詢（不持有 lock）
+            found = {}
+            try:
+                found = self._query_per_folder(foreground)
+            finally:
+                self._merge(foreground, found, generation)
+
+        with self._lock:
+            return {folder["id"]: (self._covers.get(folder["id"]) or {}).get("cover") for folder in folders}
+
+    def _refresh(self, folders: List[Dict], generation: int):
+        """在背景 thread 中查詢封面。"""
+        found = {}
+        try:
+            if len(folders) <= self.per_folder_threshold:
+                found = self._query_per_folder(folders)
+            else:
+                found = self._query_single_pass(folders)
+        except Exception as exc:
+            print(f"Failed to refresh Eagle folder covers: {exc}")
+        finally:
+            self._merge(folders, found, generation)
+
+    def _merge(self, folders: List[Dict], found: Dict[str, Optional[Dict]], generation: int):
+        with self._lock:
+            for folder in folders:
+                self._inflight.discard(folder["id"])
+            if generation != self._generation or not found:
+                return
+            now = time.time()
+            for folder in folders:
+                if folder["id"] not in found:
+                    continue
+                self._covers[folder["id"]] = {
+                    "mtime": folder.get("modificationTime"),
+                    "checked_at": now - random.uniform(0, self.max_age * self.max_age_jitter),
+                    "cover": found[folder["id"]],
+                }
+            self._save()
+
+    @staticmethod
+    def _compact(item: Dict) -> Dict:
+        return {"id": item.get("id"), "name": item.get("name"), "ext": item.get("ext")}
+
+    def _query_per_folder(self, folders: List[Dict]) -> Dict[str, Optional[Dict]]:
+        found = {}
+        for folder in folders:
+            response = self._list_items(folders=[folder["id"]], limit=1, orderBy="NAME")
+            if response.get("status") != "success":
+                continue
+            items = response.get("data") or []
+            found[folder["id"]] = self._compact(items[0]) if items else None
+        return found
+
+    def _query_single_pass(self, folders: List[Dict]) -> Dict[str, Optional[Dict]]:
+        pending = {folder["id"] for folder in folders}
+        found = {}
+        offset = 0
+        while pending:
+            response = self._list_items(limit=self.page_size, offset=offset, orderBy="NAME")
+            if response.get("status") != "success":
+                # 掃描中斷：只保留已找到的結果，其他資料夾下次再試
+                return found
+            items = response.get("data") or []
+            for item in items:
+                if item.get("isDeleted"):
+                    continue
+                for folder_id in item.get("folders") or []:
+                    if folder_id in pending:
+                        found[folder_id] = self._compact(item)
+                        pending.discard(folder_id)
+            if len(items) < self.page_size:
+                break
+            offset += len(items)
+
+        for folder_id in pending:
+            found[folder_id] = None
+        return found
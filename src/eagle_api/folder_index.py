@@ -0,0 +1,76 @@
+"""
+Eagle 資料夾樹的扁平索引。
+
+library/info 回傳的是巢狀的資料夾樹，這裡一次展開成各種 O(1) 查詢表：
+id -> 節點、id -> 父節點 id、id -> 子節點、id -> 祖先路徑、名稱 -> id。
+"""
+from typing import Dict, Iterable, List, Optional
+
+
+class EagleFolderIndex:
+
+    def __init__(self, folders: Iterable[Dict]):
+        self._nodes: Dict[str, Dict] = {}
+        self._parent: Dict[str, Optional[str]] = {}
+        self._children: Dict[str, List[Dict]] = {}
+        self._path: Dict[str, List[str]] = {}
+        self._by_name: Dict[str, List[str]] = {}
+        self._roots: List[Dict] = []
+
+        # 以 stack 展開，避免極深的資料夾樹觸發遞迴上限
+        stack = [(node, None) for node in reversed(list(folders or []))]
+        while stack:
+            node, parent_id = stack.pop()
+            folder_id = node.get("id")
+            if not folder_id:
+                continue
+            children = [child for child in node.get("children") or [] if child.get("id")]
+
+            self._nodes[folder_id] = node
+            self._parent[folder_id] = parent_id
+            self._children[folder_id] = children
+            self._path[folder_id] = (self._path[parent_id] + [parent_id]) if parent_id else []
+            name = (node.get("name") or "").strip().lower()
+            if name:
+                self._by_name.setdefault(name, []).append(folder_id)
+            if parent_id is None:
+                self._roots.append(node)
+
+            stack.extend((child, folder_id) for child in reversed(children))
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def __contains__(self, folder_id):
+        return folder_id in self._nodes
+
+    @property
+    def roots(self) -> List[Dict]:
+        return self._roots
+
+    def all_folders(self) -> List[Dict]:
+        """所有資料夾節點（深度優先順序）。"""
+        return list(self._nodes.values())
+
+    def get(self, folder_id: str) -> Optional[Dict]:
+        return self._nodes.get(folder_id)
+
+    def name(self, folder_id: str, default: Optional[str] = None) -> Optional[str]:
+        node = self._nodes.get(folder_id)
+        if node is None:
+            return default
+        return node.get("name") or default
+
+    def parent(self, folder_id: str) -> Optional[Dict]:
+        parent_id = self._parent.get(folder_id)
+        return self._nodes.get(parent_id) if parent_id else None
+
+    def children(self, folder_id: str) -> List[Dict]:
+        return self._children.get(folder_id, [])
+
+    def ancestors(self, folder_id: str) -> List[Dict]:
+        """由最上層到父資料夾的節點列表（breadcrumb，不含自己）。"""
+        return [self._nodes[ancestor_id] for ancestor_id in self._path.get(folder_id, [])]
+
+    def find_by_name(self, name: str) -> List[str]:
+        return list(self._by_name.get((name or "").strip().lower(), []))
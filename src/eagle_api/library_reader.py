@@ -0,0 +1,327 @@
+"""
+直接讀取 Eagle 資源庫目錄的 backend，不經過 Eagle App 的 HTTP API。
+
+資源庫結構：
+    <library>/metadata.json                 資料夾樹、smart folders 等
+    <library>/mtime.json                    {item_id: mtime, ..., "all": 數量}
+    <library>/images/<id>.info/metadata.json 單一項目的 metadata
+
+`EagleLibraryReader.handle()` 接受與 HTTP API 相同的 endpoint / payload，
+回傳相同結構的 {"status": ..., "data": ...}，因此可直接插在
+`send_request_to_eagle` 前面；不支援的 endpoint（寫入類）回傳 None 交回 HTTP。
+"""
+import json
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Set
+
+
+_DIGITS = re.compile(r"\d+")
+
+
+def _natural_name(item: Dict) -> str:
+    """名稱的自然排序鍵（"img2" 排在 "img10" 前面）。"""
+    name = (item.get("name") or "").casefold()
+    return _DIGITS.sub(lambda match: match.group().lstrip("0").rjust(20, "0"), name)
+
+
+# orderBy -> key function；與 HTTP API 相同：不帶前綴為升冪，前綴 "-" 為降冪（例如 "-CREATEDATE" 由新到舊）
+ORDER_KEYS = {
+    "CREATEDATE": lambda item: item.get("btime") or 0,
+    "MODIFIEDDATE": lambda item: item.get("modificationTime") or item.get("mtime") or 0,
+    "FILESIZE": lambda item: item.get("size") or 0,
+    "RESOLUTION": lambda item: (item.get("width") or 0) * (item.get("height") or 0),
+    "NAME": _natural_name,
+}
+DEFAULT_ORDER = "CREATEDATE"
+
+
+def _read_json(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as fh:
+            return json.load(fh)
+    except (OSError, ValueError):
+        return None
+
+
+def _split_param(value) -> List[str]:
+    """HTTP 參數可能是 list 或逗號分隔字串，統一成 list。"""
+    if not value:
+        return []
+    if isinstance(value, str):
+        value = [value]
+    result = []
+    for entry in value:
+        result.extend(part.strip() for part in str(entry).split(",") if part.strip())
+    return result
+
+
+class EagleLibraryReader:
+    """
+    Eagle 資源庫的記憶體索引。
+
+    - 第一次使用時以 thread pool 平行讀取所有 images/*.info/metadata.json。
+    - 之後每隔 refresh_interval 秒比對 mtime.json，只重新讀取變動的項目。
+    - 依資料夾、標籤建立反向索引，排序結果依 orderBy 快取到下一次變動。
+    """
+
+    def __init__(self,
+                 library_path: Optional[str] = None,
+                 path_resolver: Optional[Callable[[], Optional[str]]] = None,
+                 max_workers: int = 8,
+                 refresh_interval: float = 2.0):
+        self._library_path = library_path
+        self._path_resolver = path_resolver
+        self.max_workers = max_workers
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.RLock()
+        self._checked_at = 0.0
+        self._library_meta: Dict = {}
+        self._library_meta_mtime = None
+        self._mtime_signature = None
+        self._item_mtimes: Dict[str, float] = {}
+        self._items: Dict[str, Dict] = {}
+        self._by_folder: Dict[str, Set[str]] = {}
+        self._by_tag: Dict[str, Set[str]] = {}
+        self._ordered: Dict[str, List[str]] = {}
+
+    # ------------------------------------------------------------------ paths
+    @property
+    def library_path(self) -> Optional[str]:
+        if not self._library_path and self._path_resolver is not None:
+            self._library_path = self._path_resolver()
+        return self._library_path
+
+    def _images_dir(self) -> str:
+        return os.path.join(self.library_path, "images")
+
+    def _item_metadata_path(self, item_id: str) -> str:
+        return os.path.join(self._images_dir(), f"{item_id}.info", "metadata.json")
+
+    # ---------------------------------------------------------------- refresh
+    def refresh(self, force: bool = False):
+        """必要時重新載入有變動的 metadata。"""
+        if not force and (time.monotonic() - self._checked_at) < self.refresh_interval:
+            return
+        with self._lock:
+            if not force and (time.monotonic() - self._checked_at) < self.refresh_interval:
+                return
+            if not self.library_path or not os.path.isdir(self.library_path):
+                raise FileNotFoundError(f"Eagle library not found: {self.library_path}")
+            self._refresh_library_meta()
+            self._refresh_items()
+            self._checked_at = time.monotonic()
+
+    def _refresh_library_meta(self):
+        meta_path = os.path.join(self.library_path, "metadata.json")
+        try:
+            mtime = os.stat(meta_path).st_mtime_ns
+        except OSError:
+            return
+        if mtime == self._library_meta_mtime:
+            return
+        self._library_meta = _read_json(meta_path) or {}
+        self._library_meta_mtime = mtime
+
+    def _scan_item_mtimes(self) -> Dict[str, float]:
+        """
+        取得 {item_id: mtime}。優先讀 mtime.json，沒有時退回逐一 stat 各項目的 metadata.json。
+        """
+        mtime_json = os.path.join(self.library_path, "mtime.json")
+        try:
+            stat = os.stat(mtime_json)
+        except OSError:
+            stat = None
+
+        if stat is not None:
+            signature = (stat.st_mtime_ns, stat.st_size)
+            if signature == self._mtime_signature:
+                return self._item_mtimes
+            data = _read_json(mtime_json)
+            if isinstance(data, dict):
+                self._mtime_signature = signature
+                data.pop("all", None)
+                return data
+
+        mtimes = {}
+        try:
+            with os.scandir(self._images_dir()) as entries:
+                for entry in entries:
+                    if not entry.name.endswith(".info"):
+                        continue
+                    try:
+                        mtimes[entry.name[:-5]] = os.stat(os.path.join(entry.path, "metadata.json")).st_mtime_ns
+                    except OSError:
+                        continue
+        except OSError:
+            return {}
+        return mtimes
+
+    def _refresh_items(self):
+        current = self._scan_item_mtimes()
+        if current is self._item_mtimes:
+            return
+
+        changed = [item_id for item_id, mtime in current.items() if self._item_mtimes.get(item_id) != mtime]
+        removed = [item_id for item_id in self._item_mtimes if item_id not in current]
+        if not changed and not removed:
+            self._item_mtimes = current
+            return
+
+        for item_id in removed:
+            self._drop_item(item_id)
+
+        paths = [self._item_metadata_path(item_id) for item_id in changed]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            loaded = list(executor.map(_read_json, paths, chunksize=64))
+
+        for item_id, item in zip(changed, loaded):
+            self._drop_item(item_id)
+            if isinstance(item, dict):
+                self._add_item(item_id, item)
+
+        self._item_mtimes = current
+        self._ordered.clear()
+
+    def _add_item(self, item_id: str, item: Dict):
+        item.setdefault("id", item_id)
+        self._items[item_id] = item
+        if item.get("isDeleted"):
+            return
+        for folder_id in item.get("folders") or []:
+            self._by_folder.setdefault(folder_id, set()).add(item_id)
+        for tag in item.get("tags") or []:
+            self._by_tag.setdefault(tag, set()).add(item_id)
+
+    def _drop_item(self, item_id: str):
+        item = self._items.pop(item_id, None)
+        if not item:
+            return
+        for folder_id in item.get("folders") or []:
+            self._by_folder.get(folder_id, set()).discard(item_id)
+        for tag in item.get("tags") or []:
+            self._by_tag.get(tag, set()).discard(item_id)
+
+    # ------------------------------------------------------------------ query
+    def _ordered_ids(self, order_by: Optional[str]) -> List[str]:
+        order_by = order_by or DEFAULT_ORDER
+        cached = self._ordered.get(order_by)
+        if cached is not None:
+            return cached
+
+        descending = order_by.startswith("-")
+        key_func = ORDER_KEYS.get(order_by.lstrip("-").upper(), ORDER_KEYS[DEFAULT_ORDER])
+        live = [item for item in self._items.values() if not item.get("isDeleted")]
+        live.sort(key=key_func, reverse=descending)
+        ordered = [item["id"] for item in live]
+        self._ordered[order_by] = ordered
+        return ordered
+
+    def _candidate_ids(self, tags: List[str], folders: List[str]) -> Optional[Set[str]]:
+        candidates = None
+        if folders:
+            candidates = set()
+            for folder_id in folders:
+                candidates |= self._by_folder.get(folder_id, set())
+        for tag in tags:
+            tagged = self._by_tag.get(tag, set())
+            candidates = set(tagged) if candidates is None else candidates & tagged
+        return candidates
+
+    @staticmethod
+    def _matches_keyword(item: Dict, keyword: str) -> bool:
+        haystack = [item.get("name") or "", item.get("annotation") or "", item.get("url") or ""]
+        haystack.extend(item.get("tags") or [])
+        return any(keyword in str(text).lower() for text in haystack)
+
+    def iter_items(self, orderBy: Optional[str] = None, keyword: Optional[str] = None,
+                   ext: Optional[str] = None, tags=None, folders=None) -> Iterable[Dict]:
+        """依條件依序產生（未複製的）項目 dict。"""
+        self.refresh()
+        with self._lock:
+            ordered = self._ordered_ids(orderBy)
+            candidates = self._candidate_ids(_split_param(tags), _split_param(folders))
+            items = self._items
+        keyword = keyword.lower() if keyword else None
+        ext = ext.lower().lstrip(".") if ext else None
+
+        for item_id in ordered:
+            if candidates is not None and item_id not in candidates:
+                continue
+            item = items.get(item_id)
+            if item is None:
+                continue
+            if ext and (item.get("ext") or "").lower() != ext:
+                continue
+            if keyword and not self._matches_keyword(item, keyword):
+                continue
+            yield item
+
+    def list_items(self, limit: int = 200, offset: int = 0, orderBy: Optional[str] = None,
+                   keyword: Optional[str] = None, ext: Optional[str] = None, tags=None, folders=None) -> Dict:
+        limit, offset = int(limit), int(offset)
+        data = []
+        for index, item in enumerate(self.iter_items(orderBy, keyword, ext, tags, folders)):
+            if index < offset:
+                continue
+            if len(data) >= limit:
+                break
+            data.append(dict(item))
+        return {"status": "success", "data": data}
+
+    def get_item_info(self, item_id: str) -> Dict:
+        self.refresh()
+        item = self._items.get(item_id)
+        if item is None:
+            # 可能是剛新增、mtime.json 尚未更新的項目
+            item = _read_json(self._item_metadata_path(item_id))
+        if not isinstance(item, dict):
+            return {"status": "error", "data": f"Item not found: {item_id}"}
+        return {"status": "success", "data": dict(item)}
+
+    def get_library_info(self) -> Dict:
+        self.refresh()
+        data = dict(self._library_meta)
+        data["library"] = {
+            "path": self.library_path,
+            "name": os.path.splitext(os.path.basename(os.path.normpath(self.library_path)))[0],
+        }
+        return {"status": "success", "data": data}
+
+    def get_folders(self) -> Dict:
+        self.refresh()
+        return {"status": "success", "data": self._library_meta.get("folders", [])}
+
+    def get_tags(self) -> Dict:
+        self.refresh()
+        with self._lock:
+            counts = [{"name": tag, "count": len(ids)} for tag, ids in self._by_tag.items() if ids]
+        return {"status": "success", "data": counts}
+
+    # --------------------------------------------------------------- dispatch
+    def handle(self, endpoint: str, method: str = "GET", payload: Optional[dict] = None) -> Optional[Dict]:
+        """
+        以 HTTP API 的 endpoint 介面查詢；不支援的 endpoint 回傳 None。
+        """
+        if method != "GET":
+            return None
+        payload = payload or {}
+        try:
+            if endpoint == "item/list":
+                return self.list_items(**{key: value for key, value in payload.items()
+                                          if key in ("limit", "offset", "orderBy", "keyword", "ext", "tags", "folders")})
+            if endpoint == "item/info":
+                return self.get_item_info(payload.get("id") or payload.get("itemId"))
+            if endpoint == "library/info":
+                return self.get_library_info()
+            if endpoint == "folder/list":
+                return self.get_folders()
+            if endpoint == "tag/list":
+                return self.get_tags()
+        except (OSError, ValueError, TypeError) as exc:
+            return {"status": "error", "data": str(exc)}
+        return None
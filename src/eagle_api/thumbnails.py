@@ -0,0 +1,117 @@
+"""
+Eagle 自帶縮圖（images/<id>.info/<name>_thumbnail.png）的存在索引。
+
+Eagle 會為大多數項目產生 _thumbnail.png；沒有縮圖的項目在 metadata 標記 noThumbnail（原檔即縮圖）。
+判斷順序：
+1. 項目 metadata 有 noThumbnail → 沒有縮圖；
+2. 背景掃描 images/*.info 建立的索引（每個資料庫掃一次）；
+3. 索引沒有的項目（例如掃描後才新增）stat 一次並記住結果。
+找不到縮圖的結果只保留 negative_ttl 秒，因為 Eagle 是在匯入後才非同步產生縮圖。
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+
+THUMBNAIL_SUFFIX = "_thumbnail.png"
+
+
+class EagleThumbnailIndex:
+
+    def __init__(self, scan_workers: int = 4, negative_ttl: float = 600.0):
+        self.scan_workers = scan_workers
+        self.negative_ttl = negative_ttl
+        self._lock = threading.Lock()
+        self._library_path: Optional[str] = None
+        # item_id -> (縮圖檔名或 None, 記錄時間)
+        self._known: Dict[str, Tuple[Optional[str], float]] = {}
+        self._scan_thread: Optional[threading.Thread] = None
+
+    def reset(self, *_):
+        with self._lock:
+            self._library_path = None
+            self._known = {}
+            self._scan_thread = None
+
+    # ------------------------------------------------------------------- scan
+    @staticmethod
+    def _scan_item_dir(info_dir: str) -> Optional[str]:
+        try:
+            with os.scandir(info_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith(THUMBNAIL_SUFFIX):
+                        return entry.name
+        except OSError:
+            pass
+        return None
+
+    def _scan_library(self, library_path: str):
+        images_dir = os.path.join(library_path, "images")
+        try:
+            with os.scandir(images_dir) as entries:
+                info_dirs = [(entry.name[:-5], entry.path) for entry in entries if entry.name.endswith(".info")]
+        except OSError:
+            return
+
+        with ThreadPoolExecutor(max_workers=self.scan_workers, thread_name_prefix="eagle-thumb-scan") as executor:
+            results = executor.map(self._scan_item_dir, [path for _, path in info_dirs], chunksize=256)
+            now = time.time()
+            scanned = {item_id: (thumbnail, now) for (item_id, _), thumbnail in zip(info_dirs, results)}
+
+        with self._lock:
+            if self._library_path != library_path:
+                return
+            # 掃描期間個別 stat 到的結果較新，保留
+            scanned.update(self._known)
+            self._known = scanned
+
+    def _ensure_scan(self, library_path: str):
+        if self._library_path != library_path:
+            self._library_path = library_path
+            self._known = {}
+            self._scan_thread = None
+        if self._scan_thread is None:
+            self._scan_thread = threading.Thread(
+                target=self._scan_library, args=(library_path,), name="eagle-thumbnail-scan", daemon=True
+            )
+            self._scan_thread.start()
+
+    # ---------------------------------------------------------------- resolve
+    def resolve(self, library_path: str, item: Dict) -> Optional[str]:
+        """
+        回傳項目 Eagle 縮圖的絕對路徑；沒有縮圖時回傳 None（呼叫端改用原檔或預設縮圖）。
+
+        Args:
+            library_path: 目前的資源庫路徑。
+            item: Eagle 項目（至少含 id、name；有 noThumbnail 時直接採用）。
+        """
+        item_id = item.get("id")
+        name = item.get("name")
+        if not item_id or not name or item.get("noThumbnail"):
+            return None
+
+        info_dir = os.path.join(library_path, "images", f"{item_id}.info")
+        expected = f"{name}{THUMBNAIL_SUFFIX}"
+        with self._lock:
+            self._ensure_scan(library_path)
+            known = self._known.get(item_id)
+
+        if known is not None:
+            thumbnail, checked_at = known
+            if thumbnail == expected:
+                return os.path.join(info_dir, thumbnail)
+            if thumbnail is None and time.time() - checked_at <= self.negative_ttl:
+                return None
+
+        # 索引沒有、已過期，或項目改名：stat 一次
+        thumbnail = expected if os.path.isfile(os.path.join(info_dir, expected)) else None
+        with self._lock:
+            if self._library_path == library_path:
+                self._known[item_id] = (thumbnail, time.time())
+        return os.path.join(info_dir, thumbnail) if thumbnail else None
+
+    def invalidate(self, item_id: str):
+        with self._lock:
+            self._known.pop(item_id, None)
@@ -0,0 +1,373 @@
+"""
+本地收藏（DB_route_internal / DB_route_external）的索引與快取。
+
+與 src.eagle_api 相同，模組層級持有單一實例，由 run.py 依 config 呼叫 configure_* 設定。
+"""
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .catalog import LocalCatalog
+from .dimensions import ImageSize, ImageSizeCache, make_size, read_image_size
+from .duplicates import DuplicateFinder, DuplicateGroup
+from .folder_covers import LocalFolderCoverCache
+from .listing import (
+    SORT_KEYS,
+    DirectoryListing,
+    DirectoryListingCache,
+    LocalEntry,
+    classify,
+    decode_cursor,
+    encode_cursor,
+    natural_key,
+)
+from .palettes import ColorIndex, ColorMatch, parse_hex_color
+from .similarity import SimilarImage, SimilarImageIndex
+from .thumbnails import ThumbnailService
+
+
+# 全站唯一的媒體副檔名定義，file_handler 也由此匯入，避免目錄索引與詳細頁的分類不一致
+IMAGE_EXTENSIONS = {"png", "jpg", "jpeg", "gif", "webp"}
+VIDEO_EXTENSIONS = {"mp4", "mov", "avi", "mkv", "webm", "m4v"}
+MEDIA_EXTENSIONS = IMAGE_EXTENSIONS | VIDEO_EXTENSIONS
+
+
+############################################# SQLite 目錄索引 #############################################
+
+_catalog: Optional[LocalCatalog] = None
+
+
+def configure_catalog(db_path: str, roots: Iterable[str], **kwargs) -> Optional[LocalCatalog]:
+    """
+    建立並在背景啟動本地收藏的目錄索引（參數同 LocalCatalog）。
+    就緒前以及不在索引內的路徑，下列查詢函式都會退回即時讀取磁碟。
+    """
+    global _catalog
+    if _catalog is not None:
+        _catalog.close()
+    _catalog = LocalCatalog(db_path, roots, IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, **kwargs)
+    _catalog.start()
+    return _catalog
+
+
+def get_catalog() -> Optional[LocalCatalog]:
+    return _catalog
+
+
+def stat_entry(abs_path: str) -> Optional[LocalEntry]:
+    """
+    單一檔案 / 資料夾的資訊（類型、大小、mtime）；優先查索引，不存在時回傳 None。
+    """
+    if _catalog is not None:
+        entry = _catalog.get_entry(abs_path)
+        if entry is not None:
+            return entry
+    try:
+        stat = os.stat(abs_path)
+    except OSError:
+        return None
+    name = os.path.basename(abs_path)
+    is_dir = os.path.isdir(abs_path)
+    ext, media_type = (None, None) if is_dir else classify(name, IMAGE_EXTENSIONS, VIDEO_EXTENSIONS)
+    return LocalEntry(name, os.path.abspath(abs_path), is_dir, media_type, ext, stat.st_size, stat.st_mtime)
+
+
+############################################# 資料夾列表 #############################################
+
+_listing_cache = DirectoryListingCache(IMAGE_EXTENSIONS, VIDEO_EXTENSIONS)
+
+
+def configure_listing_cache(**kwargs):
+    """設定資料夾列表快取（maxsize、max_age，參數同 DirectoryListingCache）。"""
+    global _listing_cache
+    _listing_cache = DirectoryListingCache(IMAGE_EXTENSIONS, VIDEO_EXTENSIONS, **kwargs)
+
+
+def list_directory(abs_dir: str) -> DirectoryListing:
+    """
+    列出資料夾：索引就緒時直接查表，否則以 os.scandir 列出（依資料夾 mtime 快取）。
+
+    Raises:
+        OSError: 資料夾不存在、不是資料夾或無法讀取。
+    """
+    if _catalog is not None:
+        listing = _catalog.list_directory(abs_dir)
+        if listing is not None:
+            return listing
+    return _listing_cache.get(abs_dir)
+
+
+def _created_times(entries: Iterable[LocalEntry]) -> Dict[str, float]:
+    """
+    建立時間：平台提供 st_birthtime 時使用；Linux 沒有，ctime 又是 inode 變更時間，
+    以 min(ctime, mtime) 近似（保留 mtime 複製進來的檔案會得到原始時間）。
+    """
+    values = {}
+    for entry in entries:
+        try:
+            stat = os.stat(entry.path)
+        except OSError:
+            continue
+        birthtime = getattr(stat, "st_birthtime", None)
+        values[entry.path] = birthtime if birthtime else min(stat.st_ctime, stat.st_mtime)
+    return values
+
+
+def _pixel_counts(entries: Iterable[LocalEntry]) -> Dict[str, float]:
+    """圖片的像素數（只讀檔頭）；影片與無法辨識的檔案不列入，排序時視為 0。"""
+    sizes = get_image_sizes([(entry.path, entry.mtime) for entry in entries if entry.media_type == "image"])
+    return {path: size.width * size.height for path, size in sizes.items() if size is not None}
+
+
+_SORT_EXTRAS = {"created": _created_times, "resolution": _pixel_counts}
+
+
+def page_directory(listing: DirectoryListing, sort: str = "name", descending: bool = False,
+                   after: Optional[tuple] = None, limit: Optional[int] = None) -> Tuple[List[LocalEntry], Optional[tuple]]:
+    """
+    DirectoryListing.page，並為 created / resolution 排序提供所需的額外資料
+    （只在該排序第一次用到時計算，之後記在列表上）。
+    """
+    return listing.page(sort, descending, after, limit, extras=_SORT_EXTRAS.get(sort))
+
+
+def invalidate_listing(abs_dir: Optional[str] = None):
+    """作廢指定資料夾（省略時為全部）的列表快取。"""
+    _listing_cache.invalidate(abs_dir)
+
+
+############################################# 資料夾封面 #############################################
+
+_folder_covers = LocalFolderCoverCache(MEDIA_EXTENSIONS)
+
+
+def configure_folder_covers(cache_path: Optional[str] = None, **kwargs):
+    """
+    設定本地資料夾封面快取（持久化路徑、背景掃描 worker 數等，參數同 LocalFolderCoverCache）。
+    """
+    global _folder_covers
+    _folder_covers.close()
+    _folder_covers = LocalFolderCoverCache(MEDIA_EXTENSIONS, cache_path=cache_path, **kwargs)
+
+
+def get_folder_cover(abs_dir: str, mtime: Optional[float] = None) -> Optional[str]:
+    """
+    取得資料夾封面檔案的絕對路徑（不做遞迴 I/O）。
+
+    Returns:
+        封面檔案路徑；資料夾內沒有媒體、或背景尚未掃描完成時為 None。
+    """
+    if _catalog is not None:
+        indexed, cover = _catalog.get_cover(abs_dir)
+        if indexed:
+            return cover
+    return _folder_covers.lookup(abs_dir, mtime)
+
+
+def invalidate_folder_cover(abs_dir: Optional[str] = None):
+    """作廢指定資料夾（省略時為全部）的封面快取。"""
+    _folder_covers.invalidate(abs_dir)
+
+
+############################################# 縮圖 #############################################
+
+_thumbnails: Optional[ThumbnailService] = None
+
+
+def configure_thumbnails(cache_dir: str, **kwargs) -> ThumbnailService:
+    """設定縮圖服務（快取目錄、尺寸、格式、process 數等，參數同 ThumbnailService）。"""
+    global _thumbnails
+    if _thumbnails is not None:
+        _thumbnails.close()
+    _thumbnails = ThumbnailService(cache_dir, **kwargs)
+    return _thumbnails
+
+
+def get_thumbnail(abs_path: str, size: int) -> Optional[str]:
+    """
+    取得（必要時產生）縮圖快取檔的路徑；無法產生時回傳 None，呼叫端應改送原圖。
+    """
+    if _thumbnails is None:
+        return None
+    return _thumbnails.get(abs_path, size)
+
+
+############################################# 圖片尺寸 #############################################
+
+_image_sizes = ImageSizeCache()
+
+
+def configure_image_sizes(**kwargs):
+    """設定圖片尺寸快取（thread 數、maxsize、timeout，參數同 ImageSizeCache）。"""
+    global _image_sizes
+    _image_sizes.close()
+    _image_sizes = ImageSizeCache(**kwargs)
+
+
+def get_image_sizes(files: Iterable[Tuple[str, Optional[float]]]) -> Dict[str, Optional[ImageSize]]:
+    """
+    批次以檔頭取得圖片尺寸（寬、高、方向），依 (路徑, mtime) 快取。
+
+    Args:
+        files: (絕對路徑, mtime 或 None)。
+
+    Returns:
+        {路徑: ImageSize；無法辨識的檔案為 None}
+    """
+    return _image_sizes.get_many(files)
+
+
+############################################# 相似圖片 #############################################
+
+_similar_images: Optional[SimilarImageIndex] = None
+
+
+def _iter_local_files(roots: List[str], media_types: Iterable[str]) -> List[str]:
+    """本地收藏內指定類型的所有檔案：索引就緒時查表，否則走訪磁碟。"""
+    media_types = set(media_types)
+    if _catalog is not None and _catalog.ready:
+        return [path for media_type in sorted(media_types) for path in _catalog.iter_media(media_type)]
+
+    paths = []
+    for root in roots:
+        for dirpath, dirnames, filenames in os.walk(root):
+            dirnames[:] = [name for name in dirnames if not name.startswith(".")]
+            paths.extend(
+                os.path.join(dirpath, name) for name in filenames
+                if not name.startswith(".") and classify(name, IMAGE_EXTENSIONS, VIDEO_EXTENSIONS)[1] in media_types
+            )
+    return paths
+
+
+def _iter_local_images(roots: List[str]) -> Iterator[Tuple[str, str, str]]:
+    for path in _iter_local_files(roots, ["image"]):
+        yield path, path, path
+
+
+def configure_similar_images(db_path: str,
+                             roots: Iterable[str],
+                             extra_sources: Optional[Dict[str, Callable]] = None,
+                             **kwargs) -> Optional[SimilarImageIndex]:
+    """
+    建立並在背景啟動相似圖片索引（參數同 SimilarImageIndex）。
+
+    本地收藏以 "local" 為來源名稱、圖片絕對路徑為識別碼；extra_sources 可加入其他來源（例如 Eagle）。
+    """
+    global _similar_images
+    if _similar_images is not None:
+        _similar_images.close()
+    local_roots = sorted({os.path.abspath(root) for root in roots if root and os.path.isdir(root)})
+    sources = {"local": lambda: _iter_local_images(local_roots)}
+    sources.update(extra_sources or {})
+    _similar_images = SimilarImageIndex(db_path, sources, **kwargs)
+    _similar_images.start()
+    return _similar_images
+
+
+def find_similar_images(source: str, ident: str, limit: int = 6) -> Optional[List[SimilarImage]]:
+    """
+    外觀相似的圖片（可跨來源），只查記憶體中的索引。
+
+    Returns:
+        相似項目列表（可能為空）；索引未啟用或該項目尚未建立指紋時為 None。
+    """
+    if _similar_images is None:
+        return None
+    return _similar_images.find(source, ident, limit)
+
+
+def refresh_similar_images(source: Optional[str] = None):
+    """要求相似圖片索引盡快重新列出指定來源（省略時為全部）。"""
+    if _similar_images is not None:
+        _similar_images.refresh(source)
+
+
+############################################# 重複檔案 #############################################
+
+_duplicates: Optional[DuplicateFinder] = None
+
+
+def _iter_local_media(roots: List[str]) -> Iterator[Tuple[str, str]]:
+    for path in _iter_local_files(roots, ["image", "video"]):
+        yield path, path
+
+
+def configure_duplicates(db_path: str,
+                         roots: Iterable[str],
+                         extra_sources: Optional[Dict[str, Callable]] = None,
+                         **kwargs) -> DuplicateFinder:
+    """
+    建立並在背景啟動重複檔案偵測（參數同 DuplicateFinder）。
+
+    本地收藏的圖片與影片以 "local" 為來源名稱、絕對路徑為識別碼；extra_sources 可加入其他來源（例如 Eagle）。
+    """
+    global _duplicates
+    if _duplicates is not None:
+        _duplicates.close()
+    local_roots = sorted({os.path.abspath(root) for root in roots if root and os.path.isdir(root)})
+    sources = {"local": lambda: _iter_local_media(local_roots)}
+    sources.update(extra_sources or {})
+    _duplicates = DuplicateFinder(db_path, sources, **kwargs)
+    _duplicates.start()
+    return _duplicates
+
+
+def get_duplicate_groups() -> List[DuplicateGroup]:
+    """目前找到的重複檔案群組（浪費空間最多的在前）；未啟用時為空列表。"""
+    return _duplicates.groups() if _duplicates is not None else []
+
+
+def get_duplicate_status() -> Optional[Dict]:
+    """掃描狀態（scanning、last_scan、files、hashed）；未啟用時為 None。"""
+    return _duplicates.status() if _duplicates is not None else None
+
+
+def refresh_duplicates():
+    if _duplicates is not None:
+        _duplicates.refresh()
+
+
+############################################# 主色調 #############################################
+
+_colors: Optional[ColorIndex] = None
+
+
+def _iter_local_palette_sources(roots: List[str]) -> Iterator[Tuple[str, str, str, None]]:
+    for path in _iter_local_files(roots, ["image"]):
+        yield path, path, path, None
+
+
+def configure_color_index(db_path: str,
+                          roots: Iterable[str],
+                          extra_sources: Optional[Dict[str, Callable]] = None,
+                          **kwargs) -> ColorIndex:
+    """
+    建立並在背景啟動主色調索引（參數同 ColorIndex）。
+
+    本地圖片以 "local" 為來源名稱、絕對路徑為識別碼；extra_sources 可加入自帶調色盤的來源（例如 Eagle）。
+    """
+    global _colors
+    if _colors is not None:
+        _colors.close()
+    local_roots = sorted({os.path.abspath(root) for root in roots if root and os.path.isdir(root)})
+    sources = {"local": lambda: _iter_local_palette_sources(local_roots)}
+    sources.update(extra_sources or {})
+    _colors = ColorIndex(db_path, sources, **kwargs)
+    _colors.start()
+    return _colors
+
+
+def search_by_color(rgb: Tuple[int, int, int], offset: int = 0, limit: int = 60, **kwargs) -> Tuple[List[ColorMatch], int]:
+    """
+    主色接近指定顏色的項目（參數同 ColorIndex.search），只查記憶體中的索引。
+
+    Returns:
+        (這一頁的結果, 符合的總數)；索引未啟用時為 ([], 0)。
+    """
+    if _colors is None:
+        return [], 0
+    return _colors.search(rgb, offset=offset, limit=limit, **kwargs)
+
+
+def refresh_color_index():
+    if _colors is not None:
+        _colors.refresh()
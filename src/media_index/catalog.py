@@ -0,0 +1,542 @@
+"""
+本地收藏根目錄的 SQLite 目錄索引（catalog）。
+
+背景 thread 維護一份 {路徑, 上層資料夾, 類型, 大小, mtime, 封面} 的資料表：
+- 第一次建立時以 thread pool 平行 scandir 整棵樹；
+- 之後在 Linux 上以 inotify（ctypes）接收變動，只重新列出有變動的資料夾；
+- 另外定期比對每個資料夾的 mtime（reconcile），補上網路磁碟等收不到 inotify 的變動。
+
+catalog 就緒後，資料夾列表、封面與單一檔案資訊都直接查表，不再碰磁碟；
+尚未就緒或不在索引內的路徑回傳 None，由呼叫端退回即時讀取。
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import sqlite3
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .listing import DirectoryListing, LocalEntry, classify
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    name TEXT NOT NULL,
+    is_dir INTEGER NOT NULL,
+    media_type TEXT,
+    ext TEXT,
+    size INTEGER,
+    mtime REAL,
+    cover TEXT,             -- 資料夾：遞迴找到的第一個媒體檔
+    scanned_mtime REAL      -- 資料夾：上次列出內容時的 mtime；NULL 表示尚未列出
+);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries(parent, name);
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY,
+    built_at REAL
+);
+"""
+
+ENTRY_COLUMNS = "name, path, is_dir, media_type, ext, size, mtime"
+
+
+class _Inotify:
+    """最小的 inotify 包裝（ctypes 呼叫 libc），只在 Linux 上可用。"""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+
+    WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+                  | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+
+    def add_watch(self, path: str) -> int:
+        wd = self._add_watch(self.fd, os.fsencode(path), self.WATCH_MASK)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        return wd
+
+    def rm_watch(self, wd: int):
+        self._rm_watch(self.fd, wd)
+
+    def read(self, timeout: float) -> List[Tuple[int, int, str]]:
+        """等待最多 timeout 秒，回傳 [(wd, mask, name), ...]。"""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        buffer = os.read(self.fd, 64 * 1024)
+        events, offset = [], 0
+        while offset + self._EVENT.size <= len(buffer):
+            wd, mask, _, length = self._EVENT.unpack_from(buffer, offset)
+            offset += self._EVENT.size
+            name = os.fsdecode(buffer[offset:offset + length].rstrip(b"\0"))
+            offset += length
+            events.append((wd, mask, name))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class LocalCatalog:
+    """
+    Args:
+        db_path: SQLite 檔案路徑。
+        roots: 要索引的根目錄（DB_route_external / DB_route_internal）。
+        max_workers: 初次建立時平行 scandir 的 thread 數。
+        reconcile_interval: 定期比對資料夾 mtime 的間隔（秒），0 表示停用。
+        use_inotify: Linux 上是否以 inotify 接收即時變動。
+        debounce: inotify 事件停止多久（秒）後才重新列出變動的資料夾。
+    """
+
+    def __init__(self,
+                 db_path: str,
+                 roots: Iterable[str],
+                 image_extensions: Iterable[str],
+                 video_extensions: Iterable[str],
+                 max_workers: int = 8,
+                 reconcile_interval: float = 300.0,
+                 use_inotify: bool = True,
+                 debounce: float = 0.5,
+                 listing_cache_size: int = 256):
+        self.db_path = db_path
+        self.roots = sorted({os.path.abspath(root) for root in roots if root and os.path.isdir(root)})
+        self.image_extensions = frozenset(image_extensions)
+        self.video_extensions = frozenset(video_extensions)
+        self.max_workers = max_workers
+        self.reconcile_interval = reconcile_interval
+        self.use_inotify = use_inotify and sys.platform.startswith("linux")
+        self.debounce = debounce
+        self.listing_cache_size = listing_cache_size
+
+        self._ready = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._local = threading.local()
+        self._write_lock = threading.Lock()
+        self._listings_lock = threading.Lock()
+        self._listings: "OrderedDict[str, DirectoryListing]" = OrderedDict()
+        self._generation = 0
+
+        self._inotify: Optional[_Inotify] = None
+        self._watches: Dict[int, str] = {}
+        self._watch_limit_hit = False
+
+    # ------------------------------------------------------------- lifecycle
+    @property
+    def ready(self) -> bool:
+        return self._ready.is_set()
+
+    def start(self):
+        if self._thread is not None or not self.roots:
+            return
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="local-catalog", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _reader(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    # ------------------------------------------------------------------ query
+    def _within_roots(self, abs_path: str) -> bool:
+        return any(abs_path == root or abs_path.startswith(root + os.sep) for root in self.roots)
+
+    def _row_to_entry(self, row) -> LocalEntry:
+        name, path, is_dir, media_type, ext, size, mtime = row
+        return LocalEntry(name, path, bool(is_dir), media_type, ext, size or 0, mtime or 0.0)
+
+    def list_directory(self, abs_dir: str) -> Optional[DirectoryListing]:
+        """已索引的資料夾列表；未就緒或不在索引內時回傳 None。"""
+        if not self.ready:
+            return None
+        abs_dir = os.path.abspath(abs_dir)
+        if not self._within_roots(abs_dir):
+            return None
+        with self._listings_lock:
+            listing = self._listings.get(abs_dir)
+            if listing is not None:
+                self._listings.move_to_end(abs_dir)
+                return listing
+
+        generation = self._generation
+        conn = self._reader()
+        row = conn.execute("SELECT scanned_mtime FROM entries WHERE path = ? AND is_dir = 1", (abs_dir,)).fetchone()
+        if row is None or row[0] is None:
+            return None
+        rows = conn.execute(f"SELECT {ENTRY_COLUMNS} FROM entries WHERE parent = ? ORDER BY name", (abs_dir,)).fetchall()
+        entries = tuple(self._row_to_entry(child) for child in rows)
+        listing = DirectoryListing(abs_dir, int(row[0] * 1e9), entries,
+                                   frozenset(entry.name for entry in entries), self.image_extensions)
+
+        with self._listings_lock:
+            # 查詢期間有寫入時不放進快取，避免留下舊列表
+            if generation != self._generation:
+                return listing
+            self._listings[abs_dir] = listing
+            while len(self._listings) > self.listing_cache_size:
+                self._listings.popitem(last=False)
+        return listing
+
+    def get_cover(self, abs_dir: str) -> Tuple[bool, Optional[str]]:
+        """回傳 (是否已索引, 封面檔案路徑或 None)。"""
+        if not self.ready:
+            return False, None
+        row = self._reader().execute(
+            "SELECT cover, scanned_mtime FROM entries WHERE path = ? AND is_dir = 1", (os.path.abspath(abs_dir),)
+        ).fetchone()
+        if row is None or row[1] is None:
+            return False, None
+        return True, row[0]
+
+    def get_entry(self, abs_path: str) -> Optional[LocalEntry]:
+        if not self.ready:
+            return None
+        row = self._reader().execute(
+            f"SELECT {ENTRY_COLUMNS} FROM entries WHERE path = ?", (os.path.abspath(abs_path),)
+        ).fetchone()
+        return self._row_to_entry(row) if row else None
+
+    def iter_media(self, media_type: str) -> List[str]:
+        """索引內所有指定類型（"image" / "video"）檔案的路徑；未就緒時回傳空列表。"""
+        if not self.ready:
+            return []
+        rows = self._reader().execute("SELECT path FROM entries WHERE media_type = ?", (media_type,)).fetchall()
+        return [row[0] for row in rows]
+
+    def iter_subtree_dirs(self, abs_dir: str) -> List[str]:
+        conn = self._reader()
+        lower, upper = self._subtree_bounds(abs_dir)
+        rows = conn.execute(
+            "SELECT path FROM entries WHERE is_dir = 1 AND (path = ? OR (path >= ? AND path < ?))",
+            (abs_dir, lower, upper)
+        ).fetchall()
+        return [row[0] for row in rows]
+
+    @staticmethod
+    def _subtree_bounds(abs_dir: str) -> Tuple[str, str]:
+        """子孫路徑的範圍：[dir + sep, dir + chr(ord(sep) + 1))，避免 LIKE 的跳脫問題。"""
+        return abs_dir + os.sep, abs_dir + chr(ord(os.sep) + 1)
+
+    # ------------------------------------------------------------------- scan
+    def _scan_dir(self, abs_dir: str):
+        """列出單一資料夾；回傳 (資料夾 mtime, rows, 子資料夾)。"""
+        dir_mtime = os.stat(abs_dir).st_mtime
+        rows, subdirs = [], []
+        with os.scandir(abs_dir) as iterator:
+            for dir_entry in iterator:
+                if dir_entry.name.startswith("."):
+                    continue
+                try:
+                    is_dir = dir_entry.is_dir()
+                    stat = dir_entry.stat()
+                except OSError:
+                    continue
+                if is_dir:
+                    ext, media_type = None, None
+                    # 不跟隨 symlink 資料夾遞迴，避免循環；它們會退回即時讀取
+                    if not dir_entry.is_symlink():
+                        subdirs.append(dir_entry.path)
+                else:
+                    ext, media_type = classify(dir_entry.name, self.image_extensions, self.video_extensions)
+                rows.append((dir_entry.path, abs_dir, dir_entry.name, int(is_dir), media_type, ext,
+                             stat.st_size, stat.st_mtime))
+        return dir_mtime, rows, subdirs
+
+    def _store_dir(self, conn: sqlite3.Connection, abs_dir: str, dir_mtime: float, rows) -> List[str]:
+        """
+        寫入一個資料夾的內容（保留子資料夾既有的封面與掃描狀態），刪除已不存在的項目。
+        回傳需要（重新）遞迴掃描的子資料夾。
+        """
+        previous = {
+            path: (is_dir, scanned)
+            for path, is_dir, scanned in conn.execute(
+                "SELECT path, is_dir, scanned_mtime FROM entries WHERE parent = ?", (abs_dir,)
+            )
+        }
+        conn.executemany(
+            "INSERT INTO entries (path, parent, name, is_dir, media_type, ext, size, mtime) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+            "ON CONFLICT(path) DO UPDATE SET parent = excluded.parent, name = excluded.name, "
+            "is_dir = excluded.is_dir, media_type = excluded.media_type, ext = excluded.ext, "
+            "size = excluded.size, mtime = excluded.mtime",
+            rows
+        )
+        current = {row[0] for row in rows}
+        for path in previous.keys() - current:
+            self._delete_subtree(conn, path)
+        conn.execute("UPDATE entries SET scanned_mtime = ? WHERE path = ?", (dir_mtime, abs_dir))
+
+        return [
+            row[0] for row in rows
+            if row[3] and (row[0] not in previous or not previous[row[0]][0] or previous[row[0]][1] is None)
+        ]
+
+    def _delete_subtree(self, conn: sqlite3.Connection, abs_path: str):
+        lower, upper = self._subtree_bounds(abs_path)
+        conn.execute("DELETE FROM entries WHERE path = ? OR (path >= ? AND path < ?)", (abs_path, lower, upper))
+        with self._listings_lock:
+            self._generation += 1
+            for cached in [path for path in self._listings if path == abs_path or path.startswith(lower)]:
+                self._listings.pop(cached, None)
+
+    def _scan_tree(self, conn: sqlite3.Connection, top: str, subdirs_of_top: Optional[List[str]] = None) -> List[str]:
+        """平行列出 top 以下的所有資料夾並寫入；回傳列出過的資料夾。"""
+        scanned = []
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="catalog-scan") as executor:
+            targets = subdirs_of_top if subdirs_of_top is not None else [top]
+            pending = {executor.submit(self._scan_dir, path): path for path in targets}
+            while pending and not self._stop.is_set():
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    abs_dir = pending.pop(future)
+                    try:
+                        dir_mtime, rows, _ = future.result()
+                    except OSError:
+                        continue
+                    with self._write_lock:
+                        new_subdirs = self._store_dir(conn, abs_dir, dir_mtime, rows)
+                    scanned.append(abs_dir)
+                    for subdir in new_subdirs:
+                        pending[executor.submit(self._scan_dir, subdir)] = subdir
+            conn.commit()
+        return scanned
+
+    # ----------------------------------------------------------------- covers
+    def _update_covers(self, conn: sqlite3.Connection, top: str):
+        """
+        由下而上計算 top 以下（含 top）資料夾的封面，順序與 os.walk 相同：
+        資料夾內依名稱排序的第一個媒體檔，沒有時取依名稱排序的第一個有封面的子資料夾。
+        """
+        lower, upper = self._subtree_bounds(top)
+        rows = conn.execute(
+            "SELECT path, parent, name, is_dir, media_type FROM entries "
+            "WHERE parent = ? OR (parent >= ? AND parent < ?) ORDER BY name",
+            (top, lower, upper)
+        ).fetchall()
+        children: Dict[str, List[Tuple[str, bool, Optional[str]]]] = {}
+        for path, parent, _, is_dir, media_type in rows:
+            children.setdefault(parent, []).append((path, bool(is_dir), media_type))
+
+        covers: Dict[str, Optional[str]] = {}
+        # 後序走訪：先算子資料夾
+        stack = [(top, False)]
+        while stack:
+            path, expanded = stack.pop()
+            if not expanded:
+                stack.append((path, True))
+                stack.extend((child, False) for child, is_dir, _ in children.get(path, []) if is_dir)
+                continue
+            cover = next((child for child, is_dir, media_type in children.get(path, []) if media_type), None)
+            if cover is None:
+                cover = next((covers.get(child) for child, is_dir, _ in children.get(path, [])
+                              if is_dir and covers.get(child)), None)
+            covers[path] = cover
+
+        conn.executemany("UPDATE entries SET cover = ? WHERE path = ?",
+                         [(cover, path) for path, cover in covers.items()])
+
+    def _update_ancestor_covers(self, conn: sqlite3.Connection, abs_dir: str):
+        path = abs_dir
+        while self._within_roots(path):
+            self._update_covers_shallow(conn, path)
+            if path in self.roots:
+                break
+            path = os.path.dirname(path)
+
+    def _update_covers_shallow(self, conn: sqlite3.Connection, abs_dir: str):
+        rows = conn.execute(
+            "SELECT path, is_dir, media_type, cover FROM entries WHERE parent = ? ORDER BY name", (abs_dir,)
+        ).fetchall()
+        cover = next((path for path, _, media_type, _ in rows if media_type), None)
+        if cover is None:
+            cover = next((child_cover for _, is_dir, _, child_cover in rows if is_dir and child_cover), None)
+        conn.execute("UPDATE entries SET cover = ? WHERE path = ?", (cover, abs_dir))
+
+    # -------------------------------------------------------------- build/sync
+    def _build_root(self, conn: sqlite3.Connection, root: str):
+        started = time.time()
+        with self._write_lock:
+            conn.execute(
+                "INSERT OR IGNORE INTO entries (path, parent, name, is_dir) VALUES (?, NULL, ?, 1)",
+                (root, os.path.basename(root) or root)
+            )
+        self._scan_tree(conn, root)
+        with self._write_lock:
+            self._update_covers(conn, root)
+            conn.execute("INSERT OR REPLACE INTO roots (path, built_at) VALUES (?, ?)", (root, time.time()))
+            conn.commit()
+        print(f"Local catalog built for {root} in {time.time() - started:.1f}s")
+
+    def _rescan_dirs(self, conn: sqlite3.Connection, dirs: Set[str]):
+        """重新列出有變動的資料夾（非遞迴），新出現的子資料夾再遞迴建立。"""
+        for abs_dir in sorted(dirs):
+            if self._stop.is_set():
+                return
+            if not self._within_roots(abs_dir):
+                continue
+            try:
+                dir_mtime, rows, _ = self._scan_dir(abs_dir)
+            except FileNotFoundError:
+                with self._write_lock:
+                    self._delete_subtree(conn, abs_dir)
+                    conn.commit()
+                parent = os.path.dirname(abs_dir)
+                if parent != abs_dir and self._within_roots(parent):
+                    self._rescan_dirs(conn, {parent})
+                continue
+            except OSError:
+                continue
+
+            with self._write_lock:
+                new_subdirs = self._store_dir(conn, abs_dir, dir_mtime, rows)
+                conn.commit()
+            if new_subdirs:
+                for path in self._scan_tree(conn, abs_dir, new_subdirs):
+                    self._watch(path)
+                with self._write_lock:
+                    for subdir in new_subdirs:
+                        self._update_covers(conn, subdir)
+            with self._write_lock:
+                self._update_ancestor_covers(conn, abs_dir)
+                conn.commit()
+            with self._listings_lock:
+                self._generation += 1
+                self._listings.pop(abs_dir, None)
+
+    def _reconcile(self, conn: sqlite3.Connection):
+        """比對每個已索引資料夾的 mtime，找出 inotify 漏掉的變動。"""
+        changed = set()
+        for path, scanned_mtime in conn.execute(
+                "SELECT path, scanned_mtime FROM entries WHERE is_dir = 1 AND scanned_mtime IS NOT NULL").fetchall():
+            if self._stop.is_set():
+                return
+            try:
+                if os.stat(path).st_mtime != scanned_mtime:
+                    changed.add(path)
+            except OSError:
+                changed.add(path)
+        if changed:
+            self._rescan_dirs(conn, changed)
+
+    # ---------------------------------------------------------------- inotify
+    def _watch(self, abs_dir: str):
+        if self._inotify is None or self._watch_limit_hit:
+            return
+        try:
+            self._watches[self._inotify.add_watch(abs_dir)] = abs_dir
+        except OSError as exc:
+            if exc.errno == 28:  # ENOSPC：超過 max_user_watches，其餘交給 reconcile
+                self._watch_limit_hit = True
+                print("inotify watch limit reached; relying on periodic reconcile")
+
+    def _start_inotify(self, conn: sqlite3.Connection):
+        if not self.use_inotify:
+            return
+        try:
+            self._inotify = _Inotify()
+        except (OSError, AttributeError) as exc:
+            print(f"inotify unavailable, using periodic reconcile only: {exc}")
+            return
+        for root in self.roots:
+            for path in self.iter_subtree_dirs(root):
+                self._watch(path)
+
+    def _collect_events(self, events, dirty: Set[str]) -> bool:
+        """把事件轉成需要重新列出的資料夾；佇列溢位時回傳 True（需要完整 reconcile）。"""
+        overflow = False
+        for wd, mask, _ in events:
+            if mask & _Inotify.IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            abs_dir = self._watches.get(wd)
+            if abs_dir is None:
+                continue
+            if mask & _Inotify.IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if mask & (_Inotify.IN_DELETE_SELF | _Inotify.IN_MOVE_SELF):
+                dirty.add(os.path.dirname(abs_dir))
+            else:
+                dirty.add(abs_dir)
+        return overflow
+
+    # ------------------------------------------------------------------- loop
+    def _run(self):
+        conn = self._connect()
+        try:
+            conn.executescript(SCHEMA)
+            built = {row[0] for row in conn.execute("SELECT path FROM roots")}
+            for stale_root in built - set(self.roots):
+                self._delete_subtree(conn, stale_root)
+                conn.execute("DELETE FROM roots WHERE path = ?", (stale_root,))
+            conn.commit()
+
+            for root in self.roots:
+                if root not in built:
+                    self._build_root(conn, root)
+            self._start_inotify(conn)
+            self._ready.set()
+            # 先補上建立索引期間（或沿用上次索引時停機期間）的變動
+            next_reconcile = time.monotonic()
+
+            dirty: Set[str] = set()
+            while not self._stop.is_set():
+                if self._inotify is not None:
+                    events = self._inotify.read(self.debounce)
+                    if self._collect_events(events, dirty):
+                        next_reconcile = time.monotonic()
+                    if dirty and not events:
+                        pending, dirty = dirty, set()
+                        self._rescan_dirs(conn, pending)
+                else:
+                    self._stop.wait(1.0)
+
+                if self.reconcile_interval > 0 and time.monotonic() >= next_reconcile:
+                    self._reconcile(conn)
+                    next_reconcile = time.monotonic() + self.reconcile_interval
+        except sqlite3.Error as exc:
+            print(f"Local catalog stopped: {exc}")
+        finally:
+            if self._inotify is not None:
+                self._inotify.close()
+            conn.close()
@@ -0,0 +1,238 @@
+"""
+只讀檔頭取得圖片尺寸（PNG / JPEG / GIF / WebP），不解碼像素、不需要 Pillow。
+
+每個檔案通常只讀幾百位元組：PNG 讀 IHDR、GIF 讀 logical screen descriptor、
+WebP 讀第一個 VP8 / VP8L / VP8X chunk、JPEG 沿著 segment 標頭 seek 到 SOF
+（途中只讀 APP1 Exif 的 IFD0 取得 Orientation，轉向 90° 的照片會交換寬高）。
+
+結果依 (路徑, mtime) 快取在記憶體（LRU），未命中的檔案在 thread pool 中並行讀取，
+列表頁因此可以在任何像素載入前就知道每張圖的寬高與方向。
+"""
+import os
+import struct
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from typing import BinaryIO, Dict, Iterable, NamedTuple, Optional, Tuple
+
+
+HEADER_BYTES = 32
+MAX_JPEG_SEGMENTS = 64
+
+# JPEG SOF 標記（C4 = DHT、C8 = JPG 擴充、CC = DAC 不是 SOF）
+_JPEG_SOF_MARKERS = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+_JPEG_STANDALONE_MARKERS = frozenset(range(0xD0, 0xDA)) | {0x01}
+
+
+class ImageSize(NamedTuple):
+    width: int        # 已套用 Exif Orientation 的顯示寬度
+    height: int
+    orientation: str  # "landscape" / "portrait" / "square"
+
+
+def _orientation_label(width: int, height: int) -> str:
+    if width > height:
+        return "landscape"
+    if height > width:
+        return "portrait"
+    return "square"
+
+
+def make_size(width: int, height: int) -> Optional[ImageSize]:
+    if width <= 0 or height <= 0:
+        return None
+    return ImageSize(width, height, _orientation_label(width, height))
+
+
+def _read_exif_orientation(fh: BinaryIO, segment_start: int, segment_length: int) -> Optional[int]:
+    """讀取 APP1 Exif 區段 IFD0 中的 Orientation（0x0112）；不是 Exif 或讀不到時回傳 None。"""
+    header = fh.read(14)
+    if len(header) < 14 or header[:6] != b"Exif\x00\x00":
+        return None
+    tiff_start = segment_start + 6
+    byte_order = header[6:8]
+    if byte_order == b"II":
+        endian = "<"
+    elif byte_order == b"MM":
+        endian = ">"
+    else:
+        return None
+    ifd_offset = struct.unpack(f"{endian}I", header[10:14])[0]
+    if ifd_offset < 8 or 6 + ifd_offset + 2 > segment_length:
+        return None
+
+    fh.seek(tiff_start + ifd_offset)
+    raw_count = fh.read(2)
+    if len(raw_count) < 2:
+        return None
+    count = min(struct.unpack(f"{endian}H", raw_count)[0], (segment_length - 6 - ifd_offset - 2) // 12)
+    entries = fh.read(count * 12)
+    for index in range(len(entries) // 12):
+        tag, value_type = struct.unpack_from(f"{endian}HH", entries, index * 12)
+        if tag == 0x0112 and value_type == 3:  # SHORT
+            return struct.unpack_from(f"{endian}H", entries, index * 12 + 8)[0]
+    return None
+
+
+def _jpeg_size(fh: BinaryIO) -> Optional[Tuple[int, int]]:
+    fh.seek(2)
+    orientation = None
+    for _ in range(MAX_JPEG_SEGMENTS):
+        marker = fh.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            return None
+        code = marker[1]
+        while code == 0xFF:  # 填充位元組
+            fill = fh.read(1)
+            if not fill:
+                return None
+            code = fill[0]
+        if code in _JPEG_STANDALONE_MARKERS:
+            continue
+        if code == 0xD9 or code == 0xDA:  # EOI / SOS 之前都沒有 SOF
+            return None
+
+        raw_length = fh.read(2)
+        if len(raw_length) < 2:
+            return None
+        length = struct.unpack(">H", raw_length)[0]
+        if length < 2:
+            return None
+        segment_start = fh.tell()
+
+        if code in _JPEG_SOF_MARKERS:
+            frame = fh.read(5)
+            if len(frame) < 5:
+                return None
+            height, width = struct.unpack(">HH", frame[1:5])
+            if orientation in (5, 6, 7, 8):
+                width, height = height, width
+            return width, height
+        if code == 0xE1 and orientation is None:
+            orientation = _read_exif_orientation(fh, segment_start, length - 2)
+        fh.seek(segment_start + length - 2)
+    return None
+
+
+def _webp_size(header: bytes) -> Optional[Tuple[int, int]]:
+    chunk = header[12:16]
+    if chunk == b"VP8 ":
+        if header[23:26] != b"\x9d\x01\x2a":
+            return None
+        width, height = struct.unpack("<HH", header[26:30])
+        return width & 0x3FFF, height & 0x3FFF
+    if chunk == b"VP8L":
+        if header[20] != 0x2F:
+            return None
+        bits = struct.unpack("<I", header[21:25])[0]
+        return (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1
+    if chunk == b"VP8X":
+        width = int.from_bytes(header[24:27], "little") + 1
+        height = int.from_bytes(header[27:30], "little") + 1
+        return width, height
+    return None
+
+
+def read_image_size(path: str) -> Optional[ImageSize]:
+    """
+    只讀檔頭取得圖片的顯示尺寸。
+
+    Returns:
+        ImageSize；格式不支援或檔頭損毀時為 None。
+
+    Raises:
+        OSError: 檔案無法讀取。
+    """
+    with open(path, "rb") as fh:
+        header = fh.read(HEADER_BYTES)
+        size = None
+        if header.startswith(b"\x89PNG\r\n\x1a\n") and header[12:16] == b"IHDR":
+            size = struct.unpack(">II", header[16:24])
+        elif header[:6] in (b"GIF87a", b"GIF89a"):
+            size = struct.unpack("<HH", header[6:10])
+        elif header[:4] == b"RIFF" and header[8:12] == b"WEBP" and len(header) >= 30:
+            size = _webp_size(header)
+        elif header[:2] == b"\xff\xd8":
+            size = _jpeg_size(fh)
+    return make_size(*size) if size else None
+
+
+class ImageSizeCache:
+    """
+    Args:
+        max_workers: 讀取檔頭的 thread 數（I/O 為主，不需要 process）。
+        maxsize: 記憶體中最多記住的檔案數。
+        timeout: 一次批次查詢最多等待的秒數，逾時的檔案這次回傳 None。
+    """
+
+    def __init__(self, max_workers: int = 8, maxsize: int = 200_000, timeout: float = 10.0):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, Optional[ImageSize]]]" = OrderedDict()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="image-size")
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def invalidate(self, path: Optional[str] = None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+    @staticmethod
+    def _read(path: str) -> Optional[ImageSize]:
+        try:
+            return read_image_size(path)
+        except (OSError, ValueError, struct.error, IndexError):
+            return None
+
+    def get_many(self, files: Iterable[Tuple[str, Optional[float]]]) -> Dict[str, Optional[ImageSize]]:
+        """
+        批次取得圖片尺寸。
+
+        Args:
+            files: (絕對路徑, mtime)；mtime 已知時（例如來自資料夾列表）不需要 stat，
+                   為 None 時先 stat 取得 mtime 再比對快取。
+
+        Returns:
+            {路徑: ImageSize 或 None}
+        """
+        results: Dict[str, Optional[ImageSize]] = {}
+        keyed = []
+        for path, mtime in files:
+            if mtime is None:
+                try:
+                    mtime = os.stat(path).st_mtime
+                except OSError:
+                    results[path] = None
+                    continue
+            keyed.append((path, mtime))
+
+        missing = []
+        with self._lock:
+            for path, mtime in keyed:
+                cached = self._entries.get(path)
+                if cached is not None and cached[0] == mtime:
+                    self._entries.move_to_end(path)
+                    results[path] = cached[1]
+                else:
+                    missing.append((path, mtime))
+        if not missing:
+            return results
+
+        futures = {self._executor.submit(self._read, path): (path, mtime) for path, mtime in missing}
+        done, _ = wait(futures, timeout=self.timeout)
+        with self._lock:
+            for future, (path, mtime) in futures.items():
+                if future not in done:
+                    results[path] = None
+                    continue
+                results[path] = future.result()
+                self._entries[path] = (mtime, results[path])
+                self._entries.move_to_end(path)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return results
@@ -0,0 +1,280 @@
+"""
+找出內容完全相同的檔案（跨本地收藏與 Eagle 資源庫）。
+
+逐層縮小需要讀取的範圍，避免每次都讀完整個資料庫：
+1. 依檔案大小分組，大小獨一無二的檔案不可能重複，完全不讀；
+2. 同大小的檔案以 mmap 讀取開頭與結尾各 partial_bytes，計算 BLAKE2 部分雜湊；
+3. 部分雜湊也相同的檔案才以 mmap 讀完整個檔案計算完整雜湊。
+雜湊在 process pool 中計算，結果連同 (大小, mtime) 存在 SQLite，之後只重算新增或修改過的檔案。
+"""
+import hashlib
+import mmap
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    source TEXT NOT NULL,
+    ident TEXT NOT NULL,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    partial TEXT,       -- 開頭 + 結尾的雜湊；NULL 表示尚未計算（或不需要）
+    full TEXT,          -- 完整雜湊
+    PRIMARY KEY (source, ident)
+);
+CREATE INDEX IF NOT EXISTS files_size ON files(size, partial, full);
+"""
+
+FULL_HASH_BLOCK = 8 * 1024 * 1024
+HASH_FAILED = ""   # 讀取失敗的檔案記為空字串，檔案改變前不再重試
+
+# 來源函式逐一產生 (識別碼, 檔案路徑)；來源暫時無法使用時應拋出例外
+SourceFunc = Callable[[], Iterable[Tuple[str, str]]]
+
+
+class DuplicateFile(NamedTuple):
+    source: str
+    ident: str
+    path: str
+
+
+class DuplicateGroup(NamedTuple):
+    size: int
+    digest: str
+    files: Tuple[DuplicateFile, ...]
+
+    @property
+    def wasted_bytes(self) -> int:
+        return self.size * (len(self.files) - 1)
+
+
+def _advise_sequential(mapped: mmap.mmap):
+    if hasattr(mapped, "madvise") and hasattr(mmap, "MADV_SEQUENTIAL"):
+        mapped.madvise(mmap.MADV_SEQUENTIAL)
+
+
+def partial_hash(path: str, size: int, partial_bytes: int) -> str:
+    """開頭與結尾各 partial_bytes 的 BLAKE2 雜湊；檔案不大於兩倍 partial_bytes 時等於完整雜湊。"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        with memoryview(mapped) as view:
+            if len(view) <= partial_bytes * 2:
+                digest.update(view)
+            else:
+                digest.update(view[:partial_bytes])
+                digest.update(view[len(view) - partial_bytes:])
+    return digest.hexdigest()
+
+
+def full_hash(path: str) -> str:
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        _advise_sequential(mapped)
+        with memoryview(mapped) as view:
+            for offset in range(0, len(view), FULL_HASH_BLOCK):
+                digest.update(view[offset:offset + FULL_HASH_BLOCK])
+    return digest.hexdigest()
+
+
+def _hash_job(job: Tuple[str, str, str, str, int, int]) -> Tuple[str, str, str, str]:
+    """在 worker process 中執行：回傳 (source, ident, kind, 雜湊或 HASH_FAILED)。"""
+    kind, source, ident, path, size, partial_bytes = job
+    try:
+        if kind == "partial":
+            return source, ident, kind, partial_hash(path, size, partial_bytes)
+        return source, ident, kind, full_hash(path)
+    except (OSError, ValueError):
+        return source, ident, kind, HASH_FAILED
+
+
+class DuplicateFinder:
+    """
+    Args:
+        db_path: 結果資料庫（SQLite）路徑。
+        sources: {來源名稱: 來源函式}。
+        max_workers: 計算雜湊的 process 數。
+        partial_bytes: 部分雜湊讀取開頭與結尾的位元組數。
+        rescan_interval: 重新列出來源的間隔（秒），0 表示只在啟動時執行。
+    """
+
+    def __init__(self,
+                 db_path: str,
+                 sources: Dict[str, SourceFunc],
+                 max_workers: int = 2,
+                 partial_bytes: int = 64 * 1024,
+                 rescan_interval: float = 6 * 3600):
+        self.db_path = db_path
+        self.sources = dict(sources)
+        self.max_workers = max_workers
+        self.partial_bytes = partial_bytes
+        self.rescan_interval = rescan_interval
+
+        self._groups: Optional[List[DuplicateGroup]] = None
+        self._status: Dict = {"scanning": False, "last_scan": None, "files": 0, "hashed": 0}
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------- lifecycle
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="duplicate-finder", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def refresh(self):
+        """要求背景 thread 盡快重新掃描。"""
+        self._wakeup.set()
+
+    # ------------------------------------------------------------------ query
+    @property
+    def ready(self) -> bool:
+        return self._groups is not None
+
+    def groups(self) -> List[DuplicateGroup]:
+        """目前的重複群組，浪費空間最多的在前；尚未完成第一次載入時為空列表。"""
+        return self._groups or []
+
+    def status(self) -> Dict:
+        return dict(self._status)
+
+    # ------------------------------------------------------------------- scan
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _load_groups(self, conn: sqlite3.Connection):
+        rows = conn.execute(
+            "SELECT size, full, source, ident, path FROM files "
+            "WHERE full IS NOT NULL AND full != ? AND (size, full) IN ("
+            "    SELECT size, full FROM files WHERE full IS NOT NULL AND full != ? "
+            "    GROUP BY size, full HAVING COUNT(*) > 1"
+            ") ORDER BY size, full, source, path",
+            (HASH_FAILED, HASH_FAILED)
+        ).fetchall()
+
+        groups: Dict[Tuple[int, str], List[DuplicateFile]] = {}
+        for size, digest, source, ident, path in rows:
+            groups.setdefault((size, digest), []).append(DuplicateFile(source, ident, path))
+        result = [DuplicateGroup(size, digest, tuple(files)) for (size, digest), files in groups.items()]
+        result.sort(key=lambda group: group.wasted_bytes, reverse=True)
+        self._groups = result
+
+    def _sync_source(self, conn: sqlite3.Connection, source: str) -> int:
+        """列出來源並更新檔案表（大小或 mtime 改變的檔案清除雜湊）；回傳檔案數，來源無法使用時為 -1。"""
+        try:
+            candidates = list(self.sources[source]())
+        except Exception as exc:
+            print(f"Duplicate finder source '{source}' unavailable: {exc}")
+            return -1
+
+        known = {
+            ident: (size, mtime)
+            for ident, size, mtime in conn.execute("SELECT ident, size, mtime FROM files WHERE source = ?", (source,))
+        }
+        seen, changed = set(), []
+        for ident, path in candidates:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            seen.add(ident)
+            if known.get(ident) != (stat.st_size, stat.st_mtime):
+                changed.append((source, ident, path, stat.st_size, stat.st_mtime))
+
+        conn.executemany("DELETE FROM files WHERE source = ? AND ident = ?",
+                         [(source, ident) for ident in known.keys() - seen])
+        conn.executemany("INSERT OR REPLACE INTO files (source, ident, path, size, mtime) VALUES (?, ?, ?, ?, ?)",
+                         changed)
+        conn.commit()
+        return len(seen)
+
+    def _hash_pending(self, conn: sqlite3.Connection, executor: ProcessPoolExecutor, kind: str) -> int:
+        if kind == "partial":
+            # 與其他檔案同大小、尚未計算部分雜湊的檔案
+            rows = conn.execute(
+                "SELECT source, ident, path, size FROM files WHERE partial IS NULL AND size > 0 AND size IN ("
+                "    SELECT size FROM files WHERE size > 0 GROUP BY size HAVING COUNT(*) > 1)"
+            ).fetchall()
+        else:
+            # 大小與部分雜湊都與其他檔案相同、尚未計算完整雜湊的檔案
+            rows = conn.execute(
+                "SELECT source, ident, path, size FROM files WHERE full IS NULL AND partial IS NOT NULL "
+                "AND partial != ? AND (size, partial) IN ("
+                "    SELECT size, partial FROM files WHERE partial IS NOT NULL AND partial != ? "
+                "    GROUP BY size, partial HAVING COUNT(*) > 1)",
+                (HASH_FAILED, HASH_FAILED)
+            ).fetchall()
+        if not rows:
+            return 0
+
+        jobs = [(kind, source, ident, path, size, self.partial_bytes) for source, ident, path, size in rows]
+        small = {(source, ident) for source, ident, _, size in rows if size <= self.partial_bytes * 2}
+        pending = []
+        for source, ident, job_kind, digest in executor.map(_hash_job, jobs, chunksize=16):
+            if job_kind == "partial":
+                # 小檔案的部分雜湊已涵蓋整個檔案，直接作為完整雜湊
+                full = digest if (source, ident) in small else None
+                pending.append(("UPDATE files SET partial = ?, full = ? WHERE source = ? AND ident = ?",
+                                (digest, full, source, ident)))
+            else:
+                pending.append(("UPDATE files SET full = ? WHERE source = ? AND ident = ?", (digest, source, ident)))
+            if len(pending) >= 256 or self._stop.is_set():
+                self._flush(conn, pending)
+                if self._stop.is_set():
+                    break
+        self._flush(conn, pending)
+        return len(rows)
+
+    @staticmethod
+    def _flush(conn: sqlite3.Connection, pending: List):
+        for sql, params in pending:
+            conn.execute(sql, params)
+        conn.commit()
+        pending.clear()
+
+    def _scan(self, conn: sqlite3.Connection, executor: ProcessPoolExecutor):
+        started = time.time()
+        self._status["scanning"] = True
+        try:
+            files = 0
+            for source in sorted(self.sources):
+                count = self._sync_source(conn, source)
+                files += max(count, 0)
+            hashed = self._hash_pending(conn, executor, "partial")
+            hashed += self._hash_pending(conn, executor, "full")
+            self._load_groups(conn)
+            self._status.update(files=files, hashed=hashed, last_scan=time.time())
+            if hashed:
+                print(f"Duplicate scan hashed {hashed} files in {time.time() - started:.1f}s")
+        finally:
+            self._status["scanning"] = False
+
+    def _run(self):
+        conn = self._connect()
+        executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        try:
+            conn.executescript(SCHEMA)
+            self._load_groups(conn)   # 先提供上次的結果
+            while not self._stop.is_set():
+                self._scan(conn, executor)
+                self._wakeup.wait(self.rescan_interval if self.rescan_interval > 0 else None)
+                self._wakeup.clear()
+        except sqlite3.Error as exc:
+            print(f"Duplicate finder stopped: {exc}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            conn.close()
@@ -0,0 +1,156 @@
+"""
+本地資料夾封面（遞迴找到的第一個圖片 / 影片）的持久化快取。
+
+封面以 {資料夾絕對路徑: {"mtime", "checked_at", "cover": 檔案絕對路徑或 None}} 存成 JSON。
+請求端只做查表（最多一次 stat 取資料夾 mtime），查不到或已過期的資料夾交給
+背景 thread pool 以 os.walk 尋找；找不到媒體的資料夾也會記錄（negative cache），
+在 negative_ttl 內不再重新掃描。
+"""
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional
+
+
+class LocalFolderCoverCache:
+
+    def __init__(self,
+                 media_extensions: Iterable[str],
+                 cache_path: Optional[str] = None,
+                 max_workers: int = 2,
+                 max_pending: int = 1024,
+                 max_walk_dirs: int = 5000,
+                 negative_ttl: float = 600.0,
+                 max_age: float = 24 * 3600,
+                 save_interval: float = 5.0):
+        self.media_extensions = frozenset(ext.lower().lstrip(".") for ext in media_extensions)
+        self.cache_path = cache_path
+        self.max_pending = max_pending
+        self.max_walk_dirs = max_walk_dirs
+        self.negative_ttl = negative_ttl
+        self.max_age = max_age
+        self.save_interval = save_interval
+
+        self._lock = threading.Lock()
+        self._covers: Dict[str, Dict] = {}
+        self._loaded = False
+        self._dirty = False
+        self._saved_at = 0.0
+        self._pending = set()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="folder-cover")
+
+    # ------------------------------------------------------------ persistence
+    def _load(self):
+        self._loaded = True
+        if not self.cache_path or not os.path.isfile(self.cache_path):
+            return
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as fh:
+                payload = json.load(fh)
+        except (OSError, ValueError):
+            return
+        self._covers = payload.get("covers") or {}
+
+    def _save(self):
+        if not self.cache_path:
+            return
+        with self._lock:
+            snapshot = dict(self._covers)
+            self._dirty = False
+            self._saved_at = time.monotonic()
+        os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as fh:
+                json.dump({"covers": snapshot}, fh)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as exc:
+            print(f"Failed to persist local folder covers: {exc}")
+
+    def invalidate(self, abs_dir: Optional[str] = None):
+        with self._lock:
+            if abs_dir is None:
+                self._covers = {}
+            else:
+                self._covers.pop(os.path.abspath(abs_dir), None)
+            self._dirty = True
+
+    # ----------------------------------------------------------------- lookup
+    def lookup(self, abs_dir: str, mtime: Optional[float] = None) -> Optional[str]:
+        """
+        回傳資料夾的封面檔案絕對路徑；沒有媒體或尚未掃描完成時回傳 None。
+
+        Args:
+            abs_dir: 資料夾路徑。
+            mtime: 已知的資料夾 mtime（例如來自 DirEntry.stat()），省略時 stat 一次。
+        """
+        abs_dir = os.path.abspath(abs_dir)
+        if mtime is None:
+            try:
+                mtime = os.stat(abs_dir).st_mtime
+            except OSError:
+                return None
+
+        with self._lock:
+            if not self._loaded:
+                self._load()
+            entry = self._covers.get(abs_dir)
+
+        cover = entry.get("cover") if entry else None
+        if cover and not os.path.isfile(cover):
+            # 封面在較深的子資料夾被刪除或搬走時，頂層資料夾的 mtime 不會改變
+            self._schedule(abs_dir, mtime)
+            return None
+
+        if entry is not None and entry.get("mtime") == mtime:
+            ttl = self.max_age if cover else self.negative_ttl
+            if time.time() - entry.get("checked_at", 0) <= ttl:
+                return cover
+
+        self._schedule(abs_dir, mtime)
+        # 過期但仍有舊封面時先沿用，背景更新後下一次就會是新的
+        return cover
+
+    def _schedule(self, abs_dir: str, mtime: float):
+        with self._lock:
+            if abs_dir in self._pending or len(self._pending) >= self.max_pending:
+                return
+            self._pending.add(abs_dir)
+        self._executor.submit(self._scan, abs_dir, mtime)
+
+    # ------------------------------------------------------------------- walk
+    def _find_first_media(self, abs_dir: str) -> Optional[str]:
+        """與原本 os.walk 的順序一致：由上而下，每層依檔名排序取第一個媒體檔。"""
+        visited = 0
+        for root, dirs, files in os.walk(abs_dir):
+            dirs.sort()
+            for file_name in sorted(files):
+                if os.path.splitext(file_name)[1].lower().lstrip(".") in self.media_extensions:
+                    return os.path.join(root, file_name)
+            visited += 1
+            if visited >= self.max_walk_dirs:
+                break
+        return None
+
+    def _scan(self, abs_dir: str, mtime: float):
+        try:
+            cover = self._find_first_media(abs_dir)
+        except OSError:
+            cover = None
+        finally:
+            with self._lock:
+                self._pending.discard(abs_dir)
+
+        with self._lock:
+            self._covers[abs_dir] = {"mtime": mtime, "checked_at": time.time(), "cover": cover}
+            self._dirty = True
+            should_save = not self._pending or time.monotonic() - self._saved_at >= self.save_interval
+        if should_save:
+            self._save()
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+        if self._dirty:
+            self._save()
@@ -0,0 +1,272 @@
+"""
+以 os.scandir 列出本地資料夾，並依資料夾 mtime 快取結果。
+
+DirEntry 已帶有檔案類型（多數平台不需額外 syscall），stat 結果也只取一次，
+整理成精簡的 LocalEntry 後，資料夾頁與「相似項目」都讀同一份列表；
+影片縮圖也直接比對列表內的同層檔名，不再逐一 stat 候選路徑。
+
+大資料夾以 keyset cursor 分頁：cursor 是上一頁最後一筆的排序鍵，
+下一頁由排序後的列表二分搜尋起點，資料夾在兩次請求之間新增 / 刪除檔案也不會跳過或重複項目。
+"""
+import base64
+import json
+import os
+import re
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from typing import Callable, Dict, FrozenSet, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+
+class LocalEntry(NamedTuple):
+    name: str
+    path: str                   # 絕對路徑
+    is_dir: bool
+    media_type: Optional[str]   # "image" / "video"；資料夾與其他檔案為 None
+    ext: Optional[str]          # 小寫、不含 "."
+    size: int
+    mtime: float
+
+
+def classify(name: str, image_extensions: FrozenSet[str], video_extensions: FrozenSet[str]) -> Tuple[Optional[str], Optional[str]]:
+    """依副檔名回傳 (ext, media_type)；ext 為小寫、不含 "."。"""
+    ext = os.path.splitext(name)[1].lower().lstrip(".") or None
+    if ext in image_extensions:
+        return ext, "image"
+    if ext in video_extensions:
+        return ext, "video"
+    return ext, None
+
+
+_DIGITS = re.compile(r"\d+")
+NATURAL_DIGITS = 20
+
+
+def natural_key(name: str) -> str:
+    """
+    自然排序鍵（"img2" 排在 "img10" 前面）：數字補零到固定寬度，仍是單一字串，
+    可以直接比較、也能以 JSON 放進 cursor。
+    """
+    return _DIGITS.sub(lambda match: match.group().lstrip("0").rjust(NATURAL_DIGITS, "0"), name.casefold())
+
+
+# 排序鍵 (entry, extra) -> tuple：最後以檔名收尾，確保每筆的鍵唯一（cursor 才能精確定位）；
+# 值都必須能以 JSON 來回轉換。extra 是 SORT_EXTRAS 的排序才有的額外資料（其餘為 None）。
+SORT_KEYS: Dict[str, Callable[[LocalEntry, Optional[float]], tuple]] = {
+    "name": lambda entry, extra: (natural_key(entry.name), entry.name),
+    "mtime": lambda entry, extra: (entry.mtime, entry.name),
+    "size": lambda entry, extra: (entry.size, entry.name),
+    "created": lambda entry, extra: (entry.mtime if extra is None else extra, entry.name),
+    "resolution": lambda entry, extra: (extra or 0, natural_key(entry.name), entry.name),
+}
+
+# 需要 LocalEntry 以外資料的排序：created（建立時間）、resolution（像素數，讀檔頭），
+# 由呼叫端以 extras 函式批次提供 {路徑: 值}
+SORT_EXTRAS = frozenset({"created", "resolution"})
+
+ExtrasFunc = Callable[[Sequence[LocalEntry]], Dict[str, float]]
+
+
+def encode_cursor(key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key, ensure_ascii=False).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    """
+    Raises:
+        ValueError: cursor 格式不正確。
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        key = json.loads(raw.decode("utf-8"))
+    except (ValueError, UnicodeDecodeError) as exc:
+        raise ValueError(f"Invalid cursor: {cursor}") from exc
+    if not isinstance(key, list) or len(key) < 2 or not isinstance(key[0], bool):
+        raise ValueError(f"Invalid cursor: {cursor}")
+    return tuple(key)
+
+
+class DirectoryListing:
+    """一次 scandir 的結果；同層檔案比對（影片縮圖）的結果也記在這裡，資料夾變動時一起作廢。"""
+
+    __slots__ = ("path", "mtime_ns", "entries", "names", "_thumbnail_extensions", "_thumbnails", "_sorted", "_lock")
+
+    def __init__(self, path: str, mtime_ns: int, entries: Tuple[LocalEntry, ...],
+                 names: FrozenSet[str], thumbnail_extensions: Iterable[str] = ()):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.entries = entries      # 不含隱藏檔，依名稱排序
+        self.names = names          # 資料夾內所有檔名（含非媒體檔）
+        self._thumbnail_extensions = sorted(thumbnail_extensions)
+        self._thumbnails: Dict[str, Optional[str]] = {}
+        # sort -> ((資料夾, 鍵), (媒體檔, 鍵))，各自依鍵遞增排序
+        self._sorted: Dict[str, Tuple[Tuple[List[LocalEntry], List[tuple]], ...]] = {}
+        self._lock = threading.Lock()
+
+    def find_video_thumbnail(self, video_name: str) -> Optional[str]:
+        """
+        在同層檔名中尋找影片縮圖（{檔名}_thumbnail.{ext} 或 {檔名}.{ext}），回傳絕對路徑。
+
+        找不到的結果也會記住（negative cache），直到資料夾內容改變、列表重新建立。
+        """
+        with self._lock:
+            if video_name in self._thumbnails:
+                return self._thumbnails[video_name]
+
+        stem = os.path.splitext(video_name)[0]
+        found = None
+        for ext in self._thumbnail_extensions:
+            for candidate in (f"{stem}_thumbnail.{ext}", f"{stem}.{ext}",
+                              f"{stem}_thumbnail.{ext.upper()}", f"{stem}.{ext.upper()}"):
+                if candidate in self.names:
+                    found = os.path.join(self.path, candidate)
+                    break
+            if found:
+                break
+
+        with self._lock:
+            self._thumbnails[video_name] = found
+        return found
+
+    def _sorted_groups(self, sort: str, extras: Optional[ExtrasFunc] = None):
+        groups = self._sorted.get(sort)
+        if groups is None:
+            key_func = SORT_KEYS[sort]
+            listed = [entry for entry in self.entries if entry.is_dir or entry.media_type is not None]
+            values = extras(listed) if extras is not None and sort in SORT_EXTRAS else {}
+            groups = []
+            for is_dir in (True, False):
+                keyed = sorted(
+                    (key_func(entry, values.get(entry.path)), entry) for entry in listed if entry.is_dir == is_dir
+                )
+                groups.append(([entry for _, entry in keyed], [key for key, _ in keyed]))
+            groups = tuple(groups)
+            with self._lock:
+                self._sorted[sort] = groups
+        return groups
+
+    def page(self, sort: str = "name", descending: bool = False,
+             after: Optional[tuple] = None, limit: Optional[int] = None,
+             extras: Optional[ExtrasFunc] = None) -> Tuple[List[LocalEntry], Optional[tuple]]:
+        """
+        依排序取一頁資料夾與媒體檔（資料夾一律在前，其他檔案略過）。
+
+        排序鍵只在第一次用到該排序時計算並記在列表上，之後每一頁只是二分搜尋加切片。
+
+        Args:
+            sort: SORT_KEYS 中的排序方式。
+            descending: 是否遞減排序。
+            after: 上一頁回傳的 cursor 鍵；None 表示第一頁。
+            limit: 每頁數量；None 表示取到最後。
+            extras: SORT_EXTRAS 的排序所需的額外資料（{路徑: 值}），省略時以 mtime / 0 代替。
+
+        Returns:
+            (entries, next_key)：next_key 為下一頁的 cursor 鍵，已是最後一頁時為 None。
+
+        Raises:
+            KeyError: 不支援的 sort。
+            TypeError: after 的鍵與 sort 不相容。
+        """
+        groups = self._sorted_groups(sort, extras)
+        starts = [0, 0]
+        first_group = 0
+        if after is not None:
+            first_group = 0 if after[0] else 1
+            keys = groups[first_group][1]
+            key = tuple(after[1:])
+            starts[first_group] = len(keys) - bisect_left(keys, key) if descending else bisect_right(keys, key)
+
+        results: List[LocalEntry] = []
+        last_key = None
+        has_more = False
+        for index in range(first_group, 2):
+            entries, keys = groups[index]
+            total = len(entries)
+            for position in range(starts[index], total):
+                if limit is not None and len(results) >= limit:
+                    has_more = True
+                    break
+                offset = total - 1 - position if descending else position
+                results.append(entries[offset])
+                last_key = keys[offset]
+            if has_more:
+                break
+
+        if not has_more or not results:
+            return results, None
+        return results, (results[-1].is_dir,) + last_key
+
+
+class DirectoryListingCache:
+    """
+    {資料夾絕對路徑: DirectoryListing} 的 LRU 快取。
+
+    每次讀取只 stat 資料夾本身一次；mtime 改變（新增 / 刪除 / 改名）或超過 max_age
+    （檔案內容被修改時資料夾 mtime 不變）才重新 scandir。
+    """
+
+    def __init__(self,
+                 image_extensions: Iterable[str],
+                 video_extensions: Iterable[str],
+                 maxsize: int = 256,
+                 max_age: float = 300.0):
+        self.image_extensions = frozenset(image_extensions)
+        self.video_extensions = frozenset(video_extensions)
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, Tuple[float, DirectoryListing]]" = OrderedDict()
+
+    def get(self, abs_dir: str) -> DirectoryListing:
+        """
+        取得資料夾列表；資料夾不存在或不是資料夾時拋出 OSError（FileNotFoundError 等）。
+        """
+        abs_dir = os.path.abspath(abs_dir)
+        mtime_ns = os.stat(abs_dir).st_mtime_ns
+
+        with self._lock:
+            cached = self._entries.get(abs_dir)
+            if cached is not None:
+                loaded_at, listing = cached
+                if listing.mtime_ns == mtime_ns and time.monotonic() - loaded_at <= self.max_age:
+                    self._entries.move_to_end(abs_dir)
+                    return listing
+
+        listing = self._scan(abs_dir, mtime_ns)
+        with self._lock:
+            self._entries[abs_dir] = (time.monotonic(), listing)
+            self._entries.move_to_end(abs_dir)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+        return listing
+
+    def _scan(self, abs_dir: str, mtime_ns: int) -> DirectoryListing:
+        entries, names = [], []
+        with os.scandir(abs_dir) as iterator:
+            for dir_entry in iterator:
+                name = dir_entry.name
+                names.append(name)
+                if name.startswith("."):
+                    continue
+                try:
+                    is_dir = dir_entry.is_dir()
+                    stat = dir_entry.stat()
+                except OSError:
+                    continue
+
+                if is_dir:
+                    ext, media_type = None, None
+                else:
+                    ext, media_type = classify(name, self.image_extensions, self.video_extensions)
+                entries.append(LocalEntry(name, dir_entry.path, is_dir, media_type, ext, stat.st_size, stat.st_mtime))
+
+        entries.sort(key=lambda entry: entry.name)
+        return DirectoryListing(abs_dir, mtime_ns, tuple(entries), frozenset(names), self.image_extensions)
+
+    def invalidate(self, abs_dir: Optional[str] = None):
+        with self._lock:
+            if abs_dir is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(abs_dir), None)
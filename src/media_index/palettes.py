@@ -0,0 +1,360 @@
+"""
+主色調（color palette）索引與「接近某個顏色」的搜尋。
+
+- 本地圖片：在 process pool 中把圖片縮到約 64x64，轉成 CIELAB 後以向量化的 NumPy k-means 找出主色；
+- Eagle 項目：直接採用 Eagle metadata 內的 palettes，沒有時才以縮圖計算。
+結果（RGB + 佔比）存在 SQLite，之後只重算新增或修改過的檔案。
+
+查詢時所有調色盤放在 (N, K, 3) 的 Lab 陣列中，一次算出每個項目最接近目標色的距離（ΔE76），
+十萬張圖片的查詢只需數毫秒。
+"""
+import json
+import os
+import sqlite3
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from PIL import Image
+except ImportError:  # pragma: no cover - Pillow 未安裝時只收錄 Eagle 自帶的調色盤
+    Image = None
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS palettes (
+    source TEXT NOT NULL,
+    ident TEXT NOT NULL,
+    path TEXT NOT NULL,
+    mtime REAL,             -- 計算調色盤的圖檔 mtime / 大小；採用外部調色盤時為 NULL
+    size INTEGER,
+    palette TEXT,           -- JSON：[[r, g, b, 佔比 0-100], ...]；無法計算時為 NULL
+    PRIMARY KEY (source, ident)
+);
+"""
+
+# 來源函式逐一產生 (識別碼, 項目路徑, 計算用的圖檔路徑或 None, 現成的調色盤或 None)；
+# 來源暫時無法使用時應拋出例外
+SourceFunc = Callable[[], Iterable[Tuple[str, str, Optional[str], Optional[List[Tuple[int, int, int, int]]]]]]
+
+
+class ColorMatch(NamedTuple):
+    source: str
+    ident: str
+    path: str
+    distance: float                       # 與目標色的 ΔE76 距離
+    ratio: int                            # 最接近的那個主色所佔的比例（0-100）
+    palette: List[Tuple[int, int, int, int]]
+
+
+def rgb_to_lab(rgb: np.ndarray) -> np.ndarray:
+    """sRGB（0-255，最後一維為 3）→ CIELAB（D65）。"""
+    srgb = np.asarray(rgb, dtype=np.float32) / 255.0
+    linear = np.where(srgb <= 0.04045, srgb / 12.92, ((srgb + 0.055) / 1.055) ** 2.4)
+    matrix = np.array([[0.4124, 0.3576, 0.1805],
+                       [0.2126, 0.7152, 0.0722],
+                       [0.0193, 0.1192, 0.9505]], dtype=np.float32)
+    xyz = linear @ matrix.T / np.array([0.95047, 1.0, 1.08883], dtype=np.float32)
+    f = np.where(xyz > 216 / 24389, np.cbrt(xyz), (24389 / 27 * xyz + 16) / 116)
+    return np.stack([116 * f[..., 1] - 16, 500 * (f[..., 0] - f[..., 1]), 200 * (f[..., 1] - f[..., 2])], axis=-1)
+
+
+def kmeans_palette(pixels: np.ndarray, colors: int = 5, max_iter: int = 12,
+                   seed: int = 0) -> List[Tuple[int, int, int, int]]:
+    """
+    以 k-means（k-means++ 初始化，在 Lab 空間分群）找出主色。
+
+    Args:
+        pixels: (N, 3) 的 RGB 像素。
+
+    Returns:
+        [(r, g, b, 佔比 0-100)]，佔比高的在前。
+    """
+    rgb = np.asarray(pixels, dtype=np.float32).reshape(-1, 3)
+    lab = rgb_to_lab(rgb)
+    rng = np.random.default_rng(seed)
+
+    centers = [lab[rng.integers(len(lab))]]
+    for _ in range(1, colors):
+        nearest = ((lab[:, None, :] - np.array(centers)[None]) ** 2).sum(axis=2).min(axis=1)
+        total = nearest.sum()
+        if total <= 0:
+            break   # 顏色數少於 k
+        centers.append(lab[rng.choice(len(lab), p=nearest / total)])
+    centers = np.array(centers)
+    k = len(centers)
+
+    labels = np.zeros(len(lab), dtype=np.intp)
+    for _ in range(max_iter):
+        labels = ((lab[:, None, :] - centers[None]) ** 2).sum(axis=2).argmin(axis=1)
+        counts = np.bincount(labels, minlength=k)
+        sums = np.stack([np.bincount(labels, weights=lab[:, channel], minlength=k) for channel in range(3)], axis=1)
+        updated = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], centers)
+        if np.allclose(updated, centers, atol=0.5):
+            break
+        centers = updated
+
+    counts = np.bincount(labels, minlength=k)
+    rgb_sums = np.stack([np.bincount(labels, weights=rgb[:, channel], minlength=k) for channel in range(3)], axis=1)
+    palette = []
+    for index in np.argsort(-counts):
+        if counts[index] == 0:
+            continue
+        r, g, b = (rgb_sums[index] / counts[index]).round().astype(int)
+        palette.append((int(r), int(g), int(b), int(round(100 * counts[index] / len(lab)))))
+    return palette
+
+
+def extract_palette(path: str, colors: int = 5) -> Optional[List[Tuple[int, int, int, int]]]:
+    """在 worker process 中執行：讀取縮小的圖片並計算主色；無法讀取時回傳 None。"""
+    try:
+        with Image.open(path) as image:
+            image.draft("RGB", (128, 128))   # JPEG 直接以縮小的尺寸解碼
+            image = image.convert("RGB")
+            image.thumbnail((64, 64))
+            pixels = np.asarray(image).reshape(-1, 3)
+    except Exception:
+        return None
+    return kmeans_palette(pixels, colors) if len(pixels) else None
+
+
+def parse_hex_color(value: str) -> Tuple[int, int, int]:
+    """
+    "#rrggbb" / "rrggbb" / "#rgb" → (r, g, b)。
+
+    Raises:
+        ValueError: 格式不正確。
+    """
+    text = (value or "").strip().lstrip("#")
+    if len(text) == 3:
+        text = "".join(char * 2 for char in text)
+    if len(text) != 6:
+        raise ValueError(f"Invalid color: {value}")
+    return int(text[0:2], 16), int(text[2:4], 16), int(text[4:6], 16)
+
+
+class _ColorTable:
+    """某一時間點的全部調色盤；建立後不再修改，更新時整個替換。"""
+
+    def __init__(self, rows: List[Tuple[str, str, str, str]], max_colors: int):
+        self.items = []
+        self.palettes = []
+        self.source_names: List[str] = []
+        source_codes = {}
+        rgb = np.zeros((len(rows), max_colors, 3), dtype=np.float32)
+        self.ratios = np.zeros((len(rows), max_colors), dtype=np.float32)
+        codes = []
+
+        for index, (source, ident, path, encoded) in enumerate(rows):
+            palette = [tuple(color) for color in json.loads(encoded)][:max_colors]
+            self.items.append((source, ident, path))
+            self.palettes.append(palette)
+            if source not in source_codes:
+                source_codes[source] = len(self.source_names)
+                self.source_names.append(source)
+            codes.append(source_codes[source])
+            for slot, (r, g, b, ratio) in enumerate(palette):
+                rgb[index, slot] = (r, g, b)
+                self.ratios[index, slot] = ratio
+
+        # 三個色版各自連續存放，查詢時逐色版就地累加距離，減少暫存陣列
+        lab = rgb_to_lab(rgb)
+        self.channels = [np.ascontiguousarray(lab[..., channel].ravel()) for channel in range(3)]
+        self.ratios = self.ratios.ravel()
+        self.max_colors = max_colors
+        self.sources = np.array(codes, dtype=np.int16)
+
+    def __len__(self):
+        return len(self.items)
+
+    def search(self, rgb: Tuple[int, int, int], max_distance: float, min_ratio: float,
+               sources: Optional[Sequence[str]] = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """回傳符合的 (索引, 距離, 佔比)，依距離、再依佔比（高者優先）排序。"""
+        if not len(self.items):
+            empty = np.empty(0)
+            return empty.astype(np.intp), empty, empty
+
+        target = rgb_to_lab(np.array(rgb, dtype=np.float32))
+        squared = np.square(self.channels[0] - target[0])
+        buffer = np.empty_like(squared)
+        for channel in (1, 2):
+            np.subtract(self.channels[channel], target[channel], out=buffer)
+            squared += np.square(buffer, out=buffer)
+        squared[self.ratios < max(min_ratio, 1e-6)] = np.inf   # 佔比太小（或空位）的顏色不算
+
+        squared = squared.reshape(len(self.items), self.max_colors)
+        best_slot = squared.argmin(axis=1)
+        rows = np.arange(len(self.items))
+        best = np.sqrt(squared[rows, best_slot])
+        ratios = self.ratios.reshape(len(self.items), self.max_colors)[rows, best_slot]
+
+        mask = best <= max_distance
+        if sources:
+            codes = [self.source_names.index(name) for name in sources if name in self.source_names]
+            mask &= np.isin(self.sources, codes)
+        matched = np.nonzero(mask)[0]
+        order = np.lexsort((-ratios[matched], best[matched]))
+        matched = matched[order]
+        return matched, best[matched], ratios[matched]
+
+
+class ColorIndex:
+    """
+    Args:
+        db_path: 調色盤資料庫（SQLite）路徑。
+        sources: {來源名稱: 來源函式}。
+        max_workers: 計算調色盤的 process 數。
+        colors: 每張圖片的主色數（k-means 的 k）。
+        rescan_interval: 重新列出來源的間隔（秒），0 表示只在啟動時執行。
+    """
+
+    def __init__(self,
+                 db_path: str,
+                 sources: Dict[str, SourceFunc],
+                 max_workers: int = 2,
+                 colors: int = 5,
+                 rescan_interval: float = 3600.0):
+        self.db_path = db_path
+        self.sources = dict(sources)
+        self.max_workers = max_workers
+        self.colors = colors
+        self.rescan_interval = rescan_interval
+
+        self._table: Optional[_ColorTable] = None
+        self._wakeup = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------- lifecycle
+    @property
+    def ready(self) -> bool:
+        return self._table is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+        self._thread = threading.Thread(target=self._run, name="color-index", daemon=True)
+        self._thread.start()
+
+    def close(self):
+        self._stop.set()
+        self._wakeup.set()
+
+    def refresh(self):
+        """要求背景 thread 盡快重新列出所有來源。"""
+        self._wakeup.set()
+
+    # ------------------------------------------------------------------ query
+    def search(self, rgb: Tuple[int, int, int], offset: int = 0, limit: int = 60,
+               max_distance: float = 20.0, min_ratio: float = 10.0,
+               sources: Optional[Sequence[str]] = None) -> Tuple[List[ColorMatch], int]:
+        """
+        找出主色接近指定顏色的項目。
+
+        Returns:
+            (這一頁的結果, 符合的總數)；索引尚未載入時為 ([], 0)。
+        """
+        table = self._table
+        if table is None:
+            return [], 0
+        matched, distances, ratios = table.search(rgb, max_distance, min_ratio, sources)
+        results = []
+        for index, distance, ratio in zip(matched[offset:offset + limit],
+                                          distances[offset:offset + limit],
+                                          ratios[offset:offset + limit]):
+            source, ident, path = table.items[index]
+            results.append(ColorMatch(source, ident, path, round(float(distance), 2), int(ratio), table.palettes[index]))
+        return results, len(matched)
+
+    # ------------------------------------------------------------------- scan
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def _load_table(self, conn: sqlite3.Connection):
+        rows = conn.execute("SELECT source, ident, path, palette FROM palettes WHERE palette IS NOT NULL").fetchall()
+        self._table = _ColorTable(rows, self.colors)
+
+    def _scan_source(self, conn: sqlite3.Connection, executor: ProcessPoolExecutor, source: str) -> bool:
+        """列出來源並補算調色盤；回傳資料是否有變動。"""
+        try:
+            candidates = list(self.sources[source]())
+        except Exception as exc:
+            print(f"Color index source '{source}' unavailable: {exc}")
+            return False
+
+        known = {
+            ident: (path, mtime, size, palette)
+            for ident, path, mtime, size, palette in conn.execute(
+                "SELECT ident, path, mtime, size, palette FROM palettes WHERE source = ?", (source,)
+            )
+        }
+        seen, provided, todo = set(), [], []
+        for ident, path, image_path, palette in candidates:
+            if palette:
+                seen.add(ident)
+                encoded = json.dumps([list(color) for color in palette][:self.colors])
+                if known.get(ident) != (path, None, None, encoded):
+                    provided.append((source, ident, path, None, None, encoded))
+                continue
+            if not image_path or (Image is None):
+                continue
+            try:
+                stat = os.stat(image_path)
+            except OSError:
+                continue
+            seen.add(ident)
+            previous = known.get(ident)
+            if previous is None or previous[:3] != (path, stat.st_mtime, stat.st_size):
+                todo.append((ident, path, image_path, stat.st_mtime, stat.st_size))
+
+        stale = [(source, ident) for ident in known.keys() - seen]
+        conn.executemany("DELETE FROM palettes WHERE source = ? AND ident = ?", stale)
+        conn.executemany("INSERT OR REPLACE INTO palettes (source, ident, path, mtime, size, palette) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", provided)
+        conn.commit()
+
+        batch = []
+        palettes = executor.map(extract_palette, [row[2] for row in todo], [self.colors] * len(todo), chunksize=8)
+        for (ident, path, _, mtime, size), palette in zip(todo, palettes):
+            batch.append((source, ident, path, mtime, size, json.dumps(palette) if palette else None))
+            if len(batch) >= 256 or self._stop.is_set():
+                self._store(conn, batch)
+                if self._stop.is_set():
+                    break
+        self._store(conn, batch)
+        if todo:
+            print(f"Computed color palettes for {len(todo)} '{source}' items")
+        return bool(todo or stale or provided)
+
+    @staticmethod
+    def _store(conn: sqlite3.Connection, batch: List):
+        conn.executemany("INSERT OR REPLACE INTO palettes (source, ident, path, mtime, size, palette) "
+                         "VALUES (?, ?, ?, ?, ?, ?)", batch)
+        conn.commit()
+        batch.clear()
+
+    def _run(self):
+        conn = self._connect()
+        executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        try:
+            conn.executescript(SCHEMA)
+            self._load_table(conn)   # 先以上次的結果提供查詢
+            while not self._stop.is_set():
+                changed = False
+                for source in sorted(self.sources):
+                    changed = self._scan_source(conn, executor, source) or changed
+                if changed:
+                    self._load_table(conn)
+                self._wakeup.wait(self.rescan_interval if self.rescan_interval > 0 else None)
+                self._wakeup.clear()
+        except sqlite3.Error as exc:
+            print(f"Color index stopped: {exc}")
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            conn.close()
@@ -0,0 +1,128 @@
+"""
+縮圖服務：以 Pillow 產生縮小的 WebP / JPEG，存在以內容定址的磁碟快取。
+
+快取檔名為 sha1(路徑, mtime, 檔案大小, 縮圖尺寸, 格式)，原圖改變時自然換成新檔案。
+縮圖在有上限的 process pool 中產生（解碼大圖是 CPU 密集工作，不佔用 Flask 的 thread），
+同一張縮圖同時被多個請求要求時只產生一次。
+
+Pillow 為選用套件：未安裝時 get() 一律回傳 None，呼叫端改送原圖。
+"""
+import hashlib
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict, Iterable, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - Pillow 未安裝時退回原圖
+    Image = None
+    ImageOps = None
+
+
+FORMAT_EXTENSIONS = {"webp": "webp", "jpeg": "jpg"}
+
+
+def _render(source_path: str, target_path: str, size: int, fmt: str, quality: int) -> str:
+    """在 worker process 中執行：產生縮圖並以原子性的 rename 寫入快取。"""
+    with Image.open(source_path) as image:
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail((size, size))
+        if fmt == "jpeg" and image.mode not in ("RGB", "L"):
+            image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA", "L", "LA"):
+            image = image.convert("RGBA")
+
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        tmp_path = f"{target_path}.{os.getpid()}.tmp"
+        image.save(tmp_path, format=fmt.upper(), quality=quality)
+    os.replace(tmp_path, target_path)
+    return target_path
+
+
+class ThumbnailService:
+
+    def __init__(self,
+                 cache_dir: str,
+                 sizes: Iterable[int] = (160, 320, 640),
+                 fmt: str = "webp",
+                 quality: int = 80,
+                 max_workers: int = 2,
+                 min_source_bytes: int = 128 * 1024,
+                 timeout: float = 30.0):
+        self.cache_dir = cache_dir
+        self.sizes = sorted(sizes)
+        self.fmt = fmt if fmt in FORMAT_EXTENSIONS else "webp"
+        self.quality = quality
+        self.max_workers = max_workers
+        self.min_source_bytes = min_source_bytes
+        self.timeout = timeout
+
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+
+    @property
+    def available(self) -> bool:
+        return Image is not None
+
+    def normalize_size(self, size: int) -> int:
+        """只產生固定幾種尺寸，避免任意尺寸塞滿快取；取不小於要求的最小尺寸。"""
+        for allowed in self.sizes:
+            if size <= allowed:
+                return allowed
+        return self.sizes[-1]
+
+    def cache_path(self, abs_path: str, size: int, mtime_ns: int, file_size: int) -> str:
+        key = f"{abs_path}\0{mtime_ns}\0{file_size}\0{size}\0{self.fmt}".encode("utf-8", "surrogateescape")
+        digest = hashlib.sha1(key).hexdigest()
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.{FORMAT_EXTENSIONS[self.fmt]}")
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor
+
+    def get(self, abs_path: str, size: int) -> Optional[str]:
+        """
+        回傳縮圖快取檔路徑；原圖夠小、Pillow 未安裝或產生失敗時回傳 None（改送原圖）。
+        """
+        if not self.available:
+            return None
+        try:
+            stat = os.stat(abs_path)
+        except OSError:
+            return None
+        if stat.st_size < self.min_source_bytes:
+            return None
+
+        size = self.normalize_size(size)
+        target_path = self.cache_path(abs_path, size, stat.st_mtime_ns, stat.st_size)
+        if os.path.isfile(target_path):
+            return target_path
+
+        with self._lock:
+            future = self._inflight.get(target_path)
+            if future is None:
+                try:
+                    future = self._get_executor().submit(_render, abs_path, target_path, size, self.fmt, self.quality)
+                except RuntimeError:
+                    return None
+                self._inflight[target_path] = future
+                future.add_done_callback(lambda _, key=target_path: self._forget(key))
+
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            return None
+        except Exception as exc:
+            print(f"Failed to render thumbnail for {abs_path}: {exc}")
+            return None
+
+    def _forget(self, key: str):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)